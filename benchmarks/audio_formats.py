@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Throughput and size report of the audio output formats (signal/output) supported by the local libsndfile.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import os
+import sys
+import time
+import tempfile
+import argparse
+
+import numpy as np
+import soundfile as sf
+
+from rendering.utils.audio import AUDIO_FORMATS
+
+
+def main():
+    """Main entry function
+    """
+    parser = argparse.ArgumentParser(description="Audio output format report")
+    parser.add_argument("-d", "--duration", default=60.0, type=float,
+                        help="The duration (in seconds) of the encoded signal")
+    parser.add_argument("-s", "--samplerate", default=48000, type=int,
+                        help="The sampling rate")
+    parser.add_argument("-b", "--block_size", default=None, type=int,
+                        help="The number of samples written per block")
+    parser.add_argument("-c", "--compression_level", default=None, type=float,
+                        help="The compression level (between 0 and 1)")
+    args = parser.parse_args()
+
+    # Some noisy harmonic signal to avoid unrealistic compression ratios
+    nb_samples = int(args.duration * args.samplerate)
+    t = np.arange(nb_samples) / args.samplerate
+    y = 0.3 * np.sin(2 * np.pi * 150 * t) * np.sin(2 * np.pi * 3 * t) + 0.01 * np.random.RandomState(42).randn(nb_samples)
+    y = y.astype(np.float32)
+
+    header = "%6s %8s %12s %10s %14s" % ("format", "subtype", "size (KB)", "ratio", "x realtime")
+    print(header)
+    print("-" * len(header))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, (major, subtype, ext) in AUDIO_FORMATS.items():
+            if not sf.check_format(major, subtype):
+                print("%6s %8s %12s" % (name, subtype, "unsupported"))
+                continue
+
+            kwargs = {}
+            if (args.compression_level is not None) and (major != "WAV"):
+                kwargs["compression_level"] = args.compression_level
+
+            fname = os.path.join(tmp_dir, "bench.%s" % ext)
+            start = time.perf_counter()
+            with sf.SoundFile(fname, "w", args.samplerate, 1, subtype=subtype, format=major, **kwargs) as f_out:
+                block_size = args.block_size if args.block_size is not None else nb_samples
+                for i in range(0, nb_samples, block_size):
+                    f_out.write(y[i:i+block_size])
+            elapsed = time.perf_counter() - start
+
+            size = os.path.getsize(fname)
+            print("%6s %8s %12.1f %10.2f %14.1f" % (name, subtype, size / 1024, (nb_samples * 2) / size,
+                                                     args.duration / elapsed))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Memory and throughput report of the WORLD rendering for several FFT resolutions (signal/fft_len)
+    and compute types (signal/dtype). The parameters are synthetic, so no voice is required.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import sys
+import time
+import tracemalloc
+import argparse
+
+import numpy as np
+import pyworld as pw
+
+
+def synthetic_parameters(nb_frames, spectrum_dim, dtype):
+    """Generate a plausible set of WORLD parameters
+
+    :param nb_frames: the number of frames
+    :param spectrum_dim: the number of frequency bins (fft_len / 2 + 1)
+    :param dtype: the numpy type of the parameters
+    :returns: the f0, the spectrum and the aperiodicity
+    :rtype: tuple
+
+    """
+    rng = np.random.RandomState(42)
+    f0 = (120 + 20 * np.sin(np.arange(nb_frames) / 50.0)).astype(dtype)
+    f0[rng.rand(nb_frames) < 0.2] = 0
+    envelope = np.exp(-np.linspace(0, 8, spectrum_dim))
+    sp = (np.outer(rng.rand(nb_frames) + 0.5, envelope) * 1e-3).astype(dtype)
+    ap = np.tile(np.linspace(0.01, 0.9, spectrum_dim), (nb_frames, 1)).astype(dtype)
+    return f0, sp, ap
+
+
+def measure(fft_len, dtype, nb_frames, samplerate, frameshift):
+    """Measure the rendering of nb_frames frames for a given FFT length and dtype
+
+    :returns: a dictionary containing the measures
+    :rtype: dict
+
+    """
+    spectrum_dim = fft_len // 2 + 1
+    f0, sp, ap = synthetic_parameters(nb_frames, spectrum_dim, dtype)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    y = pw.synthesize(np.ascontiguousarray(f0, dtype=np.float64),
+                      np.ascontiguousarray(sp, dtype=np.float64),
+                      np.ascontiguousarray(ap, dtype=np.float64),
+                      samplerate, frameshift)
+    y = y.astype(dtype, copy=False)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "fft_len": fft_len,
+        "dtype": np.dtype(dtype).name,
+        "disk_bytes_per_frame": 2 * spectrum_dim * 4 + 4,
+        "memory_bytes_per_frame": 2 * spectrum_dim * np.dtype(dtype).itemsize,
+        "peak_memory_mb": peak / 1e6,
+        "frames_per_second": nb_frames / elapsed,
+        "realtime_factor": (nb_frames * frameshift / 1000.0) / elapsed,
+    }
+
+
+def main():
+    """Main entry function
+    """
+    parser = argparse.ArgumentParser(description="FFT resolution report for the WORLD rendering")
+    parser.add_argument("-n", "--nb_frames", default=20000, type=int,
+                        help="The number of frames rendered per configuration")
+    parser.add_argument("-s", "--samplerate", default=48000, type=int,
+                        help="The sampling rate")
+    parser.add_argument("-f", "--frameshift", default=5.0, type=float,
+                        help="The frameshift in ms")
+    parser.add_argument("-l", "--fft_len", default=[512, 1024, 2048], type=int, nargs="+",
+                        help="The FFT lengths to compare")
+    args = parser.parse_args()
+
+    header = "%8s %8s %12s %12s %14s %12s %10s" % ("fft_len", "dtype", "disk B/frm", "mem B/frm",
+                                                   "peak mem (MB)", "frames/s", "x realtime")
+    print(header)
+    print("-" * len(header))
+    for fft_len in args.fft_len:
+        for dtype in [np.float32, np.float64]:
+            res = measure(fft_len, dtype, args.nb_frames, args.samplerate, args.frameshift)
+            print("%8d %8s %12d %12d %14.1f %12.1f %10.1f" %
+                  (res["fft_len"], res["dtype"], res["disk_bytes_per_frame"], res["memory_bytes_per_frame"],
+                   res["peak_memory_mb"], res["frames_per_second"], res["realtime_factor"]))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
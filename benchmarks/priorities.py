@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Mixed workload on the shared worker pool: a bulk stage (many long utterances) runs while short interactive
+    previews arrive regularly. The latency of the previews, the makespan of the bulk stage and the queue wait per
+    priority class (see pyhts_executor.Executor.queueWaitStatistics) are reported without priorities (every stage in
+    the default class, first come first served) and with priorities (previews in the interactive class with a
+    deadline, bulk in the batch class).
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import sys
+import time
+import argparse
+import threading
+
+from pyhts_executor import Executor, scheduling
+
+
+class Utterance:
+    """Stand-in of a per-utterance task: sleeps for the duration of the utterance
+    """
+    def __init__(self, duration):
+        self.duration = duration
+
+    def __call__(self, item):
+        time.sleep(self.duration)
+        return item
+
+
+def measure(args, use_priorities):
+    """Run the mixed workload
+
+    :param args: the command line arguments
+    :param use_priorities: switch to use the priority classes and the deadlines
+    :returns: the preview latencies, the bulk makespan and the queue wait statistics
+    :rtype: tuple
+
+    """
+    executor = Executor(args.nb_proc)
+    bulk = {}
+
+    def run_bulk():
+        with scheduling("batch" if use_priorities else None):
+            start = time.time()
+            executor.map(Utterance(args.bulk_duration), range(args.bulk_utterances), name="bulk")
+            bulk["makespan"] = time.time() - start
+
+    try:
+        # Warm-up => the startup of the workers is not measured
+        executor.map(Utterance(0), range(args.nb_proc), name="warm-up")
+
+        bulk_thread = threading.Thread(target=run_bulk)
+        bulk_thread.start()
+        latencies = []
+        for _ in range(args.previews):
+            time.sleep(args.preview_interval)
+            start = time.time()
+            if use_priorities:
+                with scheduling("interactive", start + args.preview_deadline):
+                    executor.map(Utterance(args.preview_duration), range(args.preview_utterances), name="preview")
+            else:
+                executor.map(Utterance(args.preview_duration), range(args.preview_utterances), name="preview")
+            latencies.append(time.time() - start)
+        bulk_thread.join()
+
+        return (latencies, bulk["makespan"], executor.queueWaitStatistics())
+    finally:
+        executor.shutdown()
+
+
+def main():
+    """Main entry function
+    """
+    parser = argparse.ArgumentParser(description="Mixed interactive/batch workload on the worker pool")
+    parser.add_argument("-P", "--nb_proc", default=4, type=int,
+                        help="The number of workers")
+    parser.add_argument("--bulk_utterances", default=200, type=int,
+                        help="The number of utterances of the bulk stage")
+    parser.add_argument("--bulk_duration", default=0.2, type=float,
+                        help="The duration (in seconds) of a bulk utterance")
+    parser.add_argument("--previews", default=10, type=int,
+                        help="The number of previews")
+    parser.add_argument("--preview_utterances", default=2, type=int,
+                        help="The number of utterances of a preview")
+    parser.add_argument("--preview_duration", default=0.05, type=float,
+                        help="The duration (in seconds) of a preview utterance")
+    parser.add_argument("--preview_interval", default=0.5, type=float,
+                        help="The time (in seconds) between two previews")
+    parser.add_argument("--preview_deadline", default=0.5, type=float,
+                        help="The deadline (in seconds) of a preview")
+    args = parser.parse_args()
+
+    header = "%-11s %10s %10s %10s %12s   %s" % ("scheduling", "p50 (s)", "p95 (s)", "max (s)", "bulk (s)",
+                                               "queue wait per class (mean / max, deadline misses)")
+    print(header)
+    print("-" * len(header))
+    for use_priorities in [False, True]:
+        (latencies, makespan, waits) = measure(args, use_priorities)
+        latencies = sorted(latencies)
+        waits = ", ".join("%s: %.3f / %.3f, %d" % (priority, stats["mean"], stats["max"], stats["deadline_misses"])
+                          for priority, stats in waits.items())
+        print("%-11s %10.3f %10.3f %10.3f %12.2f   %s" %
+              ("priorities" if use_priorities else "fifo", latencies[len(latencies) // 2],
+               latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], latencies[-1], makespan, waits))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Tail latency and throughput of the request batching of pyhts_server.py for different batching windows. The
+    requests (one utterance of the synthetic corpus each, see benchmarks/synthetic_pipeline.py) arrive following a
+    Poisson process and are submitted to the batcher in-process, the external binaries being replaced by the
+    stand-ins.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import os
+import sys
+import json
+import shutil
+import random
+import asyncio
+import tempfile
+import argparse
+
+from benchmarks.synthetic_pipeline import make_voice, make_dnn_model, make_corpus, make_stubs
+from pyhts_server import RequestBatcher
+from pyhts_synthesizer import Synthesizer, load_configuration
+
+
+async def load(batcher, labels, nb_requests, rate, seed):
+    """Submit the requests following a Poisson process and wait for all of them
+
+    :param batcher: the request batcher
+    :param labels: the list of (utterance, label) requested
+    :param nb_requests: the number of requests
+    :param rate: the mean number of requests per second
+    :param seed: the seed of the arrivals and of the utterances
+    :returns: the batcher statistics
+    :rtype: dict
+
+    """
+    rng = random.Random(seed)
+    batcher.start()
+
+    requests = []
+    for i in range(nb_requests):
+        (base, label) = labels[rng.randrange(len(labels))]
+        requests.append(asyncio.ensure_future(batcher.submit({base: label})))
+        await asyncio.sleep(rng.expovariate(rate))
+    await asyncio.gather(*requests)
+
+    statistics = batcher.statistics()
+    await batcher.stop()
+    return statistics
+
+
+def main():
+    """Main entry function
+    """
+    parser = argparse.ArgumentParser(description="Tail latency and throughput of the request batching")
+    parser.add_argument("-W", "--windows", default=[0.0, 0.005, 0.02, 0.05], type=float, nargs="+",
+                        help="The batching windows (max_delay, in seconds) to compare")
+    parser.add_argument("-n", "--nb_requests", default=200, type=int,
+                        help="The number of requests per window")
+    parser.add_argument("--rate", default=20.0, type=float,
+                        help="The mean number of requests per second")
+    parser.add_argument("--max_frames", default=20000, type=int,
+                        help="The maximum number of frames of a batch")
+    parser.add_argument("--max_requests", default=64, type=int,
+                        help="The maximum number of requests of a batch")
+    parser.add_argument("-G", "--generator", default="dnn", choices=["default", "dnn"],
+                        help="The generator (default if tensorflow is not available)")
+    parser.add_argument("-R", "--renderer", default="straight",
+                        help="The renderer")
+    parser.add_argument("-P", "--nb_proc", default=4, type=int,
+                        help="The number of utterances processed at the same time")
+    parser.add_argument("--delay", default=0.0, type=float,
+                        help="The delay (in seconds) of each call of a stand-in binary")
+    parser.add_argument("--frameshift", default=5, type=int,
+                        help="The frameshift (in ms)")
+    parser.add_argument("-w", "--work_dir", default=None, type=str,
+                        help="The working directory (default: a temporary directory)")
+    parser.add_argument("-o", "--output", default=None, type=str,
+                        help="Save the statistics of each window in this JSON file")
+    args = parser.parse_args()
+
+    remove_work_dir = args.work_dir is None
+    work_dir = os.path.abspath(tempfile.mkdtemp(prefix="pyhts_server_") if remove_work_dir else args.work_dir)
+
+    try:
+        # Synthetic voice, corpus and binaries
+        voice_dir = os.path.join(work_dir, "voice")
+        (conf_fname, input_dim, output_dim) = make_voice(voice_dir, 48000, args.frameshift, 2048, [256, 256])
+        corpus_dir = os.path.join(work_dir, "corpus")
+        make_corpus(corpus_dir, 50, 5, 30, args.frameshift)
+        labels = []
+        for fname in sorted(os.listdir(corpus_dir)):
+            with open(os.path.join(corpus_dir, fname)) as f_lab:
+                labels.append((os.path.splitext(fname)[0], f_lab.read()))
+        bin_dir = os.path.join(work_dir, "bin")
+        make_stubs(bin_dir)
+
+        generator = args.generator
+        if (generator == "dnn") and not make_dnn_model(voice_dir, input_dim, output_dim, [256, 256]):
+            print("tensorflow is not available, the DEFAULT generator is used")
+            generator = "default"
+
+        os.environ["PATH"] = bin_dir + os.pathsep + os.environ.get("PATH", "")
+        os.environ["PYHTS_STUB_DELAY"] = str(args.delay)
+        os.environ["PYHTS_STUB_FRAMESHIFT"] = str(args.frameshift)
+        os.environ["PYHTS_STUB_STATES"] = "5"
+
+        conf = load_configuration(conf_fname, generator, args.renderer, tmp_dir=os.path.join(work_dir, "tmp"))
+        results = []
+        header = "%-10s %10s %10s %10s %10s %9s %12s" % ("window (s)", "req/s", "p50 (s)", "p95 (s)", "p99 (s)",
+                                                          "batches", "req/batch")
+        print(header)
+        print("-" * len(header))
+        with Synthesizer(conf, args.nb_proc) as synthesizer:
+            # NOTE: warm-up => the models are loaded before the measures
+            synthesizer.synthesize(dict(labels[:1]))
+
+            for window in args.windows:
+                batcher = RequestBatcher(synthesizer, window, args.max_frames, args.max_requests)
+                res = asyncio.run(load(batcher, labels, args.nb_requests, args.rate, seed=42))
+                res["window"] = window
+                results.append(res)
+                print("%-10g %10.2f %10.3f %10.3f %10.3f %9d %12.2f" %
+                      (window, res["throughput"], res["latency_p50"], res["latency_p95"], res["latency_p99"],
+                       res["batches"], res["requests_per_batch"]))
+
+        if args.output is not None:
+            with open(args.output, "w") as f_out:
+                json.dump({"generator": generator, "renderer": args.renderer, "rate": args.rate,
+                           "nb_requests": args.nb_requests, "windows": results}, f_out, indent=2)
+    finally:
+        if remove_work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Import time and memory of the generators and renderers: each combination is loaded through the registries
+    (generation.getGeneratorClass, rendering.getRendererClass) in a fresh interpreter, after the modules imported by
+    synth.py, and compared with loading all the generators and renderers (the cost of every run before the lazy
+    loading).
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# The modules which are worth knowing they are loaded
+HEAVY_MODULES = ["tensorflow", "pyworld", "scipy", "soundfile", "numpy"]
+
+# Code run in the fresh interpreter: the generator and the renderers are given as arguments ("*" = all)
+PROBE = """
+import sys, time, json, resource
+start = time.perf_counter()
+import synth, generation, rendering
+error = None
+try:
+    generators = list(generation.GENERATORS.keys()) if sys.argv[1] == "*" else [sys.argv[1]]
+    renderers = list(rendering.RENDERERS.keys()) if sys.argv[2] == "*" else sys.argv[2].split("+")
+    for name in generators:
+        generation.getGeneratorClass(name)
+    for name in renderers:
+        rendering.getRendererClass(name)
+except ImportError as e:
+    error = str(e)
+elapsed = time.perf_counter() - start
+print(json.dumps({"time": elapsed, "maxrss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  "modules": [m for m in %s if m in sys.modules], "error": error}))
+""" % repr(HEAVY_MODULES)
+
+
+def measure(generator, renderer, repeat):
+    """Measure the loading of a generator and a renderer in fresh interpreters
+
+    :param generator: the generator name ("*" = all)
+    :param renderer: the renderer name(s) ("*" = all)
+    :param repeat: the number of measures (the fastest one is kept)
+    :returns: a dictionary containing the measures
+    :rtype: dict
+
+    """
+    pyhts_path = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+    best = None
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", PROBE, generator, renderer], cwd=pyhts_path,
+                                stdout=subprocess.PIPE, check=True).stdout
+        res = json.loads(output.decode().strip().split("\n")[-1])
+        if (best is None) or (res["time"] < best["time"]):
+            best = res
+
+    return best
+
+
+def main():
+    """Main entry function
+    """
+    parser = argparse.ArgumentParser(description="Import time and memory of the generators and renderers")
+    parser.add_argument("-G", "--generators", default=["none", "default", "dnn"], nargs="+",
+                        help="The generators to load")
+    parser.add_argument("-R", "--renderers", default=["straight", "world", "ema", "weight"], nargs="+",
+                        help="The renderers to load (several renderers can be joined by \"+\")")
+    parser.add_argument("-r", "--repeat", default=3, type=int,
+                        help="The number of measures per combination (the fastest one is reported)")
+    args = parser.parse_args()
+
+    header = "%-10s %-16s %10s %10s  %s" % ("generator", "renderer", "time (s)", "RSS (MB)", "heavy modules loaded")
+    print(header)
+    print("-" * len(header))
+    combinations = [(g, r) for g in args.generators for r in args.renderers] + [("*", "*")]
+    for generator, renderer in combinations:
+        res = measure(generator, renderer, args.repeat)
+        name = (generator, renderer) if generator != "*" else ("all", "all (eager)")
+        modules = ", ".join(res["modules"]) if res["error"] is None else "unavailable (%s)" % res["error"]
+        print("%-10s %-16s %10.3f %10.1f  %s" % (name[0], name[1], res["time"], res["maxrss"] / 1024, modules))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
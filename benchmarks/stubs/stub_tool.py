@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Stand-in for the HTS/SPTK/matlab binaries used by pyhts (HHEd, HMGenS, sopr, mgc2sp, x2x, mlpg, vopr, matlab).
+
+    The tool to emulate is given by the name used to call the script (the benchmark harness creates one symbolic link
+    per tool). Each tool emits correctly sized outputs (and plausible values, so that the real renderers do not fail)
+    after a configurable delay:
+      - PYHTS_STUB_DELAY: the delay (in seconds) of each call,
+      - PYHTS_STUB_DELAY_<TOOL>: the delay of the calls of a given tool (e.g. PYHTS_STUB_DELAY_HMGENS),
+      - PYHTS_STUB_FRAME_DELAY: an additional delay (in seconds) per processed frame,
+      - PYHTS_STUB_BUSY: if set to 1, the delay is spent computing instead of sleeping (CPU bound tools),
+      - PYHTS_STUB_FRAMESHIFT: the frameshift (in ms) used to convert the label times (HMGenS),
+      - PYHTS_STUB_STATES: the number of emitting states (HMGenS).
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import os
+import re
+import sys
+import time
+import wave
+
+import numpy as np
+
+UNVOICED = -1.0e10
+
+
+###############################################################################
+# Helpers
+###############################################################################
+def wait(tool, nb_frames=0):
+    """Spend the configured delay of the tool
+
+    :param tool: the name of the tool
+    :param nb_frames: the number of frames processed by the call
+    :returns: None
+    :rtype:
+
+    """
+    delay = float(os.environ.get("PYHTS_STUB_DELAY_%s" % tool.upper(), os.environ.get("PYHTS_STUB_DELAY", 0.0)))
+    delay += nb_frames * float(os.environ.get("PYHTS_STUB_FRAME_DELAY", 0.0))
+    if delay <= 0:
+        return
+
+    if os.environ.get("PYHTS_STUB_BUSY", "0") == "1":
+        end = time.process_time() + delay
+        while time.process_time() < end:
+            pass
+    else:
+        time.sleep(delay)
+
+
+def option(args, name, default=None):
+    """Get the value following an option in the argument list
+    """
+    if name in args:
+        return args[args.index(name) + 1]
+    return default
+
+
+def read_input(args):
+    """Read the float32 input of an SPTK tool: the last argument if it is a file, the standard input else
+    """
+    if (len(args) > 0) and os.path.isfile(args[-1]):
+        return np.fromfile(args[-1], dtype=np.float32)
+    return np.frombuffer(sys.stdin.buffer.read(), dtype=np.float32)
+
+
+def write_output(data):
+    """Write the float32 output of an SPTK tool on the standard output
+    """
+    sys.stdout.buffer.write(np.ascontiguousarray(data, dtype=np.float32).tobytes())
+
+
+###############################################################################
+# HTS
+###############################################################################
+def hhed(args):
+    """HHEd: write the composed model (-w) and the tied list requested by the CO command of the script
+    """
+    out_mmf = option(args, "-w")
+    (hed_fname, list_fname) = args[-2:]
+
+    with open(hed_fname) as f_hed:
+        hed = f_hed.read()
+
+    labels = []
+    m = re.search('AU "([^"]*)"', hed)
+    if (m is not None) and os.path.isfile(m.group(1)):
+        with open(m.group(1)) as f_list:
+            labels = [line.strip() for line in f_list if line.strip()]
+
+    wait("HHEd")
+    with open(out_mmf, "w") as f_mmf:
+        f_mmf.write("~o\n<STREAMINFO> 1 1\n<VECSIZE> 1 <NULLD><USER><DIAGC>\n")
+
+    m = re.search('CO "([^"]*)"', hed)
+    if m is not None:
+        with open(m.group(1), "w") as f_tied:
+            f_tied.write("\n".join(labels) + "\n")
+
+    return 0
+
+
+def hmgens(args):
+    """HMGenS: generate the duration file and the parameter files of the streams declared in the synthesis
+    configuration for each label file of the script file
+    """
+    frameshift = float(os.environ.get("PYHTS_STUB_FRAMESHIFT", 5.0)) * 10000  # HTK unit
+    nb_states = int(os.environ.get("PYHTS_STUB_STATES", 5))
+
+    with open(option(args, "-C")) as f_cfg:
+        cfg = f_cfg.read()
+    orders = [int(o) for o in re.search('PDFSTRORDER = "IntVec [0-9]+ ([0-9 ]+)"', cfg).group(1).split()]
+    exts = re.search('PDFSTREXT = "StrVec [0-9]+ ([^"]+)"', cfg).group(1).split()
+
+    out_dir = option(args, "-M")
+    with open(option(args, "-S")) as f_scp:
+        lab_fnames = [line.strip() for line in f_scp if line.strip()]
+
+    rng = np.random.RandomState(42)
+    for lab_fname in lab_fnames:
+        base = os.path.splitext(os.path.basename(lab_fname))[0]
+
+        # Phone durations: from the label times if any, 5 frames per state else
+        phones = []
+        with open(lab_fname) as f_lab:
+            for line in f_lab:
+                elts = line.strip().split()
+                if len(elts) >= 3:
+                    phones.append((elts[2], max(nb_states, int(round((int(elts[1]) - int(elts[0])) / frameshift)))))
+                elif len(elts) == 1:
+                    phones.append((elts[0], 5 * nb_states))
+        nb_frames = sum(d for (_, d) in phones)
+        wait("HMGenS", nb_frames)
+
+        # Duration file (state level)
+        t = 0
+        voiced = np.ones(nb_frames, dtype=bool)
+        with open(os.path.join(out_dir, base + ".dur"), "w") as f_dur:
+            for (label, dur) in phones:
+                states = [dur // nb_states] * nb_states
+                states[-1] += dur - sum(states)
+                for i, state_dur in enumerate(states):
+                    f_dur.write("%s.state[%d]: duration=%d (frame=%d -- %d)\n" % (label, i + 2, state_dur, t,
+                                                                                   t + state_dur - 1))
+                    t += state_dur
+                f_dur.write("%s: duration=%d (frame=%d -- %d)\n" % (label, dur, t - dur, t - 1))
+                if re.search("-(sil|pau)\\+", label) or (label in ["sil", "pau"]):
+                    voiced[t - dur:t] = False
+
+        # Parameters
+        for order, ext in zip(orders, exts):
+            if ext == "lf0":
+                lf0 = np.log(120 + 20 * np.sin(np.arange(nb_frames) / 40.0))
+                lf0[~voiced] = UNVOICED
+                lf0.astype(np.float32).tofile(os.path.join(out_dir, base + ".lf0"))
+            else:
+                data = 0.1 * rng.randn(nb_frames, order).astype(np.float32)
+                data.tofile(os.path.join(out_dir, "%s.%s" % (base, ext)))
+
+    return 0
+
+
+###############################################################################
+# SPTK
+###############################################################################
+def sopr(args):
+    """sopr: apply the supported operations (-magic/-MAGIC, -EXP, -LN, -a, -s, -m, -d, -P, -R, -UNIT) in order
+    """
+    data = read_input(args).astype(np.float64)
+    wait("sopr", data.size)
+
+    magic = None
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "-magic":
+            # NOTE: the input values are float32
+            magic = float(np.float32(args[i + 1]))
+            i += 1
+        elif arg == "-MAGIC":
+            data[data == magic] = float(args[i + 1])
+            magic = None
+            i += 1
+        elif arg in ["-a", "-s", "-m", "-d"]:
+            value = float(args[i + 1])
+            mask = data != magic if magic is not None else np.ones(data.shape, dtype=bool)
+            if arg == "-a":
+                data[mask] += value
+            elif arg == "-s":
+                data[mask] -= value
+            elif arg == "-m":
+                data[mask] *= value
+            else:
+                data[mask] /= value
+            i += 1
+        elif arg in ["-EXP", "-LN", "-P", "-R", "-UNIT"]:
+            mask = data != magic if magic is not None else np.ones(data.shape, dtype=bool)
+            if arg == "-EXP":
+                data[mask] = np.exp(data[mask])
+            elif arg == "-LN":
+                data[mask] = np.log(np.maximum(data[mask], 1e-30))
+            elif arg == "-P":
+                data[mask] = data[mask] ** 2
+            elif arg == "-R":
+                data[mask] = np.sqrt(np.abs(data[mask]))
+            else:
+                data[mask] = (data[mask] > 0).astype(np.float64)
+        i += 1
+
+    write_output(data)
+    return 0
+
+
+def mgc2sp(args):
+    """mgc2sp: emit a flat spectrum of fft_len/2+1 bins per frame (about 0.01 once normalized by sopr -d 32768 -P)
+    """
+    order = int(option(args, "-m", 25))
+    fft_len = int(option(args, "-l", 256))
+    data = read_input(args)
+    nb_frames = data.size // (order + 1)
+    wait("mgc2sp", nb_frames)
+
+    write_output(np.full((nb_frames, fft_len // 2 + 1), 3276.8, dtype=np.float32))
+    return 0
+
+
+def x2x(args):
+    """x2x: only the ascii to float conversion (+af) is supported
+    """
+    if "+af" not in args:
+        sys.stderr.write("x2x stub: only +af is supported\n")
+        return 1
+
+    data = np.array(sys.stdin.buffer.read().split(), dtype=np.float32)
+    wait("x2x")
+    write_output(data)
+    return 0
+
+
+def mlpg(args):
+    """mlpg: emit the static part of the mean of each frame (input: mean and variance of each window)
+    """
+    order = int(option(args, "-m", 25))
+    nb_windows = 1 + args.count("-d")
+    dim = (order + 1) * nb_windows
+    data = read_input([])
+    nb_frames = data.size // (2 * dim)
+    wait("mlpg", nb_frames)
+
+    write_output(data[:nb_frames * 2 * dim].reshape(nb_frames, 2 * dim)[:, :order + 1])
+    return 0
+
+
+def vopr(args):
+    """vopr: apply the operation (-a, -s, -m or -d) between the standard input and the given file
+    """
+    for (op, fn) in [("-a", np.add), ("-s", np.subtract), ("-m", np.multiply), ("-d", np.divide)]:
+        if op in args:
+            other = np.fromfile(option(args, op), dtype=np.float32)
+            data = read_input([])
+            wait("vopr", data.size)
+            size = min(data.size, other.size)
+            write_output(fn(data[:size], other[:size]))
+            return 0
+
+    sys.stderr.write("vopr stub: only the -a/-s/-m/-d forms are supported\n")
+    return 1
+
+
+###############################################################################
+# matlab (STRAIGHT)
+###############################################################################
+def matlab(args):
+    """matlab: read the STRAIGHT script from the standard input and write a silent waveform per utterance
+    """
+    script = sys.stdin.read()
+
+    out_path = re.search("out_path = '([^']*)';", script).group(1)
+    samplerate = int(re.search("samplerate = ([0-9]+);", script).group(1))
+    frameshift = float(re.search("prm.spectralUpdateInterval = ([0-9.]+);", script).group(1))
+    ext = re.search("audiowrite\\(sprintf\\('%s/%s\\.([a-z0-9]+)'", script).group(1)
+    basenames = dict((int(i), base) for i, base in re.findall("basenames{([0-9]+)} = '([^']*)';", script))
+    frames = dict((int(i), int(n)) for i, n in re.findall("nb_frames\\(([0-9]+)\\) = ([0-9]+);", script))
+
+    for i, base in sorted(basenames.items()):
+        nb_frames = frames.get(i, 0)
+        wait("matlab", nb_frames)
+        nb_samples = int(nb_frames * frameshift * samplerate / 1000)
+        with wave.open("%s/%s.%s" % (out_path, base, ext), "wb") as f_wav:
+            f_wav.setnchannels(1)
+            f_wav.setsampwidth(2)
+            f_wav.setframerate(samplerate)
+            f_wav.writeframes(b"\x00\x00" * nb_samples)
+
+    return 0
+
+
+TOOLS = {
+    "HHEd": hhed,
+    "HMGenS": hmgens,
+    "sopr": sopr,
+    "mgc2sp": mgc2sp,
+    "x2x": x2x,
+    "mlpg": mlpg,
+    "vopr": vopr,
+    "matlab": matlab,
+}
+
+
+###############################################################################
+#  Envelopping
+###############################################################################
+def main():
+    """Main entry function
+    """
+    tool = os.path.basename(sys.argv[0])
+    if tool not in TOOLS:
+        sys.stderr.write("unknown stub tool \"%s\" (available: %s)\n" % (tool, ", ".join(sorted(TOOLS.keys()))))
+        return 1
+
+    return TOOLS[tool](sys.argv[1:])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
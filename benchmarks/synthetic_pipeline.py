@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    End-to-end benchmark of synth.py which does not require a trained voice nor HTS/SPTK/matlab.
+
+    A synthetic voice (configuration, window files, DNN questions/variances and, if tensorflow is available, a random
+    DNN checkpoint) and a synthetic label corpus of configurable size are generated in the work directory. The
+    external binaries are replaced by the stand-ins of benchmarks/stubs (see stub_tool.py for the delay options), put
+    first in the PATH of synth.py. Then, synth.py is run for each generator, renderer and number of processes, and the
+    throughput, makespan, peak memory and file I/O of each run are appended to a JSON results file:
+
+        python3 -m benchmarks.synthetic_pipeline -n 200 -P 1 2 4 --delay 0.05 -o benchmark.json
+
+    The renderers relying on a tongue model (EMA, WEIGHT) are not supported as the synthetic voice does not provide one.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import tempfile
+import argparse
+import platform
+import subprocess
+
+import numpy as np
+
+import pyhts_tracing
+
+PYHTS_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+
+STUB_TOOL = os.path.join(PYHTS_PATH, "benchmarks", "stubs", "stub_tool.py")
+STUB_NAMES = ["HHEd", "HMGenS", "sopr", "mgc2sp", "x2x", "mlpg", "vopr", "matlab"]
+
+GENERATORS = ["default", "dnn", "none"]
+RENDERERS = ["straight", "world"]
+
+PHONES = ["a", "e", "i", "o", "u", "p", "t", "k", "m", "n", "s", "l"]
+
+# Windows: static, delta, acceleration
+WINDOWS = ["1 1.0", "3 -0.5 0.0 0.5", "3 1.0 -2.0 1.0"]
+
+
+###############################################################################
+# Synthetic voice and corpus
+###############################################################################
+def make_voice(voice_dir, samplerate, frameshift, fft_len, dnn_hidden):
+    """Generate the synthetic voice (the model files are only touched by the HHEd stand-in)
+
+    :param voice_dir: the voice directory
+    :param samplerate: the sampling rate
+    :param frameshift: the frameshift in ms
+    :param fft_len: the FFT length
+    :param dnn_hidden: the list of the DNN hidden layer sizes
+    :returns: the configuration file path, the DNN input dimension and the DNN output dimension
+    :rtype: tuple
+
+    """
+    for sub_dir in ["win", "models", "trees", "DNN/var", "DNN/models"]:
+        os.makedirs(os.path.join(voice_dir, sub_dir), exist_ok=True)
+
+    for kind in ["mgc", "lf0", "bap"]:
+        for i, win in enumerate(WINDOWS):
+            with open(os.path.join(voice_dir, "win", "%s.win%d" % (kind, i + 1)), "w") as f_win:
+                f_win.write(win + "\n")
+    for fname in ["models/re_clustered_cmp.mmf", "models/re_clustered_dur.mmf", "full.list"]:
+        with open(os.path.join(voice_dir, fname), "w") as f_model:
+            f_model.write("")
+
+    def stream(kind, order, is_msd, nb_windows=3):
+        return {"kind": kind, "order": order, "is_msd": is_msd, "vflr": 0.01,
+                "winfiles": ["win/%s.win%d" % (kind, i + 1) for i in range(nb_windows)],
+                "parameters": {"gamma": 0}}
+
+    cmp_streams = [stream("mgc", 34, False), stream("lf0", 0, True), stream("bap", 4, False)]
+    ffo_streams = [stream("vuv", 0, False, 1)] + cmp_streams
+    conf = {
+        "signal": {"samplerate": samplerate, "frameshift": frameshift, "fft_len": fft_len},
+        "models": {
+            "global": {"nb_emitting_states": 5},
+            "dur": {"vflr": 0.01},
+            "cmp": {"streams": cmp_streams},
+            "ffo": {"streams": ffo_streams},
+        },
+        "settings": {
+            "synthesis": {"generator": "default", "renderer": "world", "tree_ext": "inf", "maxemiter": 20, "gv": {}},
+            "training": {"beam": "1e-10 1e-5 1e-3", "maxdev": 10, "mindur": 5},
+            "dnn": {"num_hidden_units": dnn_hidden, "hidden_activation": "Sigmoid", "num_threads": 1},
+        },
+        "gv": {"silences": ["sil"], "use": False, "cdgv": False},
+    }
+    conf_fname = os.path.join(voice_dir, "config.json")
+    with open(conf_fname, "w") as f_conf:
+        json.dump(conf, f_conf, indent=2)
+
+    # DNN questions (see utils/makefeature.pl) and variances
+    questions = ["Pos_C-State_in_Phone(Fw) MIN=2 MAX=6",
+                 "Pos_C-State_in_Phone(Bw) MIN=2 MAX=6",
+                 "Pos_C-Frame_in_State(Fw) MIN=0 MAX=10000",
+                 "Pos_C-Frame_in_State(Bw) MIN=0 MAX=10000",
+                 "Pos_C-Frame_in_Phone(Fw) MIN=0 MAX=10000",
+                 "Pos_C-Frame_in_Phone(Bw) MIN=0 MAX=10000"]
+    for pos, marks in [("L", ("^", "-")), ("C", ("-", "+")), ("R", ("+", "="))]:
+        for phone in PHONES + ["sil"]:
+            questions.append("%s-%s {*%s%s%s*}" % (pos, phone, marks[0], phone, marks[1]))
+    with open(os.path.join(voice_dir, "DNN", "qconf.conf"), "w") as f_qconf:
+        f_qconf.write("\n".join(questions) + "\n")
+
+    output_dim = 0
+    for cur_stream in ffo_streams:
+        dim = (cur_stream["order"] + 1) * len(cur_stream["winfiles"])
+        output_dim += dim
+        np.ones(dim, dtype=np.float32).tofile(os.path.join(voice_dir, "DNN", "var", "%s.var" % cur_stream["kind"]))
+    np.ones(output_dim, dtype=np.float32).tofile(os.path.join(voice_dir, "DNN", "var", "global.var"))
+
+    return (conf_fname, len(questions), output_dim)
+
+
+def make_dnn_model(voice_dir, input_dim, output_dim, dnn_hidden):
+    """Save a randomly initialised DNN checkpoint (requires tensorflow)
+
+    :returns: True if the checkpoint has been saved, False if tensorflow is not available
+    :rtype: bool
+
+    """
+    try:
+        import tensorflow as tf
+        import generation.dnn.DNNDataIO as DNNDataIO
+        import generation.dnn.DNNDefine as DNNDefine
+    except ImportError:
+        return False
+
+    with tf.Graph().as_default():
+        inputs, _ = DNNDataIO.batched_data([input_dim, output_dim], 1)
+        keep_prob = tf.placeholder(tf.float32)
+        DNNDefine.inference(inputs, [input_dim, output_dim], dnn_hidden, "Sigmoid", "linear", keep_prob, seed=42)
+        saver = tf.train.Saver()
+        with tf.Session() as sess:
+            sess.run(tf.global_variables_initializer())
+            saver.save(sess, os.path.join(voice_dir, "DNN", "models", "model.ckpt"))
+
+    return True
+
+
+def make_corpus(corpus_dir, nb_utterances, min_phones, max_phones, frameshift, seed=42):
+    """Generate a corpus of full-context-like labels (quinphones with times)
+
+    :returns: the dictionary utterance => number of frames
+    :rtype: dict
+
+    """
+    os.makedirs(corpus_dir, exist_ok=True)
+    rng = np.random.RandomState(seed)
+    frames = dict()
+    for i in range(nb_utterances):
+        base = "utt_%05d" % i
+        phones = ["sil"] + [PHONES[p] for p in rng.randint(0, len(PHONES), rng.randint(min_phones, max_phones + 1))] + ["sil"]
+        context = ["sil", "sil"] + phones + ["sil", "sil"]
+
+        t = 0
+        lines = []
+        for j in range(len(phones)):
+            nb_frames = int(rng.randint(10, 31))
+            label = "%s^%s-%s+%s=%s" % tuple(context[j:j + 5])
+            lines.append("%d %d %s" % (t * frameshift * 10000, (t + nb_frames) * frameshift * 10000, label))
+            t += nb_frames
+        frames[base] = t
+
+        with open(os.path.join(corpus_dir, base + ".lab"), "w") as f_lab:
+            f_lab.write("\n".join(lines) + "\n")
+
+    return frames
+
+
+def make_parameters(param_dir, frames, conf_fname, seed=42):
+    """Generate the parameter files expected by the renderers (used by the NONE generator)
+    """
+    with open(conf_fname) as f_conf:
+        streams = json.load(f_conf)["models"]["cmp"]["streams"]
+
+    os.makedirs(param_dir, exist_ok=True)
+    rng = np.random.RandomState(seed)
+    for base, nb_frames in frames.items():
+        for cur_stream in streams:
+            if cur_stream["kind"] == "lf0":
+                lf0 = np.full(nb_frames, np.log(120.0), dtype=np.float32)
+                lf0[:10] = -1.0e10
+                lf0.tofile(os.path.join(param_dir, base + ".lf0"))
+            else:
+                (0.1 * rng.randn(nb_frames, cur_stream["order"] + 1)).astype(np.float32) \
+                    .tofile(os.path.join(param_dir, "%s.%s" % (base, cur_stream["kind"])))
+
+
+def make_stubs(bin_dir):
+    """Create the stand-ins of the external binaries
+    """
+    os.makedirs(bin_dir, exist_ok=True)
+    for name in STUB_NAMES:
+        link = os.path.join(bin_dir, name)
+        if os.path.lexists(link):
+            os.remove(link)
+        os.symlink(STUB_TOOL, link)
+
+
+###############################################################################
+# Runs
+###############################################################################
+def directory_size(path):
+    """Size in bytes of the files of a directory (recursively)
+    """
+    size = 0
+    for root, _, fnames in os.walk(path):
+        size += sum(os.path.getsize(os.path.join(root, fname)) for fname in fnames)
+    return size
+
+
+def run_synthesis(args, env, conf_fname, corpus_dir, out_dir, generator, renderer, nb_proc, total_frames):
+    """Run synth.py once and measure it
+
+    :returns: the measures of the run
+    :rtype: dict
+
+    """
+    trace_fname = out_dir + "_trace.json"
+    cmd = [sys.executable, os.path.join(PYHTS_PATH, "synth.py"), "-c", conf_fname, "-G", generator, "-R", renderer,
+           "-P", str(nb_proc), "--tmp_dir", os.path.join(args.work_dir, "tmp"), "--trace", trace_fname,
+           "-l", out_dir + ".log", "-v"] + args.synth_args + [corpus_dir, out_dir]
+
+    start = time.time()
+    process = subprocess.Popen(cmd, env=env, cwd=args.work_dir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # NOTE: the resource usage of wait4 covers synth.py and all the processes it waited for
+    (_, status, rusage) = os.wait4(process.pid, 0)
+    wall = time.time() - start
+    returncode = os.waitstatus_to_exitcode(status)
+
+    nb_utterances = len([f for f in os.listdir(corpus_dir) if f.endswith(".lab")])
+    result = {
+        "generator": generator,
+        "renderer": renderer,
+        "nb_proc": nb_proc,
+        "status": returncode,
+        "utterances": nb_utterances,
+        "frames": total_frames,
+        "makespan": wall,
+        "utterances_per_second": nb_utterances / wall,
+        "frames_per_second": total_frames / wall,
+        "user_time": rusage.ru_utime,
+        "sys_time": rusage.ru_stime,
+        "peak_rss_mb": rusage.ru_maxrss / 1024,
+        "read_mb": rusage.ru_inblock * 512 / 2**20,
+        "written_mb": rusage.ru_oublock * 512 / 2**20,
+        "output_mb": directory_size(out_dir) / 2**20 if os.path.isdir(out_dir) else 0.0,
+        "stages": dict(),
+    }
+
+    # Wall time of the stages from the trace
+    if os.path.isfile(trace_fname):
+        with open(trace_fname) as f_trace:
+            for span in json.load(f_trace)["traceEvents"]:
+                if span["cat"] == "stage":
+                    result["stages"][span["name"]] = result["stages"].get(span["name"], 0.0) + span["dur"] / 1e6
+
+    return result
+
+
+###############################################################################
+#  Envelopping
+###############################################################################
+def main():
+    """Main entry function
+    """
+    parser = argparse.ArgumentParser(description="Synthetic end-to-end benchmark of synth.py (no voice nor HTS/SPTK needed)")
+    parser.add_argument("-n", "--nb_utterances", default=100, type=int,
+                        help="The number of utterances of the synthetic corpus")
+    parser.add_argument("--phones", default=[10, 60], type=int, nargs=2,
+                        help="The minimum and maximum number of phones per utterance")
+    parser.add_argument("-G", "--generators", default=GENERATORS, nargs="+", choices=GENERATORS,
+                        help="The generators to benchmark")
+    parser.add_argument("-R", "--renderers", default=RENDERERS, nargs="+", choices=RENDERERS,
+                        help="The renderers to benchmark")
+    parser.add_argument("-P", "--nb_proc", default=[1, 2, 4], type=int, nargs="+",
+                        help="The numbers of processes to benchmark")
+    parser.add_argument("--delay", default=0.0, type=float,
+                        help="The delay (in seconds) of each call of a stand-in binary")
+    parser.add_argument("--frame_delay", default=0.0, type=float,
+                        help="The additional delay (in seconds) per frame processed by a stand-in binary")
+    parser.add_argument("--busy", action="store_true",
+                        help="The stand-in binaries compute during their delay instead of sleeping")
+    parser.add_argument("--samplerate", default=48000, type=int,
+                        help="The sampling rate of the synthetic voice")
+    parser.add_argument("--frameshift", default=5, type=int,
+                        help="The frameshift (in ms) of the synthetic voice")
+    parser.add_argument("--fft_len", default=2048, type=int,
+                        help="The FFT length of the synthetic voice")
+    parser.add_argument("--dnn_hidden", default=[256, 256], type=int, nargs="+",
+                        help="The hidden layer sizes of the random DNN")
+    parser.add_argument("-w", "--work_dir", default=None, type=str,
+                        help="The work directory (default: a temporary directory removed at the end)")
+    parser.add_argument("-k", "--keep", action="store_true",
+                        help="Keep the outputs of the runs")
+    parser.add_argument("-o", "--output", default="benchmark.json", type=str,
+                        help="The JSON results file (the session is appended to it)")
+    parser.add_argument("synth_args", nargs=argparse.REMAINDER,
+                        help="Additional synth.py options (after --)")
+    args = parser.parse_args()
+    if args.synth_args and (args.synth_args[0] == "--"):
+        args.synth_args = args.synth_args[1:]
+
+    remove_work_dir = args.work_dir is None
+    if remove_work_dir:
+        args.work_dir = tempfile.mkdtemp(prefix="pyhts_benchmark_")
+    args.work_dir = os.path.abspath(args.work_dir)
+    os.makedirs(args.work_dir, exist_ok=True)
+
+    # Synthetic voice, corpus and binaries
+    voice_dir = os.path.join(args.work_dir, "voice")
+    (conf_fname, input_dim, output_dim) = make_voice(voice_dir, args.samplerate, args.frameshift, args.fft_len,
+                                                     args.dnn_hidden)
+    corpus_dir = os.path.join(args.work_dir, "corpus")
+    frames = make_corpus(corpus_dir, args.nb_utterances, args.phones[0], args.phones[1], args.frameshift)
+    total_frames = sum(frames.values())
+    bin_dir = os.path.join(args.work_dir, "bin")
+    make_stubs(bin_dir)
+
+    generators = list(args.generators)
+    if ("dnn" in generators) and not make_dnn_model(voice_dir, input_dim, output_dim, args.dnn_hidden):
+        print("tensorflow is not available, the DNN generator is skipped")
+        generators.remove("dnn")
+
+    env = dict(os.environ)
+    env["PATH"] = bin_dir + os.pathsep + env.get("PATH", "")
+    env["PYHTS_STUB_DELAY"] = str(args.delay)
+    env["PYHTS_STUB_FRAME_DELAY"] = str(args.frame_delay)
+    env["PYHTS_STUB_BUSY"] = "1" if args.busy else "0"
+    env["PYHTS_STUB_FRAMESHIFT"] = str(args.frameshift)
+    env["PYHTS_STUB_STATES"] = "5"
+    env.pop(pyhts_tracing.TRACE_DIR_ENV, None)
+
+    session = {
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": socket.gethostname(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "commit": subprocess.run(["git", "-C", PYHTS_PATH, "rev-parse", "--short", "HEAD"],
+                                 stdout=subprocess.PIPE, stderr=subprocess.DEVNULL).stdout.decode().strip(),
+        "settings": {"nb_utterances": args.nb_utterances, "phones": args.phones, "frames": total_frames,
+                     "delay": args.delay, "frame_delay": args.frame_delay, "busy": args.busy,
+                     "samplerate": args.samplerate, "frameshift": args.frameshift, "fft_len": args.fft_len,
+                     "synth_args": args.synth_args},
+        "runs": [],
+    }
+
+    header = "%-8s %-9s %3s %7s %11s %10s %11s %10s %10s" % ("gen", "renderer", "P", "status", "makespan (s)",
+                                                            "utt/s", "frames/s", "RSS (MB)", "I/O (MB)")
+    print(header)
+    print("-" * len(header))
+    try:
+        for generator in generators:
+            for renderer in args.renderers:
+                for nb_proc in args.nb_proc:
+                    out_dir = os.path.join(args.work_dir, "out_%s_%s_%d" % (generator, renderer, nb_proc))
+                    shutil.rmtree(out_dir, ignore_errors=True)
+                    if generator == "none":
+                        make_parameters(out_dir, frames, conf_fname)
+
+                    result = run_synthesis(args, env, conf_fname, corpus_dir, out_dir, generator, renderer, nb_proc,
+                                           total_frames)
+                    session["runs"].append(result)
+                    print("%-8s %-9s %3d %7d %11.2f %10.2f %11.1f %10.1f %10.1f" %
+                          (generator, renderer, nb_proc, result["status"], result["makespan"],
+                           result["utterances_per_second"], result["frames_per_second"], result["peak_rss_mb"],
+                           result["read_mb"] + result["written_mb"]))
+
+                    if not args.keep:
+                        shutil.rmtree(out_dir, ignore_errors=True)
+    finally:
+        # Append the session to the results
+        sessions = []
+        if os.path.isfile(args.output):
+            with open(args.output) as f_results:
+                sessions = json.load(f_results)
+        sessions.append(session)
+        with open(args.output, "w") as f_results:
+            json.dump(sessions, f_results, indent=2)
+        print("results appended to %s" % args.output)
+
+        if remove_work_dir and not args.keep:
+            shutil.rmtree(args.work_dir, ignore_errors=True)
+
+    return 0 if all(run["status"] == 0 for run in session["runs"]) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Startup latency and memory of the workers for each start method (see pyhts_executor.get_context). The state of
+    a synthesis main process is imitated by importing some modules (e.g. tensorflow) and allocating a ballast before
+    starting the workers. Two stages are then run to check that the workers are reused.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import sys
+import time
+import argparse
+import resource
+import importlib
+import multiprocessing
+
+from pyhts_executor import Executor, get_context
+
+
+def touch(item):
+    """Task of the benchmark stages: nothing but a round trip to the worker
+    """
+    return item
+
+
+def measure(start_method, nb_proc, nb_items):
+    """Start the workers with the given start method and run two stages
+
+    :param start_method: the start method
+    :param nb_proc: the number of workers
+    :param nb_items: the number of items of each stage
+    :returns: a dictionary containing the measures
+    :rtype: dict
+
+    """
+    executor = Executor(nb_proc, get_context(start_method))
+    try:
+        durations = []
+        for _ in range(2):
+            start = time.perf_counter()
+            executor.map(touch, range(nb_items), name="touch", concurrency=nb_proc)
+            durations.append(time.perf_counter() - start)
+    finally:
+        executor.shutdown()
+
+    return {"startup": [s[0] for s in executor.startups], "rss": [s[1] for s in executor.startups],
+            "modules": [s[2] for s in executor.startups], "workers": len(executor.startups),
+            "first_stage": durations[0], "second_stage": durations[1]}
+
+
+def main():
+    """Main entry function
+    """
+    parser = argparse.ArgumentParser(description="Startup latency and memory of the workers per start method")
+    parser.add_argument("-m", "--start_methods", default=multiprocessing.get_all_start_methods(), nargs="+",
+                        help="The start methods to compare")
+    parser.add_argument("-P", "--nb_proc", default=4, type=int,
+                        help="The number of workers")
+    parser.add_argument("-n", "--nb_items", default=100, type=int,
+                        help="The number of items of each stage")
+    parser.add_argument("-i", "--imports", default=[], nargs="+",
+                        help="The modules imported by the main process before starting the workers (e.g. tensorflow)")
+    parser.add_argument("-b", "--ballast", default=0, type=int,
+                        help="The memory (in MB) allocated by the main process before starting the workers")
+    args = parser.parse_args()
+
+    for module in args.imports:
+        importlib.import_module(module)
+    ballast = bytearray(args.ballast * 2**20)
+    for i in range(0, len(ballast), 4096):
+        ballast[i] = 1
+    print("main process: peak RSS = %.1f MB" % (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+
+    header = "%-12s %8s %14s %14s %14s %9s %12s %12s" % ("method", "workers", "startup (s)", "max startup",
+                                                        "RSS (MB)", "modules", "stage 1 (s)", "stage 2 (s)")
+    print(header)
+    print("-" * len(header))
+    for start_method in args.start_methods:
+        res = measure(start_method, args.nb_proc, args.nb_items)
+        print("%-12s %8d %14.3f %14.3f %14.1f %9d %12.3f %12.3f" %
+              (start_method, res["workers"], sum(res["startup"]) / res["workers"], max(res["startup"]),
+               sum(res["rss"]) / res["workers"] / 2**20, max(res["modules"]),
+               res["first_stage"], res["second_stage"]))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,15 +13,33 @@ LICENSE
     Created:  7 January 2017
 """
 
-from generation.nonegenerator import *
-from generation.defaultgenerator import *
-from generation.dnngenerator import *
+import importlib
+
+# Generator name => (module, class). The module is only imported when the generator is used, so that for
+# example an HMM-only run never loads tensorflow.
+GENERATORS = {
+    "NONE": ("generation.nonegenerator", "NONEGenerator"),
+    "DEFAULT": ("generation.defaultgenerator", "DEFAULTGenerator"),
+    "DNN": ("generation.dnngenerator", "DNNGenerator"),
+}
+
+def registerGenerator(name, module_name, class_name):
+    """Helper to add a generator to the registry (case insensitive name)
+    """
+    GENERATORS[name.strip().upper()] = (module_name, class_name)
+
+def getGeneratorClass(name):
+    """Helper to retrieve (and import on demand) the generator class corresponding to the given name (case insensitive)
+    """
+    try:
+        (module_name, class_name) = GENERATORS[name.strip().upper()]
+    except KeyError:
+        raise Exception("Acoustic generator " + name.strip().upper() + "Generator" + " unknown")
+
+    return getattr(importlib.import_module(module_name), class_name)
 
 def generateGenerator(conf, is_parallel=False, preserve=False):
     """Helper to instanciate the accurate generator based on the given configuration object conf.
     out_handle, logger, is_parallel and preserve are the arguments of the constructor of the generator.
     """
-    try:
-        return globals()[conf.generator.upper() + "Generator"](conf, is_parallel, preserve)
-    except KeyError:
-        raise Exception("Acoustic generator " + conf.generator.upper() + "Generator" + " unknown")
+    return getGeneratorClass(conf.generator)(conf, is_parallel, preserve)
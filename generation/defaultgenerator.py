@@ -22,6 +22,8 @@ from generation.utils.composition import *
 from generation.utils.configuration import *
 
 from utils import run_shell_command
+from pyhts_executor import run_stage, call
+import pyhts_tracing
 
 class DEFAULTGenerator:
     """Generator which is achieving the default HMGenS parameter generation
@@ -45,6 +47,9 @@ class DEFAULTGenerator:
         self.preserve = preserve
         self.configuration_generator = ConfigurationGenerator(conf)
 
+        # The labels covered by the composed models (kept between two calls of generate)
+        self.composed_labels = None
+
     def composition(self, use_gv):
         """Generate composed files (model files containing the predicted
         node for the labels also not present in the training corpus)
@@ -54,37 +59,26 @@ class DEFAULTGenerator:
         :rtype:
 
         """
+        compositions = []
+
         # CMP
-        thread_cmp = CMPComposition(self.conf,
-                                    self.conf.hts_file_pathes["cmp_tree"],
-                                    self.conf.hts_file_pathes["cmp_model"],
-                                    self.conf.hts_file_pathes["full_list"])
-        thread_cmp.start()
-        if self.nb_proc == 1:
-            thread_cmp.join()
+        compositions.append(CMPComposition(self.conf,
+                                           self.conf.hts_file_pathes["cmp_tree"],
+                                           self.conf.hts_file_pathes["cmp_model"],
+                                           self.conf.hts_file_pathes["full_list"]))
 
         # DUR
-        thread_dur = DURComposition(self.conf,
-                                    self.conf.hts_file_pathes["dur_tree"],
-                                    self.conf.hts_file_pathes["dur_model"],
-                                    self.conf.hts_file_pathes["full_list"])
-        thread_dur.start()
-        if self.nb_proc == 1:
-            thread_dur.join()
-
+        compositions.append(DURComposition(self.conf,
+                                           self.conf.hts_file_pathes["dur_tree"],
+                                           self.conf.hts_file_pathes["dur_model"],
+                                           self.conf.hts_file_pathes["full_list"]))
 
         # GV
         if use_gv:
-            thread_gv = GVComposition(self.conf,
-                                      self.conf.hts_file_pathes["gv"])
-            thread_gv.start()
-            thread_gv.join()
-
-
-        if self.nb_proc != 1:
-            thread_cmp.join()
-            thread_dur.join()
+            compositions.append(GVComposition(self.conf,
+                                              self.conf.hts_file_pathes["gv"]))
 
+        run_stage(self.conf, "model composition", call, compositions, self.nb_proc)
 
 
     def generate(self, in_path, out_path, gen_labfile_base_lst, use_gv):
@@ -99,11 +93,22 @@ class DEFAULTGenerator:
         """
 
         # Configuration part
-        self.configuration_generator.generateTrainingConfiguration()
-        self.configuration_generator.generateSynthesisConfiguration(use_gv)
-
-        # Model part
-        self.composition(use_gv)
+        with pyhts_tracing.span("config generation"):
+            self.configuration_generator.generateTrainingConfiguration()
+            self.configuration_generator.generateSynthesisConfiguration(use_gv)
+
+        # Model part (the models composed by a previous call are reused if they cover the labels)
+        with open(self.conf.LABEL_LIST_FNAME) as f_list:
+            labels = set(line.strip() for line in f_list if line.strip())
+        if (self.composed_labels is None) or not labels.issubset(self.composed_labels):
+            if self.composed_labels is not None:
+                labels |= self.composed_labels
+                with open(self.conf.LABEL_LIST_FNAME, "w") as f_list:
+                    f_list.write("\n".join(labels))
+            self.composition(use_gv)
+            self.composed_labels = labels
+        else:
+            self.logger.info("the composed models cover the labels, the composition is skipped")
 
         # Generate directory set
         dir_dict = {}
@@ -134,4 +139,13 @@ class DEFAULTGenerator:
                  self.conf.MODELLING["beam"], int(self.conf.pg_type), self.conf.TMP_CMP_MMF, self.conf.TMP_DUR_MMF,
                  "%s/%s" % (out_path, k), self.conf.TYPE_TIED_LIST_BASE+'_cmp', self.conf.TYPE_TIED_LIST_BASE+'_dur')
 
-            run_shell_command(cmd, self.logger)
+            run_shell_command(cmd, self.logger, check=True)
+
+    def close(self):
+        """Release the resources kept between two calls of generate
+
+        :returns: None
+        :rtype:
+
+        """
+        self.composed_labels = None
@@ -18,10 +18,6 @@ import re
 
 import logging
 
-# Multi process
-# from multiprocessing import Process, Queue, JoinableQueue
-from queue import Queue as JoinableQueue
-
 from generation.utils.composition import *
 from generation.utils.configuration import *
 from generation.defaultgenerator import *
@@ -32,6 +28,14 @@ from generation.utils.dnnparamgeneration import *
 import tensorflow as tf
 import numpy
 
+# NOTE: get rid of stupid tensorflow warning
+import absl.logging
+logging.root.removeHandler(absl.logging._absl_handler)
+absl.logging._warn_preinit_stderr = False
+
+from pyhts_executor import run_stage
+import pyhts_tracing
+
 class DNNGenerator(DEFAULTGenerator):
     """DNN generator. It is actually relying in a two stages process:
            1. doing the default synthesis using HMM
@@ -58,6 +62,9 @@ class DNNGenerator(DEFAULTGenerator):
         self.configuration_generator = ConfigurationGenerator(conf)
         self.frameshift = self.conf.frameshift * 10000 # frameshift ms * 10 000> frameshift in HTK unit (frameshift * 100ns)
 
+        # The restored DNN (configuration + tensorflow session), kept between two calls of generate
+        self.dnn_config = None
+
 
     def generateConfigFile(self):
         """Generate the configuration file needed by the DNN synthesis stage.
@@ -121,7 +128,8 @@ class DNNGenerator(DEFAULTGenerator):
         """
 
         with tf.Graph().as_default():
-            inputs, outputs = DNNDataIO.batched_data(config['num_io_units'], 1)
+            # NOTE: the batch size is left free to forward several frames per session run
+            inputs, outputs = DNNDataIO.batched_data(config['num_io_units'], None)
             keep_prob = tf.placeholder(tf.float32)
 
             predicted_outputs, _ = DNNDefine.inference(
@@ -158,6 +166,47 @@ class DNNGenerator(DEFAULTGenerator):
 
             return config
 
+    def restoreModel(self):
+        """Load the DNN configuration and restore the trained model in a new tensorflow session
+
+        :returns: the DNN specific configuration object containing the session
+        :rtype: dict
+
+        """
+        # load the config file
+        self.generateConfigFile()
+        config = DNNDataIO.load_config(self.conf.DNN_CONFIG)
+
+        model = '%s/DNN/models/model.ckpt' % self.conf.project_path
+        if ("restore_ckpt" in config) and (config['restore_ckpt'] > 0):
+            model = '-'.join([model, str(config['restore_ckpt'])])
+
+        # files = glob.glob("%s*" % model)
+        # if len(files) == 0:
+        #     sys.exit('  ERROR  main: No such file %s' % model)
+
+        # # See for the variance (FIXME: optional ?)
+        # stddev = numpy.ones(
+        #     config['num_output_units'], dtype=numpy.float32)
+
+        variance = DNNDataIO.read_data("%s/DNN/var/global.var" % self.conf.project_path)
+        stddev = numpy.sqrt(variance)
+
+        # Restore session
+        return self.loadSession(model, config, stddev)
+
+    def close(self):
+        """Release the resources kept between two calls of generate (the tensorflow session)
+
+        :returns: None
+        :rtype:
+
+        """
+        DEFAULTGenerator.close(self)
+        if self.dnn_config is not None:
+            self.dnn_config["session"].close()
+            self.dnn_config = None
+
     def generate(self, in_path, out_path, gen_labfile_base_lst, use_gv):
         """Parameter generation method.
 
@@ -175,58 +224,22 @@ class DNNGenerator(DEFAULTGenerator):
         #########################################################################
         ### Labels + duration => input feature vector
         #########################################################################
-        q = JoinableQueue()
-        processes = []
-        for base in range(self.nb_proc):
-            t = DNNParamPreparation(self.conf,
-                                    self.frameshift, out_path,
-                                    self.preserve, q)
-            t.start()
-            processes.append(t)
-
-
-        # Fill the queue for the workers
+        # First some cleaning
         for base in gen_labfile_base_lst:
-            # First some cleaning
             for cmp in self.conf.conf["models"]["cmp"]["streams"]:
                 kind = cmp["kind"]
                 os.remove("%s/%s.%s" % (out_path, base, kind))
 
-            q.put(base)
-
-        # Fill the queue by adding a None to indicate the end
-        for i in range(len(processes)):
-            q.put(None)
-
-        # Wait the end of the processes
-        for t in processes:
-            t.join()
+        run_stage(self.conf, "DNN preparation",
+                  DNNParamPreparation(self.conf, self.frameshift, out_path, self.preserve),
+                  gen_labfile_base_lst, self.nb_proc)
 
         #########################################################################
         ### Process the input vectors through the DNN
         #########################################################################
-        # load the config file
-        self.generateConfigFile()
-        config = DNNDataIO.load_config(self.conf.DNN_CONFIG)
-
-        model = '%s/DNN/models/model.ckpt' % self.conf.project_path
-        if ("restore_ckpt" in config) and (config['restore_ckpt'] > 0):
-            model = '-'.join([model, str(config['restore_ckpt'])])
-
-        # files = glob.glob("%s*" % model)
-        # if len(files) == 0:
-        #     sys.exit('  ERROR  main: No such file %s' % model)
-
-        # # See for the variance (FIXME: optional ?)
-        # stddev = numpy.ones(
-        #     config['num_output_units'], dtype=numpy.float32)
-
-        variance = DNNDataIO.read_data("%s/DNN/var/global.var" % self.conf.project_path)
-        stddev = numpy.sqrt(variance)
-
-        # Restore session
-        config = self.loadSession(model, config, stddev)
-
+        if self.dnn_config is None:
+            self.dnn_config = self.restoreModel()
+        config = self.dnn_config
 
         # FIXME: what?
         t = DNNParamGeneration(self.conf, config,
@@ -234,38 +247,18 @@ class DNNGenerator(DEFAULTGenerator):
                                self.preserve)
 
 
-        #
-        for base in gen_labfile_base_lst:
-            t.run(base)
-
-        config["session"].close()
+        # The frames of all the utterances are forwarded together
+        batch_frames = self.conf.conf["settings"]["dnn"].get("batch_frames", 4096)
+        with pyhts_tracing.span("DNN inference", "task", utterances=len(gen_labfile_base_lst)):
+            t.runBatch(gen_labfile_base_lst, batch_frames)
 
 
         #########################################################################
         ### Output feature vector => acoustic parameters
         #########################################################################
-        q = JoinableQueue()
-        processes = []
-        for base in range(self.nb_proc):
-            t = DNNParamExtraction(self.conf,
-                                   self.frameshift, out_path,
-                                   self.preserve, q)
-
-            t.start()
-            processes.append(t)
-
-        # Fill the queue for the workers
-        for base in gen_labfile_base_lst:
-            q.put(base)
-
-        # Fill the queue by adding a None to indicate the end
-        for i in range(len(processes)):
-            q.put(None)
-
-        # Wait the end of the processes
-        for t in processes:
-            t.join()
-
+        run_stage(self.conf, "DNN extraction",
+                  DNNParamExtraction(self.conf, self.frameshift, out_path, self.preserve),
+                  gen_labfile_base_lst, self.nb_proc)
 
         if not self.preserve:
             for base in gen_labfile_base_lst:
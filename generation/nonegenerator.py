@@ -51,3 +51,12 @@ class NONEGenerator:
 
         """
         self.logger.info("use of the NONEGenerator")
+
+    def close(self):
+        """Release the resources kept between two calls of generate (none for this generator)
+
+        :returns: None
+        :rtype:
+
+        """
+        pass
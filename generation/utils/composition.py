@@ -17,9 +17,6 @@ LICENSE
 import subprocess       # Shell command calling
 import logging
 
-
-from multiprocessing import Process
-
 import shlex
 from subprocess import Popen
 from subprocess import CalledProcessError
@@ -29,9 +26,9 @@ from utils import run_shell_command
 ################################################################################
 ### Model composition Processs
 ################################################################################
-class CMPComposition(Process):
+class CMPComposition:
     """ Class to generate the CMP models based on a given set of labels, the trained models and decision trees.
-    This class is a process to be able to be run in parallel.
+    The instances are callable to be run in parallel by the executor.
     """
 
     def __init__(self, conf, _cmp_tree_path, cmp_model_fpath, full_list_fpath):
@@ -45,7 +42,6 @@ class CMPComposition(Process):
         :rtype:
 
         """
-        Process.__init__(self)
         self.conf = conf
         self._cmp_tree_path = _cmp_tree_path
         self.cmp_model_fpath = cmp_model_fpath
@@ -76,7 +72,7 @@ class CMPComposition(Process):
             f.write('// Compact\n')
             f.write('CO "%s_cmp"\n\n' % self.conf.TYPE_TIED_LIST_BASE)
 
-    def run(self):
+    def __call__(self):
         """Generate the model adapted to the synthesis for the CMP part
 
         :returns: None
@@ -88,12 +84,12 @@ class CMPComposition(Process):
         self.logger.info("CMP unseen model building")
         cmd = '%s -A -B -C %s -D -T 1 -p -i -H %s -w %s %s %s' % \
               (self.conf.HHEd, self.conf.TRAIN_CONFIG, self.cmp_model_fpath, self.conf.TMP_CMP_MMF, self.conf.TYPE_HED_UNSEEN_BASE+'_cmp.hed', self.full_list_fpath)
-        run_shell_command(cmd, self.logger)
+        run_shell_command(cmd, self.logger, check=True)
 
 
-class DURComposition(Process):
+class DURComposition:
     """ Class to generate the duration models based on a given set of labels, the trained models and decision trees.
-    This class is a process to be able to be run in parallel.
+    The instances are callable to be run in parallel by the executor.
     """
 
     def __init__(self, conf, _dur_tree_path, dur_model_fpath, full_list_fpath):
@@ -107,7 +103,6 @@ class DURComposition(Process):
         :rtype:
 
         """
-        Process.__init__(self)
         self.conf = conf
         self._dur_tree_path = _dur_tree_path
         self.dur_model_fpath = dur_model_fpath
@@ -137,7 +132,7 @@ class DURComposition(Process):
             f.write('// Compact\n')
             f.write('CO "%s_dur"\n\n' % self.conf.TYPE_TIED_LIST_BASE)
 
-    def run(self):
+    def __call__(self):
         """Generate the model adapted to the synthesis for the duration part
 
         :returns: None
@@ -149,11 +144,11 @@ class DURComposition(Process):
         self.logger.info("Duration unseen model building")
         cmd = '%s -A -B -C %s -D -T 1 -p -i -H %s -w %s %s %s' % \
               (self.conf.HHEd, self.conf.TRAIN_CONFIG, self.dur_model_fpath, self.conf.TMP_DUR_MMF, self.conf.TYPE_HED_UNSEEN_BASE+'_dur.hed', self.full_list_fpath)
-        run_shell_command(cmd, self.logger)
+        run_shell_command(cmd, self.logger, check=True)
 
-class GVComposition(Process):
+class GVComposition:
     """ Class to generate the global variance.
-    This class is a process to be able to be run in parallel.
+    The instances are callable to be run in parallel by the executor.
     """
 
     def __init__(self, conf, _gv_path):
@@ -165,7 +160,6 @@ class GVComposition(Process):
         :rtype:
 
         """
-        Process.__init__(self)
         self.conf = conf
         self.gv_path = _gv_path
         self.logger = logging.getLogger("GVComposition")
@@ -194,7 +188,7 @@ class GVComposition(Process):
             f.write('// Compact\n')
             f.write('CO "%s"\n\n' % self.conf.GV_TIED_LIST_TMP)
 
-    def run(self):
+    def __call__(self):
         """Generate the model adapted to the synthesis for the global variance part
 
         :returns: None
@@ -207,4 +201,4 @@ class GVComposition(Process):
         cmd = '%s -A -B -C %s -D -T 1 -p -i -H %s -w %s %s %s' % \
             (self.conf.HHEd, self.conf.TRAIN_CONFIG, self.gv_path+'/clustered.mmf', self.conf.TMP_GV_MMF, self.conf.GV_HED_UNSEEN_BASE+'.hed',
              self.gv_path+'/gv.list')
-        run_shell_command(cmd, self.logger)
+        run_shell_command(cmd, self.logger, check=True)
@@ -16,6 +16,7 @@ LICENSE
 
 import os
 import shutil
+import hashlib
 import logging
 
 class ConfigurationGenerator:
@@ -75,6 +76,21 @@ class ConfigurationGenerator:
             f.write('MINDUR = %s\n' % self.conf.MODELLING['mindur'])
 
 
+    def assetDigest(self, src_dir):
+        """Compute a digest identifying a read-only asset directory (path and state of its files)
+
+        :param src_dir: the asset directory
+        :returns: the digest
+        :rtype: str
+
+        """
+        sha1 = hashlib.sha1(src_dir.encode("utf-8"))
+        for fname in sorted(os.listdir(src_dir)):
+            stat = os.stat(os.path.join(src_dir, fname))
+            sha1.update(("%s:%d:%d" % (fname, stat.st_size, stat.st_mtime_ns)).encode("utf-8"))
+
+        return sha1.hexdigest()[:16]
+
     def generateSynthesisConfiguration(self, use_gv):
         """Generate the synthesis configuration file needed by HMGenS
 
@@ -116,12 +132,11 @@ class ConfigurationGenerator:
             # Windows
             f.write('WINFN = "')                                        # WINFN: Name of window coefficient files
 
-            win_dir = "%s/%s" % (os.path.relpath(self.conf.TMP_PATH), "win")
-            if os.path.exists(win_dir):
-                shutil.rmtree(win_dir)
-
             if self.conf.project_path is not None:
-                shutil.copytree("%s/%s" % (self.conf.project_path, "win"), win_dir)
+                # NOTE: the window files are shared (read-only) by the runs using the same voice
+                src_dir = os.path.realpath("%s/%s" % (self.conf.project_path, "win"))
+                win_dir = self.conf.workspace.shared("win_%s" % self.assetDigest(src_dir), src_dir)
+                self.conf.WIN_PATH = win_dir
 
                 for cur_stream in self.conf.STREAMS:
                     win = ""
@@ -131,6 +146,8 @@ class ConfigurationGenerator:
                     f.write('StrVec %d %s' % (len(cur_stream["winfiles"]), win))
 
             else:
+                win_dir = "%s/%s" % (self.conf.TMP_PATH, "win")
+                self.conf.WIN_PATH = win_dir
                 os.mkdir(win_dir)
 
                 for cur_stream in self.conf.STREAMS:
@@ -15,41 +15,33 @@ LICENSE
 
 import os
 import numpy as np
-import subprocess       # Shell command calling
 import re
 import logging
 
-# Multi process
-from multiprocessing import Process, Queue, JoinableQueue
+from pyhts_pipeline import Pipeline
 
-import generation.dnn.DNNDataIO as DNNDataIO
-import generation.dnn.DNNDefine as DNNDefine
-
-class DNNParamPreparation(Process):
+class DNNParamPreparation:
     """Helper class to prepare the DNN input feature vectors considering the given labels, the
     duration produced by HTS and a given configuration
     """
 
-    def __init__(self, conf, frameshift, out_path, preserve, queue):
+    def __init__(self, conf, frameshift, out_path, preserve):
         """Constructor
 
         :param conf: the user configuration object
         :param frameshift: the default frameshift
         :param out_path: path of the directory which is going to contain the input feature vector files
         :param preserve: switch to not delete intermediate produced files
-        :param queue: the queue which is going to contains the basenames of the files to deal with
         :returns: None
         :rtype:
 
         """
 
-        Process.__init__(self)
         self.conf = conf
         self.frameshift = frameshift
         self.out_path = out_path
         self.logger = logging.getLogger("DNNParamPreparation")
         self.preserve = preserve
-        self.queue = queue
 
     def convertDUR2LAB(self, input_dur_path, output_lab_path):
         """Convert duration file to an HTK lab formatted file
@@ -109,35 +101,28 @@ class DNNParamPreparation(Process):
 
         """
         config_path = self.conf.project_path + "/DNN/qconf.conf"
-        cmd = "perl %s/utils/makefeature.pl %s %d %s | x2x +af > %s" % \
-          (self.conf.PYHTS_PATH, config_path, self.frameshift, input_lab_path, output_ffi_path)
-
-        wrapped_cmd = ["bash", "-c", cmd]
-        subprocess.call(wrapped_cmd)
+        Pipeline(self.logger) \
+            .stage("perl", "%s/utils/makefeature.pl" % self.conf.PYHTS_PATH, config_path, self.frameshift, input_lab_path) \
+            .stage("x2x", "+af") \
+            .run(stdout=output_ffi_path)
 
 
-    def run(self):
-        """Run the parameter extraction
+    def __call__(self, base):
+        """Run the parameter extraction for the given utterance
 
+        :param base: the basename of the utterance
         :returns: None
         :rtype:
 
         """
-        while True:
-            base = self.queue.get()
-            if base is None:
-                break
-
-            self.logger.info("starting DNN preparation for %s" % base)
-            self.convertDUR2LAB("%s/%s.dur" % (self.out_path, base),
-                                "%s/%s.lab" % (self.out_path, base))
+        self.logger.info("starting DNN preparation for %s" % base)
+        self.convertDUR2LAB("%s/%s.dur" % (self.out_path, base),
+                            "%s/%s.lab" % (self.out_path, base))
 
-            self.makeFeature("%s/%s.lab" % (self.out_path, base),
-                            "%s/%s.ffi" % (self.out_path, base))
+        self.makeFeature("%s/%s.lab" % (self.out_path, base),
+                        "%s/%s.ffi" % (self.out_path, base))
 
-            self.logger.info("end of DNN preparation for %s" % base)
-
-            self.queue.task_done()
+        self.logger.info("end of DNN preparation for %s" % base)
 
 
 class DNNParamGeneration():
@@ -194,6 +179,9 @@ class DNNParamGeneration():
 
         """
 
+        # NOTE: imported here so that the workers running the preparation/extraction don't load tensorflow
+        import generation.dnn.DNNDataIO as DNNDataIO
+
         self.logger.debug('Start forwarding')
         self.logger.debug('  Processing %s' % ffi_path)
         forward_data, num_examples = DNNDataIO.read_data_from_file([ffi_path, None], config['num_io_units'])
@@ -238,30 +226,68 @@ class DNNParamGeneration():
                      "%s/%s.ffi" % (self.out_path, base),
                      "%s/%s.ffo" % (self.out_path, base))
 
+    def predict(self, features):
+        """Forward a matrix of input frames through the DNN in one session run
 
+        :param features: the input frames (nb_frames x nb_input_units)
+        :returns: the output frames (nb_frames x nb_output_units)
+        :rtype: np.array
 
-class DNNParamExtraction(Process):
+        """
+        config = self.dnn_config
+        return config["session"].run(config["predicted_outputs"],
+                                     feed_dict={config["inputs"]: features, config["keep_prob"]: 1.0})
+
+    def runBatch(self, bases, batch_frames):
+        """Run the parameter generation for several utterances: their frames are concatenated and forwarded by
+        batches of batch_frames frames (instead of one session run per frame)
+
+        :param bases: the basenames of the utterances
+        :param batch_frames: the maximum number of frames forwarded in one session run
+        :returns: None
+        :rtype:
+
+        """
+        (num_inputs, _) = self.dnn_config['num_io_units']
+        features = [np.fromfile("%s/%s.ffi" % (self.out_path, base), dtype=np.float32).reshape(-1, num_inputs)
+                    for base in bases]
+        if not features:
+            return
+        all_features = np.concatenate(features)
+
+        self.logger.info("DNN generation for %d utterances (%d frames)" % (len(bases), all_features.shape[0]))
+        predicts = [self.predict(all_features[start:start+batch_frames])
+                    for start in range(0, all_features.shape[0], batch_frames)]
+        predicts = np.concatenate(predicts) if predicts else np.zeros((0, self.dnn_config['num_io_units'][1]))
+
+        # Scatter the output frames to the utterances
+        start = 0
+        for base, cur_features in zip(bases, features):
+            end = start + cur_features.shape[0]
+            predicts[start:end].astype(np.float32).tofile("%s/%s.ffo" % (self.out_path, base))
+            start = end
+
+
+
+class DNNParamExtraction:
     """Helper to extract the acoustic parameters from the output features
     """
-    def __init__(self, conf, frameshift, out_path, preserve, queue):
+    def __init__(self, conf, frameshift, out_path, preserve):
         """Constructor
 
         :param conf: the user configuration object
         :param frameshift: the default frameshift
         :param out_path: path of the directory which is going to contain the input feature vector files
         :param preserve: switch to not delete intermediate produced files
-        :param queue: the queue which is going to contains the basenames of the files to deal with
         :returns: None
         :rtype:
 
         """
-        Process.__init__(self)
         self.conf = conf
         self.frameshift = frameshift
         self.out_path = out_path
         self.logger = logging.getLogger("DNNParamExtraction")
         self.preserve = preserve
-        self.queue = queue
 
     def extractParam(self, out_path, base):
         """Extract acoustic parameters from the output features for a specific utterance
@@ -276,8 +302,11 @@ class DNNParamExtraction(Process):
         for map_ffo in self.conf.conf["models"]["ffo"]["streams"]:
             ffo_size += (map_ffo["order"]+1) * len(map_ffo["winfiles"])
 
+        # NOTE: the mean and the variance are given to mlpg through its standard input (no intermediate files)
         ffo_path = "%s/%s.ffo" % (out_path, base)
-        T = int(os.path.getsize(ffo_path) / (ffo_size * 4))
+        ffo = np.fromfile(ffo_path, dtype=np.float32)
+        T = int(ffo.size / ffo_size)
+        ffo = ffo[:T * ffo_size].reshape(T, ffo_size)
         start = 0
         for map_ffo in self.conf.conf["models"]["ffo"]["streams"]:
             kind = map_ffo["kind"]
@@ -285,94 +314,66 @@ class DNNParamExtraction(Process):
             # Extract MEAN from DNN
             order = map_ffo["order"]
             dim = (order+1) * len(map_ffo["winfiles"])
-
-            cmd = "bcp +f -s %d -e %d -l %d %s > %s/%s.%s.mean" % (start, start + dim - 1, ffo_size, ffo_path, out_path, base, kind)
-            wrapped_cmd = ["bash", "-c", cmd]
-            subprocess.call(wrapped_cmd)
+            mean = np.ascontiguousarray(ffo[:, start:start+dim])
+            if self.preserve:
+                mean.tofile("%s/%s.%s.mean" % (out_path, base, kind))
 
             if kind != "vuv": # v/uv is just a mask => no dyn => no "generation"
 
                 # Generate variance
-                var_fname = "%s/%s.%s.var" % (out_path, base, kind)
                 array = np.fromfile("%s/DNN/var/%s.var" % (self.conf.project_path, kind), dtype=np.float32)
-                with open(var_fname, "wb") as f_out:
-                    for t in range(0, T):
-                        array.astype(np.float32).tofile(f_out)
-                        self.logger.debug("extract %s (%d:%d) var extracted from ffo" % (kind, t, T))
-
+                var = np.tile(array, (T, 1))
+                if self.preserve:
+                    var.tofile("%s/%s.%s.var" % (out_path, base, kind))
+                self.logger.debug("extract %s (%d frames) var extracted from ffo" % (kind, T))
 
                 win_files = map_ffo["winfiles"]
                 if len(win_files) < 3:
                     raise Exception("for DNN we need to have the delta and the acceleration window")
 
                 # Get Windows part
-                win_dir = "%s/%s" % (os.path.relpath(self.conf.TMP_PATH), "win")
-                win_delta = 0
+                win_dir = self.conf.WIN_PATH
                 with open("%s/%s" % (win_dir, os.path.basename(win_files[1]))) as f:
-                    line = f.readline().strip()
-                    elts = line.split()
-                    win_delta = " ".join(elts[1:])
+                    win_delta = f.readline().strip().split()[1:]
 
-                win_accel = 0
                 with open("%s/%s" % (win_dir, os.path.basename(win_files[2]))) as f:
-                    line = f.readline().strip()
-                    elts = line.split()
-                    win_accel = " ".join(elts[1:])
-
-                # Generate the parameter
-                cmd = "merge -l %d -L %d %s/%s.%s.mean < %s/%s.%s.var " % \
-                  (dim, dim, out_path, base, kind, out_path, base, kind)
-                cmd += "| mlpg -m %d -d %s -d %s " % \
-                  (order, win_delta, win_accel)
+                    win_accel = f.readline().strip().split()[1:]
+
+                # Generate the parameter (frame = mean followed by variance, as produced by merge)
+                pipeline = Pipeline(self.logger).stage("mlpg", "-m", order, "-d", *win_delta, "-d", *win_accel)
                 self.logger.debug("%s stream DNN in process" % kind)
 
                 # if lf0 we should apply the mask
                 if kind == "lf0":
-                    cmd += "| vopr -l 1 -m %s/%s.vuv | " % (out_path, base)
-                    cmd += "sopr -magic 0 -MAGIC -1.0E+10 "
+                    pipeline.stage("vopr", "-l", 1, "-m", "%s/%s.vuv" % (out_path, base))
+                    pipeline.stage("sopr", "-magic", 0, "-MAGIC", "-1.0E+10")
 
-                cmd += "> %s/%s.%s" % (out_path, base, kind)
-                wrapped_cmd = ["bash", "-c", cmd]
-                subprocess.call(wrapped_cmd)
+                pipeline.run(stdin=np.hstack([mean, var]).astype(np.float32),
+                             stdout="%s/%s.%s" % (out_path, base, kind))
 
                 # clean
-                if not self.preserve:
-                    os.remove("%s/%s.%s.mean" % (out_path, base, kind))
-                    os.remove("%s/%s.%s.var" % (out_path, base, kind))
-                    if (kind == "lf0"):
-                        os.remove("%s/%s.vuv" % (out_path, base))
-
+                if (not self.preserve) and (kind == "lf0"):
+                    os.remove("%s/%s.vuv" % (out_path, base))
 
             else:
                 # Adapt the mask for v/uv mask
-                cmd = "cat %s/%s.%s.mean | sopr -s 0.5 -UNIT > %s/%s.%s" % \
-                  (out_path, base, kind, out_path, base, kind)
-                wrapped_cmd = ["bash", "-c", cmd]
-                subprocess.call(wrapped_cmd)
-
-                if not self.preserve:
-                    os.remove("%s/%s.%s.mean" % (out_path, base, kind))
+                Pipeline(self.logger).stage("sopr", "-s", 0.5, "-UNIT") \
+                                     .run(stdin=mean, stdout="%s/%s.%s" % (out_path, base, kind))
 
             # Next
             start += dim
 
-    def run(self):
-        """Run the acoustic parameter extraction
+    def __call__(self, base):
+        """Run the acoustic parameter extraction for the given utterance
 
+        :param base: the basename of the utterance
         :returns: None
         :rtype:
 
         """
-        while True:
-            base = self.queue.get()
-            if base is None:
-                break
-
-            self.logger.info("starting DNN extraction for %s" % base)
-
-            # Extract coefficients from the ffo
-            self.extractParam(self.out_path, base)
+        self.logger.info("starting DNN extraction for %s" % base)
 
-            self.logger.info("end of DNN extraction for %s" % base)
+        # Extract coefficients from the ffo
+        self.extractParam(self.out_path, base)
 
-            self.queue.task_done()
+        self.logger.info("end of DNN extraction for %s" % base)
@@ -5,6 +5,8 @@
 import os
 import json
 
+from pyhts_workspace import Workspace
+
 class Configuration(object):
     """
     Configuration file to synthesize speech using python version of HTS
@@ -25,6 +27,21 @@ class Configuration(object):
         self.project_path = os.path.dirname(args.config)
         self.conf = self.parseConfig(args.config)
 
+        # Worker pool options
+        self.TASK_TIMEOUT = getattr(args, "task_timeout", None)
+        self.TASK_RETRIES = getattr(args, "task_retries", 0)
+        self.START_METHOD = getattr(args, "start_method", None)
+
+        # Scheduling: the utterance costs are estimated once the utterances are known
+        self.COST_MODEL = getattr(args, "cost_model", None)
+        self.utterance_costs = None
+
+        # Sharding: this run only synthesizes the shard SHARD_INDEX out of SHARD_COUNT
+        self.SHARD_INDEX = getattr(args, "shard_index", 0)
+        self.SHARD_COUNT = getattr(args, "shard_count", 1)
+        if (self.SHARD_COUNT < 1) or not (0 <= self.SHARD_INDEX < self.SHARD_COUNT):
+            raise Exception("invalid shard %d/%d" % (self.SHARD_INDEX, self.SHARD_COUNT))
+
         # HTS options
         self.pg_type = int(args.pg_type)
         self.imposed_duration = args.imposed_duration
@@ -47,13 +64,17 @@ class Configuration(object):
         # Pathes
         self.THIS_PATH = os.path.dirname(os.path.realpath(__file__))
         self.CWD_PATH = os.getcwd()
-        self.TMP_PATH = os.path.join(self.CWD_PATH, 'tmp')
-
-        # Create TMP_PATH if it doesn't exist
-        try:
-            os.mkdir(self.TMP_PATH)
-        except OSError:
-            pass
+        tmp_root = getattr(args, "tmp_dir", None)
+        if tmp_root is None:
+            tmp_root = os.path.join(self.CWD_PATH, 'tmp')
+        if self.SHARD_COUNT > 1:
+            # Each shard has its own workspace
+            tmp_root = os.path.join(tmp_root, "shard_%d_of_%d" % (self.SHARD_INDEX, self.SHARD_COUNT))
+
+        # Each run has its own unique TMP_PATH, the window files are shared between the runs
+        self.workspace = Workspace(os.path.abspath(tmp_root), getattr(args, "tmpfs", False))
+        self.TMP_PATH = self.workspace.path
+        self.WIN_PATH = None
 
         ## TMP PATHs
         # Configs
@@ -131,6 +152,33 @@ class Configuration(object):
         self.SIGNAL = conf["signal"]
         self.FREQWARPING = FREQWARP_DIC[str(self.SIGNAL["samplerate"])]
 
+        # Spectral resolution shared by the parameter conversion and the vocoders
+        self.FFT_LEN = int(self.SIGNAL.get("fft_len", 2048))
+        if (self.FFT_LEN <= 0) or (self.FFT_LEN & (self.FFT_LEN - 1)):
+            raise Exception("The FFT length (%d) should be a power of 2" % self.FFT_LEN)
+        self.SPECTRUM_DIM = self.FFT_LEN // 2 + 1
+
+        # Type used to store/process the spectral parameters (sp, ap, f0, wav)
+        self.SIGNAL_DTYPE = self.SIGNAL.get("dtype", "float32")
+        if self.SIGNAL_DTYPE not in ["float32", "float64"]:
+            raise Exception("The signal dtype \"%s\" is not supported (float32 or float64)" % self.SIGNAL_DTYPE)
+
+        # Audio output (format, subtype, compression level, block size)
+        self.AUDIO_OUTPUT = {
+            "format": "wav",
+            "subtype": None,
+            "compression_level": None,
+            "block_size": None,
+        }
+        self.AUDIO_OUTPUT.update(self.SIGNAL.get("output", {}))
+        self.AUDIO_OUTPUT["format"] = self.AUDIO_OUTPUT["format"].lower()
+        if self.AUDIO_OUTPUT["format"] not in ["wav", "flac", "ogg", "opus"]:
+            raise Exception("The audio output format \"%s\" is not supported (wav, flac, ogg or opus)" %
+                            self.AUDIO_OUTPUT["format"])
+        if (self.AUDIO_OUTPUT["compression_level"] is not None) and (self.AUDIO_OUTPUT["format"] == "wav"):
+            raise Exception("The compression level is only supported by the compressed audio output formats "
+                            "(flac, ogg or opus)")
+
         self.nb_emitting_states = conf["models"]["global"]["nb_emitting_states"]
         self.frameshift = conf["signal"]["frameshift"]
 
@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Input readers and output writers so that a corpus can be read from and written to a few containers
+    (tar, zip, HDF5) instead of millions of small files.
+
+    The readers list the utterances of the input (directory or archive) and materialize the files of the
+    utterances to synthesize in the intermediate storage (the external binaries need real files). The writers
+    receive the files of each rendered utterance and append them to the container, whose index is updated
+    after each chunk:
+      - dir: the output directory itself (default),
+      - tar: <out>/<name>.tar + <out>/<name>.tar.index.json (member => offset and size),
+      - zip: <out>/<name>.zip (the central directory is the index),
+      - hdf5: <out>/<name>.h5 (one byte dataset per file, requires h5py).
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import io
+import os
+import re
+import glob
+import json
+import shutil
+import tarfile
+import zipfile
+import hashlib
+
+try:
+    import h5py
+    import numpy as np
+except ImportError:
+    h5py = None
+
+# Available output containers
+OUTPUT_CONTAINERS = {"dir": None, "tar": "tar", "zip": "zip", "hdf5": "h5"}
+
+
+# The names of the files of an utterance, after its name: base.<ext>, base.<stream>.mean/var (DNN intermediate files),
+# base_weight.<ext>, base_ema.<ext> and base_<channel>.ply (EMA debug meshes, the channel containing no "_")
+# NOTE: the suffixes are explicit so that the files of the utterance base_x (or base.x) don't belong to base
+MEMBER_SUFFIX = re.compile(r"\.[^./]+|\.[^./]+\.(mean|var)|_(weight|ema)\.[^./]+|_[^./_]+\.ply")
+
+
+def is_member(name, base):
+    """Check if a file belongs to the utterance base (see MEMBER_SUFFIX)
+    """
+    return name.startswith(base) and (MEMBER_SUFFIX.fullmatch(name[len(base):]) is not None)
+
+
+def _utterance_members(names, base):
+    """Filter the members of a container belonging to the utterance base
+    """
+    return [name for name in names if is_member(name, base)]
+
+
+def _label_base(name):
+    """Get the utterance of a label member (None if the member is not a label)
+    """
+    if not name.endswith(".lab"):
+        return None
+    return re.sub(r"^/", "", name[:-len(".lab")])
+
+
+def output_files(out_path, base):
+    """List the output files of an utterance (see MEMBER_SUFFIX)
+
+    :param out_path: the output directory
+    :param base: the utterance
+    :returns: the dictionary relative path => size
+    :rtype: dict
+
+    """
+    outputs = dict()
+    prefix = glob.escape(os.path.join(out_path, base))
+    for fname in glob.glob(prefix + ".*") + glob.glob(prefix + "_*"):
+        rel_fname = os.path.relpath(fname, out_path)
+        if is_member(rel_fname, base) and os.path.isfile(fname):
+            outputs[rel_fname] = os.path.getsize(fname)
+
+    return outputs
+
+
+###############################################################################
+# Input readers
+###############################################################################
+class DirectoryReader:
+    """Reader of an input directory
+    """
+    def __init__(self, path):
+        self.path = path
+
+    def utterances(self):
+        """List the utterances (the label files) of the input
+
+        :returns: the sorted list of utterances
+        :rtype: list
+
+        """
+        gen_labfile_base_lst = []
+        for r, d, f in os.walk(self.path):
+            for file in f:
+                if '.lab' in file:
+                    tmp = os.path.join(r, file).replace(".lab", "").replace(self.path, "")
+                    tmp = re.sub(r"^/", "", tmp)
+                    gen_labfile_base_lst.append(tmp)
+
+        return sorted(gen_labfile_base_lst)
+
+    def read(self, name):
+        """Read an input file
+
+        :param name: the file name (relative to the input)
+        :returns: the content of the file
+        :rtype: bytes
+
+        """
+        with open(os.path.join(self.path, name), "rb") as f_in:
+            return f_in.read()
+
+    def materialize(self, gen_labfile_base_lst, dest_path):
+        """Make the files of the given utterances available as files
+
+        :param gen_labfile_base_lst: the list of utterances
+        :param dest_path: the directory where the files can be extracted
+        :returns: the directory containing the files
+        :rtype: str
+
+        """
+        return self.path
+
+
+class ArchiveReader:
+    """Base class of the archive readers: the subclasses provide names() and read(name)
+    """
+    def utterances(self):
+        return sorted(base for base in map(_label_base, self.names()) if base is not None)
+
+    def materialize(self, gen_labfile_base_lst, dest_path):
+        names = self.names()
+        for base in gen_labfile_base_lst:
+            for name in _utterance_members(names, base):
+                fname = os.path.join(dest_path, name)
+                os.makedirs(os.path.dirname(fname), exist_ok=True)
+                with open(fname, "wb") as f_out:
+                    f_out.write(self.read(name))
+
+        return dest_path
+
+
+class TarReader(ArchiveReader):
+    """Reader of a (possibly compressed) tar archive
+    """
+    def __init__(self, path):
+        self.archive = tarfile.open(path, "r:*")
+        self.members = dict((re.sub(r"^\./", "", m.name), m) for m in self.archive.getmembers() if m.isfile())
+
+    def names(self):
+        return list(self.members.keys())
+
+    def read(self, name):
+        return self.archive.extractfile(self.members[name]).read()
+
+
+class ZipReader(ArchiveReader):
+    """Reader of a zip archive
+    """
+    def __init__(self, path):
+        self.archive = zipfile.ZipFile(path, "r")
+
+    def names(self):
+        return [name for name in self.archive.namelist() if not name.endswith("/")]
+
+    def read(self, name):
+        return self.archive.read(name)
+
+
+class HDF5Reader(ArchiveReader):
+    """Reader of an HDF5 file containing one byte dataset per file (as written by HDF5Writer)
+    """
+    def __init__(self, path):
+        if h5py is None:
+            raise Exception("h5py is required to read %s" % path)
+        self.archive = h5py.File(path, "r")
+
+    def names(self):
+        names = []
+        self.archive.visititems(lambda name, obj: names.append(name) if isinstance(obj, h5py.Dataset) else None)
+        return names
+
+    def read(self, name):
+        return self.archive[name][()].tobytes()
+
+
+def open_input(path):
+    """Open the reader corresponding to the input path (directory or archive)
+
+    :param path: the input path
+    :returns: the reader
+    :rtype: DirectoryReader or ArchiveReader
+
+    """
+    if os.path.isdir(path):
+        return DirectoryReader(path)
+    elif path.endswith((".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")):
+        return TarReader(path)
+    elif path.endswith(".zip"):
+        return ZipReader(path)
+    elif path.endswith((".h5", ".hdf5")):
+        return HDF5Reader(path)
+
+    raise Exception("unsupported input %s (expected a directory, a tar, a zip or an HDF5 file)" % path)
+
+
+###############################################################################
+# Output writers
+###############################################################################
+class DirectoryWriter:
+    """Writer storing the files in the output directory
+    """
+    def __init__(self, out_path):
+        self.out_path = out_path
+        self.container = None
+
+    def add(self, src_path, base):
+        """Move the files of an utterance from src_path to the output
+
+        :param src_path: the directory containing the files of the utterance
+        :param base: the utterance
+        :returns: the number of bytes written
+        :rtype: int
+
+        """
+        nb_bytes = 0
+        for rel_fname, size in output_files(src_path, base).items():
+            nb_bytes += size
+            if src_path != self.out_path:
+                dest_fname = os.path.join(self.out_path, rel_fname)
+                os.makedirs(os.path.dirname(dest_fname), exist_ok=True)
+                shutil.move(os.path.join(src_path, rel_fname), dest_fname)
+
+        return nb_bytes
+
+    def flush(self):
+        pass
+
+    def files(self, base):
+        """Get the files of an utterance
+
+        :param base: the utterance
+        :returns: the dictionary name => size
+        :rtype: dict
+
+        """
+        return output_files(self.out_path, base)
+
+    def read(self, name):
+        """Read a file (None if it doesn't exist)
+        """
+        fname = os.path.join(self.out_path, name)
+        if not os.path.isfile(fname):
+            return None
+        with open(fname, "rb") as f_in:
+            return f_in.read()
+
+    def checksum(self, name):
+        """Get the SHA1 checksum of a file (None if it doesn't exist)
+        """
+        fname = os.path.join(self.out_path, name)
+        if not os.path.isfile(fname):
+            return None
+
+        sha1 = hashlib.sha1()
+        with open(fname, "rb") as f_in:
+            for block in iter(lambda: f_in.read(1 << 20), b""):
+                sha1.update(block)
+        return sha1.hexdigest()
+
+
+class ContainerWriter(DirectoryWriter):
+    """Base class of the container writers: the subclasses provide write(name, data), flush(), names() and read(name)
+    """
+    def add(self, src_path, base):
+        nb_bytes = 0
+        for rel_fname in output_files(src_path, base):
+            fname = os.path.join(src_path, rel_fname)
+            with open(fname, "rb") as f_in:
+                data = f_in.read()
+            self.write(rel_fname, data)
+            os.remove(fname)
+            nb_bytes += len(data)
+
+        return nb_bytes
+
+    def checksum(self, name):
+        data = self.read(name)
+        return None if data is None else hashlib.sha1(data).hexdigest()
+
+    def files(self, base):
+        names = self.names()
+        return dict((name, names[name]) for name in _utterance_members(names.keys(), base))
+
+
+class TarWriter(ContainerWriter):
+    """Writer appending the files to an uncompressed tar archive indexed by a JSON file (member => offset, size)
+    """
+    def __init__(self, out_path, name):
+        self.out_path = out_path
+        self.container = "%s.tar" % name
+        self.fname = os.path.join(out_path, self.container)
+        self.index_fname = self.fname + ".index.json"
+        self.index = dict()
+        if os.path.isfile(self.index_fname):
+            with open(self.index_fname) as f_index:
+                self.index = json.load(f_index)
+        self.archive = None
+
+    def write(self, name, data):
+        if self.archive is None:
+            self.archive = tarfile.open(self.fname, "a")
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        offset = self.archive.offset + len(info.tobuf(self.archive.format, self.archive.encoding, self.archive.errors))
+        self.archive.addfile(info, io.BytesIO(data))
+        self.index[name] = [offset, info.size]
+
+    def flush(self):
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+        with open(self.index_fname + ".tmp", "w") as f_index:
+            json.dump(self.index, f_index)
+        os.replace(self.index_fname + ".tmp", self.index_fname)
+
+    def names(self):
+        return dict((name, size) for name, (offset, size) in self.index.items())
+
+    def read(self, name):
+        if (name not in self.index) or not os.path.isfile(self.fname):
+            return None
+        (offset, size) = self.index[name]
+        with open(self.fname, "rb") as f_in:
+            f_in.seek(offset)
+            data = f_in.read(size)
+        return data if len(data) == size else None
+
+
+class ZipWriter(ContainerWriter):
+    """Writer appending the files to a zip archive (stored, as the audio files are already dense). The archive is opened
+    once for all the reads (e.g. the checks of a resumed run) until the next write.
+    """
+    def __init__(self, out_path, name):
+        self.out_path = out_path
+        self.container = "%s.zip" % name
+        self.fname = os.path.join(out_path, self.container)
+        self.archive = None
+        self.reader = None
+        self.index = None
+
+    def openReader(self):
+        """Open the archive for reading and index its central directory (None if the archive doesn't exist)
+        """
+        if (self.reader is None) and os.path.isfile(self.fname):
+            self.reader = zipfile.ZipFile(self.fname, "r")
+            # NOTE: for a name written twice (resumed run), the last entry wins
+            self.index = dict((info.filename, info) for info in self.reader.infolist())
+        return self.reader
+
+    def closeReader(self):
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+            self.index = None
+
+    def write(self, name, data):
+        if self.archive is None:
+            self.closeReader()
+            self.archive = zipfile.ZipFile(self.fname, "a", zipfile.ZIP_STORED)
+        self.archive.writestr(name, data)
+
+    def flush(self):
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+        self.closeReader()
+
+    def names(self):
+        if self.openReader() is None:
+            return dict()
+        return dict((name, info.file_size) for name, info in self.index.items())
+
+    def read(self, name):
+        if (self.openReader() is None) or (name not in self.index):
+            return None
+        return self.reader.read(self.index[name])
+
+
+class HDF5Writer(ContainerWriter):
+    """Writer storing each file as a byte dataset of an HDF5 file (the dataset path being the file name)
+    """
+    def __init__(self, out_path, name):
+        if h5py is None:
+            raise Exception("h5py is required to write HDF5 outputs")
+        self.out_path = out_path
+        self.container = "%s.h5" % name
+        self.fname = os.path.join(out_path, self.container)
+        self.archive = None
+
+    def write(self, name, data):
+        if self.archive is None:
+            self.archive = h5py.File(self.fname, "a")
+        if name in self.archive:
+            del self.archive[name]
+        self.archive.create_dataset(name, data=np.frombuffer(data, dtype=np.uint8), chunks=True)
+
+    def flush(self):
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+
+    def names(self):
+        if not os.path.isfile(self.fname):
+            return dict()
+        names = dict()
+        with h5py.File(self.fname, "r") as archive:
+            archive.visititems(lambda name, obj: names.update({name: obj.size}) if isinstance(obj, h5py.Dataset) else None)
+        return names
+
+    def read(self, name):
+        if not os.path.isfile(self.fname):
+            return None
+        with h5py.File(self.fname, "r") as archive:
+            if name not in archive:
+                return None
+            return archive[name][()].tobytes()
+
+
+def open_output(out_path, kind="dir", name="synthesis"):
+    """Open the writer of the outputs
+
+    :param out_path: the output directory
+    :param kind: the kind of container (see OUTPUT_CONTAINERS)
+    :param name: the name of the container (without extension)
+    :returns: the writer
+    :rtype: DirectoryWriter
+
+    """
+    if kind in (None, "dir"):
+        return DirectoryWriter(out_path)
+    elif kind == "tar":
+        return TarWriter(out_path, name)
+    elif kind == "zip":
+        return ZipWriter(out_path, name)
+    elif kind == "hdf5":
+        return HDF5Writer(out_path, name)
+
+    raise Exception("unknown output container \"%s\" (available: %s)" % (kind, ", ".join(OUTPUT_CONTAINERS)))
+
+
+def open_container(out_path, container):
+    """Open the writer of an existing container of the output directory (e.g. to read it back)
+
+    :param out_path: the output directory
+    :param container: the file name of the container (None for the output directory itself)
+    :returns: the writer
+    :rtype: DirectoryWriter
+
+    """
+    if container is None:
+        return DirectoryWriter(out_path)
+
+    for kind, ext in OUTPUT_CONTAINERS.items():
+        if (ext is not None) and container.endswith("." + ext):
+            return open_output(out_path, kind, container[:-len(ext)-1])
+
+    raise Exception("unknown container %s" % container)
@@ -0,0 +1,890 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Worker pool shared by all the per-utterance stages (generation and rendering).
+
+    The workers are persistent processes reused from one stage to the next. A stage is a callable
+    applied to a list of items (generally the utterance basenames). The callable is sent once per worker
+    and per stage, then each idle worker is given the next pending item. The parent process monitors the
+    workers so that a crash or a timeout doesn't block the stage: the task is retried (if authorized)
+    and the worker is replaced.
+
+    Several threads can run stages at the same time (e.g. the synthesizers of an interactive service and of a batch
+    job, see pyhts_synthesizer.py). The pending tasks are then given to the idle workers by priority class
+    (interactive, default, batch), by earliest deadline inside a class and in submission order otherwise. A running
+    task is never interrupted, so a batch stage is preempted at utterance boundaries. The priority class and the
+    deadline of the stages of a thread are set with the scheduling context manager. The time spent by the tasks in the
+    queue is measured per class.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import os
+import sys
+import time
+import heapq
+import atexit
+import logging
+import resource
+import threading
+import traceback
+import itertools
+import multiprocessing
+
+from contextlib import contextmanager
+from multiprocessing.connection import wait
+
+import pyhts_tracing
+from pyhts_scheduling import lpt_makespan
+
+
+# The start methods by order of preference (fork copies the whole state of the main process)
+START_METHODS = ["forkserver", "spawn", "fork"]
+
+# The modules imported once by the fork server so that each worker doesn't have to (the heavy modules, such as
+# tensorflow, are imported by the workers which need them)
+PRELOAD_MODULES = ["pyhts_executor", "pyhts_tracing", "pyhts_pipeline", "utils", "numpy"]
+
+# The maximum duration (in seconds) of the startup of a worker
+STARTUP_TIMEOUT = 60
+
+# The errors of a worker connection meaning that the worker is dead
+WORKER_DEATH = (EOFError, ConnectionResetError, BrokenPipeError)
+
+# The priority classes, from the most to the least urgent
+PRIORITY_CLASSES = ["interactive", "default", "batch"]
+DEFAULT_PRIORITY = "default"
+
+
+###############################################################################
+# Errors
+###############################################################################
+class TaskError(Exception):
+    """Exception raised when some tasks of a stage failed (after the retries)
+    """
+    def __init__(self, stage, errors):
+        """Constructor
+
+        :param stage: the name of the stage
+        :param errors: the dictionary item => error message of the failed tasks
+        :returns: None
+        :rtype:
+
+        """
+        self.stage = stage
+        self.errors = errors
+
+        msg = "%d task(s) of the stage \"%s\" failed" % (len(errors), stage)
+        for item, error in errors.items():
+            msg += "\n  - %s: %s" % (item, error.strip().split("\n")[-1])
+        Exception.__init__(self, msg)
+
+
+###############################################################################
+# Workers
+###############################################################################
+def call(task):
+    """Helper to run stages whose items are the callables themselves
+    """
+    return task()
+
+def get_context(start_method=None):
+    """Get the multiprocessing context used to start the workers. The fork server preloads the lightweight modules.
+
+    :param start_method: the start method (default: the first available of START_METHODS)
+    :returns: the multiprocessing context
+    :rtype: multiprocessing.context.BaseContext
+
+    """
+    if start_method is None:
+        available = multiprocessing.get_all_start_methods()
+        start_method = [m for m in START_METHODS if m in available][0]
+
+    context = multiprocessing.get_context(start_method)
+    if start_method == "forkserver":
+        context.set_forkserver_preload(PRELOAD_MODULES)
+
+    return context
+
+def _rss():
+    """Resident set size (in bytes) of the current process
+    """
+    try:
+        with open("/proc/self/status") as f_status:
+            for line in f_status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    # NOTE: the peak is the closest we can get
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class _ForwardHandler(logging.Handler):
+    """Handler sending the log records of a child process to the main process through the connection of the child
+    """
+    def __init__(self, conn, lock):
+        """Constructor
+
+        :param conn: the connection to the main process
+        :param lock: the lock protecting the connection (the records can be emitted by several threads)
+        :returns: None
+        :rtype:
+
+        """
+        logging.Handler.__init__(self)
+        self.conn = conn
+        self.conn_lock = lock
+
+    def emit(self, record):
+        try:
+            # NOTE: the arguments and the exception may not be picklable => formatted here
+            record = logging.makeLogRecord(record.__dict__)
+            record.msg = record.getMessage()
+            record.args = None
+            if record.exc_info:
+                record.exc_text = logging.Formatter().formatException(record.exc_info)
+                record.exc_info = None
+            with self.conn_lock:
+                self.conn.send(("log", record))
+        except Exception:
+            self.handleError(record)
+
+
+def _bootstrap(conn, lock, environment, log_level):
+    """Initialize a child process which doesn't inherit the state of the main process
+
+    :param conn: the connection to the main process
+    :param lock: the lock protecting the connection
+    :param environment: the environment of the main process
+    :param log_level: the level of the root logger of the main process
+    :returns: None
+    :rtype:
+
+    """
+    os.environ.update(environment)
+    pyhts_tracing.inherit()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_ForwardHandler(conn, lock))
+    root.setLevel(log_level)
+
+def forward_logs(conn):
+    """Forward the pending log records of a child process to the loggers of the current process
+
+    :param conn: the connection to the child process
+    :returns: the first message which is not a log record (None if there is no such message)
+    :rtype: tuple
+
+    """
+    while conn.poll():
+        msg = conn.recv()
+        if msg[0] != "log":
+            return msg
+
+        record = msg[1]
+        logger = logging.getLogger(record.name)
+        if logger.isEnabledFor(record.levelno):
+            logger.handle(record)
+
+    return None
+
+def _worker_main(conn, environment, log_level):
+    """Main loop of a worker process
+
+    :param conn: the connection to the parent process
+    :param environment: the environment of the parent process
+    :param log_level: the level of the root logger of the parent process
+    :returns: None
+    :rtype:
+
+    """
+    lock = threading.Lock()
+    _bootstrap(conn, lock, environment, log_level)
+    with lock:
+        conn.send(("ready", os.getpid(), _rss(), len(sys.modules)))
+
+    stages = dict()
+    while True:
+        try:
+            msg = conn.recv()
+        except EOFError:
+            break
+
+        if msg[0] == "stop":
+            break
+        elif msg[0] == "stage":
+            stages[msg[1]] = (msg[2], msg[3])
+        elif msg[0] == "drop":
+            stages.pop(msg[1], None)
+        elif msg[0] == "task":
+            (_, stage_id, task_id, item) = msg
+            (function, name) = stages[stage_id]
+            try:
+                with pyhts_tracing.span(name, "task", item=item if isinstance(item, str) else type(item).__name__):
+                    result = function(item)
+                reply = ("done", task_id, result)
+            except Exception:
+                reply = ("error", task_id, traceback.format_exc())
+            with lock:
+                conn.send(reply)
+
+def _process_main(conn, environment, log_level, schedule, target, args):
+    """Main function of a child process which is not a worker (see Executor.startProcess)
+
+    :param conn: the connection to the parent process
+    :param environment: the environment of the parent process
+    :param log_level: the level of the root logger of the parent process
+    :param schedule: the priority class and the deadline of the parent thread
+    :param target: the function run by the process
+    :param args: the arguments of the function
+    :returns: None
+    :rtype:
+
+    """
+    _bootstrap(conn, threading.Lock(), environment, log_level)
+    try:
+        with scheduling(*schedule):
+            target(*args)
+    except Exception:
+        logging.getLogger("Executor").error(traceback.format_exc())
+        sys.exit(1)
+
+
+class _Worker:
+    """Parent side description of a worker process
+    """
+    def __init__(self, context):
+        (self.conn, child_conn) = context.Pipe()
+        self.process = context.Process(target=_worker_main, daemon=True,
+                                       args=(child_conn, dict(os.environ), logging.getLogger().getEffectiveLevel()))
+        self.start_time = time.time()
+        self.process.start()
+        child_conn.close()
+        self.stages = set()
+
+        # The current task: (stage_id, task_id, start time)
+        self.task = None
+
+    def waitReady(self):
+        """Wait for the worker to be initialized
+
+        :returns: the startup duration (in seconds), the resident set size (in bytes) and the number of loaded modules
+        :rtype: tuple
+
+        """
+        while True:
+            ready = wait([self.conn, self.process.sentinel], max(0, self.start_time + STARTUP_TIMEOUT - time.time()))
+            if not ready:
+                raise Exception("worker %d didn't start in %d seconds" % (self.process.pid, STARTUP_TIMEOUT))
+
+            try:
+                msg = forward_logs(self.conn)
+            except EOFError:
+                msg = None
+            if msg is not None:
+                return (time.time() - self.start_time, msg[2], msg[3])
+            if not self.process.is_alive():
+                raise Exception("worker %d failed to start (exit code = %s)" % (self.process.pid,
+                                                                                 self.process.exitcode))
+
+    def stop(self):
+        try:
+            self.conn.send(("stop",))
+        except (OSError, ValueError):
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+###############################################################################
+# Scheduling
+###############################################################################
+_scheduling = threading.local()
+
+@contextmanager
+def scheduling(priority=None, deadline=None):
+    """Set the priority class and the deadline of the stages run by the current thread
+
+    :param priority: the priority class (see PRIORITY_CLASSES, default: DEFAULT_PRIORITY)
+    :param deadline: the time (time.time()) before which the stages should be done (default: none)
+    :returns: None
+    :rtype:
+
+    """
+    if priority is None:
+        priority = DEFAULT_PRIORITY
+    if priority not in PRIORITY_CLASSES:
+        raise Exception("unknown priority class \"%s\" (%s)" % (priority, ", ".join(PRIORITY_CLASSES)))
+
+    previous = current_scheduling()
+    _scheduling.current = (priority, deadline)
+    try:
+        yield
+    finally:
+        _scheduling.current = previous
+
+def current_scheduling():
+    """Get the priority class and the deadline of the current thread
+
+    :returns: the priority class and the deadline (None if there is none)
+    :rtype: tuple
+
+    """
+    return getattr(_scheduling, "current", (DEFAULT_PRIORITY, None))
+
+
+class _Stage:
+    """A stage submitted to the executor (one call of map)
+    """
+    def __init__(self, stage_id, function, items, name, limit, timeout, retries, priority, deadline):
+        self.id = stage_id
+        self.function = function
+        self.items = items
+        self.name = name
+        self.limit = limit
+        self.timeout = timeout
+        self.retries = retries
+        self.priority = priority
+        self.deadline = deadline
+
+        self.results = [None] * len(items)
+        self.attempts = [0] * len(items)
+        self.errors = dict()
+        self.remaining = len(items)
+        self.running = 0
+        self.missed = 0
+        self.done = threading.Event()
+        if not items:
+            self.done.set()
+
+    def key(self, order):
+        """Scheduling key of a task: priority class, then earliest deadline, then submission order (the order of the
+        tasks inside the stage being the longest processing time first order)
+        """
+        deadline = self.deadline if self.deadline is not None else float("inf")
+        return (PRIORITY_CLASSES.index(self.priority), deadline, self.id, order)
+
+
+###############################################################################
+# Executor
+###############################################################################
+class Executor:
+    """Pool of persistent worker processes. Several threads can run stages at the same time: their tasks are given to
+    the idle workers by a dispatcher thread, by priority class then by deadline. As a running task is never
+    interrupted, the batch stages are preempted at the task (utterance) boundaries.
+    """
+    def __init__(self, nb_proc, context=None):
+        """Constructor. The workers are started on demand.
+
+        :param nb_proc: the maximum number of workers
+        :param context: the multiprocessing context used to start the workers (default: see get_context)
+        :returns: None
+        :rtype:
+
+        """
+        self.logger = logging.getLogger("Executor")
+        self.nb_proc = max(1, nb_proc)
+        self.context = context if context is not None else get_context()
+        self.workers = []
+        self.stage_ids = itertools.count()
+        self.pid = os.getpid()
+
+        # The startup of each worker: (duration, resident set size, number of loaded modules)
+        self.startups = []
+
+        # The stages which are not finished and their pending tasks: heap of (key, stage, task index, enqueue time)
+        self.stages = dict()
+        self.pending = []
+        self.lock = threading.RLock()
+        self.start_lock = threading.Lock()
+        self.dispatcher = None
+        self.stopping = False
+        self.replacing = 0
+        (self.wakeup_r, self.wakeup_w) = os.pipe()
+
+        # The queue wait of each dispatched task and the number of tasks done after their deadline per class
+        self.queue_waits = dict((priority, []) for priority in PRIORITY_CLASSES)
+        self.deadline_misses = dict((priority, 0) for priority in PRIORITY_CLASSES)
+
+    def resize(self, nb_proc):
+        """Increase the maximum number of workers
+
+        :param nb_proc: the new maximum number of workers
+        :returns: None
+        :rtype:
+
+        """
+        self.nb_proc = max(self.nb_proc, nb_proc)
+
+    def startWorkers(self, nb_workers):
+        """Start some workers (concurrently) and wait for them to be ready
+
+        :param nb_workers: the number of workers to start
+        :returns: the new workers
+        :rtype: list
+
+        """
+        new_workers = [_Worker(self.context) for _ in range(nb_workers)]
+        with pyhts_tracing.span("worker startup", "executor", workers=nb_workers,
+                                start_method=self.context.get_start_method()):
+            for worker in new_workers:
+                startup = worker.waitReady()
+                self.startups.append(startup)
+                self.logger.debug("worker %d (%s) ready in %.3f seconds (RSS = %.1f MB, %d modules)" %
+                                  (worker.process.pid, self.context.get_start_method(),
+                                   startup[0], startup[1] / 2**20, startup[2]))
+
+        return new_workers
+
+    def replaceWorker(self, worker):
+        """Kill a worker (called with the lock) and start a new one instead in a thread, so that the other workers are
+        still monitored and fed while the new one starts
+
+        :param worker: the worker to replace
+        :returns: None
+        :rtype:
+
+        """
+        worker.kill()
+        self.workers.remove(worker)
+        self.replacing += 1
+        threading.Thread(target=self.startReplacement, name="Executor worker startup", daemon=True).start()
+
+    def startReplacement(self):
+        """Start a worker replacing a dead one and give it to the dispatcher. If it can't be started and no worker is
+        left, the pending tasks fail (instead of waiting forever).
+
+        :returns: None
+        :rtype:
+
+        """
+        try:
+            new_workers = self.startWorkers(1)
+        except Exception as ex:
+            self.logger.error("a replacement worker failed to start: %s" % ex)
+            with self.lock:
+                self.replacing -= 1
+                if (not self.workers) and (self.replacing == 0):
+                    self.failPending("no worker available (a replacement worker failed to start: %s)" % ex)
+            return
+
+        with self.lock:
+            self.replacing -= 1
+            if self.stopping or (self.pid != os.getpid()):
+                new_workers[0].stop()
+                return
+            self.workers += new_workers
+        self.wakeUp()
+
+    def failPending(self, error):
+        """Fail all the pending tasks (called with the lock)
+
+        :param error: the error of the tasks
+        :returns: None
+        :rtype:
+
+        """
+        (pending, self.pending) = (self.pending, [])
+        for (_, stage, task_id, _) in pending:
+            self.logger.error("%s: %s failed: %s" % (stage.name, stage.items[task_id], error))
+            stage.errors[stage.items[task_id]] = error
+            self.complete(stage)
+
+    def startProcess(self, target, args=(), name=None):
+        """Start a process (which is not a worker) using the context of the workers. Its log records are forwarded
+        through the returned connection (see forward_logs) and it inherits the scheduling of the current thread.
+
+        :param target: the (picklable) function run by the process
+        :param args: the arguments of the function
+        :param name: the name of the process
+        :returns: the process and the connection to it
+        :rtype: tuple
+
+        """
+        (conn, child_conn) = self.context.Pipe()
+        process = self.context.Process(target=_process_main, name=name,
+                                       args=(child_conn, dict(os.environ), logging.getLogger().getEffectiveLevel(),
+                                             current_scheduling(), target, args))
+        process.start()
+        child_conn.close()
+
+        return (process, conn)
+
+    def wakeUp(self):
+        """Wake the dispatcher up (new tasks or stop)
+        """
+        os.write(self.wakeup_w, b"x")
+
+    def map(self, function, items, name=None, concurrency=None, timeout=None, retries=0, costs=None,
+            priority=None, deadline=None):
+        """Apply function to each item using the workers and return the results in the order of items.
+        If the costs are given, the items are dispatched by decreasing cost (longest processing time first).
+
+        :param function: the (picklable) callable applied to each item
+        :param items: the list of items
+        :param name: the name of the stage (for the logs and the errors)
+        :param concurrency: the maximum number of items processed at the same time (default: nb_proc)
+        :param timeout: the maximum duration (in seconds) of one task (default: no limit)
+        :param retries: the number of times a failed task is resubmitted
+        :param costs: the estimated cost of each item
+        :param priority: the priority class of the stage (default: the one of the current thread, see scheduling)
+        :param deadline: the deadline of the stage (default: the one of the current thread, see scheduling)
+        :returns: the list of results
+        :rtype: list
+
+        """
+        items = list(items)
+        if name is None:
+            name = getattr(function, "__name__", type(function).__name__)
+        limit = self.nb_proc if concurrency is None else max(1, min(concurrency, self.nb_proc))
+        (thread_priority, thread_deadline) = current_scheduling()
+        priority = thread_priority if priority is None else priority
+        deadline = thread_deadline if deadline is None else deadline
+
+        # Start the missing workers (without blocking the dispatcher)
+        with self.start_lock:
+            nb_missing = max(0, min(limit, len(items)) - len(self.workers) - self.replacing)
+            if nb_missing > 0:
+                new_workers = self.startWorkers(nb_missing)
+                with self.lock:
+                    self.workers += new_workers
+
+        stage = _Stage(next(self.stage_ids), function, items, name, limit, timeout, retries, priority, deadline)
+        order = range(len(items))
+        if costs is not None:
+            order = sorted(order, key=lambda i: costs[i], reverse=True)
+
+        self.logger.debug("start stage \"%s\" (%d items, %d workers, %s priority)" %
+                          (name, len(items), limit, priority))
+        with self.lock:
+            if items:
+                self.stages[stage.id] = stage
+            now = time.time()
+            for rank, task_id in enumerate(order):
+                heapq.heappush(self.pending, (stage.key(rank), stage, task_id, now))
+            if self.dispatcher is None:
+                self.dispatcher = threading.Thread(target=self.dispatch, name="Executor dispatcher", daemon=True)
+                self.dispatcher.start()
+        self.wakeUp()
+
+        stage.done.wait()
+        if stage.missed:
+            self.logger.warning("%s: %d task(s) done after the deadline" % (name, stage.missed))
+
+        if stage.errors:
+            raise TaskError(name, stage.errors)
+
+        return stage.results
+
+    def failure(self, stage, task_id, error, key):
+        """Record the failure of a task: the task is resubmitted if authorized
+
+        :param stage: the stage of the task
+        :param task_id: the index of the task
+        :param error: the error message
+        :param key: the scheduling key of the task
+        :returns: None
+        :rtype:
+
+        """
+        stage.attempts[task_id] += 1
+        if stage.attempts[task_id] <= stage.retries:
+            self.logger.warning("%s: %s failed, retry %d/%d" % (stage.name, stage.items[task_id],
+                                                                stage.attempts[task_id], stage.retries))
+            heapq.heappush(self.pending, (key, stage, task_id, time.time()))
+        else:
+            self.logger.error("%s: %s failed: %s" % (stage.name, stage.items[task_id], error))
+            stage.errors[stage.items[task_id]] = error
+            self.complete(stage)
+
+    def complete(self, stage):
+        """Account for a finished task of a stage (the stage is released when all its tasks are finished)
+
+        :param stage: the stage of the task
+        :returns: None
+        :rtype:
+
+        """
+        if (stage.deadline is not None) and (time.time() > stage.deadline):
+            stage.missed += 1
+            self.deadline_misses[stage.priority] += 1
+
+        stage.remaining -= 1
+        if stage.remaining == 0:
+            # Forget the stage
+            for worker in self.workers:
+                if stage.id in worker.stages:
+                    worker.stages.remove(stage.id)
+                    try:
+                        worker.conn.send(("drop", stage.id))
+                    except WORKER_DEATH:
+                        # NOTE: a dead idle worker is replaced when it is given its next task
+                        pass
+            self.stages.pop(stage.id, None)
+            stage.done.set()
+
+    def assign(self):
+        """Give the pending tasks to the idle workers: the first task of the queue whose stage is not at its
+        concurrency limit
+
+        :returns: None
+        :rtype:
+
+        """
+        idle = [w for w in self.workers if w.task is None]
+        skipped = []
+        while idle and self.pending:
+            entry = heapq.heappop(self.pending)
+            (key, stage, task_id, enqueue_time) = entry
+            if stage.running >= stage.limit:
+                skipped.append(entry)
+                continue
+
+            worker = idle.pop(0)
+            try:
+                if stage.id not in worker.stages:
+                    worker.conn.send(("stage", stage.id, stage.function, stage.name))
+                    worker.stages.add(stage.id)
+                worker.conn.send(("task", stage.id, task_id, stage.items[task_id]))
+            except WORKER_DEATH:
+                # NOTE: the worker died while idle => replaced, the task is given to the next idle worker
+                self.logger.warning("worker %d died (exit code = %s), it is replaced" %
+                                    (worker.process.pid, worker.process.exitcode))
+                self.replaceWorker(worker)
+                heapq.heappush(self.pending, entry)
+                continue
+            except Exception:
+                # NOTE: the callable or the item can't be sent (e.g. not picklable), nothing has been written
+                self.failure(stage, task_id, traceback.format_exc(), key)
+                idle.insert(0, worker)
+                continue
+            worker.task = (stage, task_id, time.time(), key)
+            stage.running += 1
+            self.queue_waits[stage.priority].append(time.time() - enqueue_time)
+
+        for entry in skipped:
+            heapq.heappush(self.pending, entry)
+
+    def dispatch(self):
+        """Main function of the dispatcher thread: if the dispatcher fails, the stages which are not finished fail
+        instead of waiting forever
+
+        :returns: None
+        :rtype:
+
+        """
+        try:
+            self.dispatchLoop()
+        except Exception:
+            error = traceback.format_exc()
+            self.logger.error("the dispatcher failed: %s" % error)
+            with self.lock:
+                self.abort("the executor dispatcher failed: %s" % error)
+
+    def abort(self, error):
+        """Fail all the stages which are not finished and kill the workers (a new dispatcher and new workers are
+        started by the next stage)
+
+        :param error: the error of the unfinished tasks
+        :returns: None
+        :rtype:
+
+        """
+        unfinished = [(stage, task_id) for (_, stage, task_id, _) in self.pending]
+        unfinished += [w.task[:2] for w in self.workers if w.task is not None]
+        for (stage, task_id) in unfinished:
+            stage.errors[stage.items[task_id]] = error
+        self.pending = []
+
+        for worker in self.workers:
+            worker.kill()
+        self.workers = []
+        self.dispatcher = None
+
+        for stage in self.stages.values():
+            # NOTE: the task being handled when the dispatcher failed is neither pending nor running
+            if not stage.errors:
+                stage.errors[stage.name] = error
+            stage.done.set()
+        self.stages = dict()
+
+    def dispatchLoop(self):
+        """Main loop of the dispatcher thread
+
+        :returns: None
+        :rtype:
+
+        """
+        while True:
+            with self.lock:
+                if self.stopping:
+                    break
+                self.assign()
+                running = [w for w in self.workers if w.task is not None]
+
+                # Wait for a message, a dead worker, a wake up or the next timeout
+                wait_timeout = None
+                timeouts = [w.task[2] + w.task[0].timeout for w in running if w.task[0].timeout is not None]
+                if timeouts:
+                    wait_timeout = max(0, min(timeouts) - time.time())
+
+            ready = wait([w.conn for w in running] + [w.process.sentinel for w in running] + [self.wakeup_r],
+                         wait_timeout)
+            if self.wakeup_r in ready:
+                os.read(self.wakeup_r, 4096)
+
+            with self.lock:
+                for worker in running:
+                    (stage, task_id, start, key) = worker.task
+                    try:
+                        msg = forward_logs(worker.conn)
+                        dead = False
+                    except WORKER_DEATH:
+                        (msg, dead) = (None, True)
+
+                    # NOTE: after an EOF (or a reset) the worker is dead even if it is not reaped yet (is_alive() is
+                    #       still True, e.g. with the forkserver) => always replaced (the replacement starts outside
+                    #       of the lock), before the failure is recorded so that the stage is never released through
+                    #       the dead worker
+                    if dead or ((msg is None) and not worker.process.is_alive()):
+                        worker.task = None
+                        stage.running -= 1
+                        self.replaceWorker(worker)
+                        self.failure(stage, task_id, "worker died (exit code = %s)" % worker.process.exitcode, key)
+
+                    elif msg is not None:
+                        worker.task = None
+                        stage.running -= 1
+                        if msg[0] == "done":
+                            stage.results[task_id] = msg[2]
+                            self.complete(stage)
+                        else:
+                            self.failure(stage, task_id, msg[2], key)
+
+                    elif (stage.timeout is not None) and (time.time() - start > stage.timeout):
+                        worker.task = None
+                        stage.running -= 1
+                        self.replaceWorker(worker)
+                        self.failure(stage, task_id, "timeout after %.1f seconds" % stage.timeout, key)
+
+    def queueWaitStatistics(self):
+        """Statistics of the time spent by the tasks in the queue before being given to a worker, per priority class
+
+        :returns: the dictionary priority class => statistics (number of tasks, mean, 95th percentile and maximum
+                  wait in seconds, number of tasks done after their deadline)
+        :rtype: dict
+
+        """
+        statistics = dict()
+        with self.lock:
+            for priority, waits in self.queue_waits.items():
+                if not waits:
+                    continue
+                waits = sorted(waits)
+                statistics[priority] = {"tasks": len(waits), "mean": sum(waits) / len(waits),
+                                        "p95": waits[min(len(waits) - 1, int(0.95 * len(waits)))],
+                                        "max": waits[-1], "deadline_misses": self.deadline_misses[priority]}
+
+        return statistics
+
+    def shutdown(self):
+        """Stop all the workers
+
+        :returns: None
+        :rtype:
+
+        """
+        # NOTE: the workers inherited from a parent process are not ours
+        if self.pid == os.getpid():
+            if self.dispatcher is not None:
+                with self.lock:
+                    self.stopping = True
+                self.wakeUp()
+                self.dispatcher.join()
+                self.dispatcher = None
+
+            for worker in self.workers:
+                worker.stop()
+
+            if self.startups:
+                self.logger.debug("%d worker(s) started (%s): mean startup = %.3f seconds, mean RSS = %.1f MB" %
+                                  (len(self.startups), self.context.get_start_method(),
+                                   sum(s[0] for s in self.startups) / len(self.startups),
+                                   sum(s[1] for s in self.startups) / len(self.startups) / 2**20))
+            for priority, stats in self.queueWaitStatistics().items():
+                self.logger.debug("%s tasks: %d, queue wait: mean = %.3f, p95 = %.3f, max = %.3f seconds, "
+                                  "%d done after their deadline" % (priority, stats["tasks"], stats["mean"],
+                                                                    stats["p95"], stats["max"],
+                                                                    stats["deadline_misses"]))
+        self.workers = []
+
+
+###############################################################################
+# Shared executor
+###############################################################################
+_executor = None
+
+def get_executor(nb_proc=1, start_method=None):
+    """Get the executor of the current process (created if needed), so that the workers are shared by all the stages
+
+    :param nb_proc: the minimum number of workers needed
+    :param start_method: the start method of the workers if the executor is created (default: see get_context)
+    :returns: the executor
+    :rtype: Executor
+
+    """
+    global _executor
+
+    # NOTE: a forked process doesn't own the workers of its parent => new executor
+    if (_executor is None) or (_executor.pid != os.getpid()):
+        _executor = Executor(nb_proc, get_context(start_method))
+        atexit.register(_executor.shutdown)
+    else:
+        _executor.resize(nb_proc)
+
+    return _executor
+
+def run_stage(conf, name, function, items, nb_proc):
+    """Helper to run a stage on the shared executor using the task timeout, the retries and the utterance costs
+    (longest job first) of the configuration
+
+    :param conf: the configuration object
+    :param name: the name of the stage
+    :param function: the (picklable) callable applied to each item
+    :param items: the list of items
+    :param nb_proc: the maximum number of items processed at the same time
+    :returns: the list of results
+    :rtype: list
+
+    """
+    costs = None
+    if getattr(conf, "utterance_costs", None) is not None:
+        costs = conf.utterance_costs.costs(name, items)
+        if costs is not None:
+            (makespan, lower_bound) = lpt_makespan(costs, nb_proc)
+            logging.getLogger("Executor").debug("%s: estimated makespan = %.1f (lower bound = %.1f)" %
+                                                (name, makespan, lower_bound))
+
+    return get_executor(nb_proc, getattr(conf, "START_METHOD", None)).map(function, items, name=name, concurrency=nb_proc,
+                                     timeout=conf.TASK_TIMEOUT, retries=conf.TASK_RETRIES, costs=costs)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Completion journal of a synthesis run used to resume a run which has been interrupted.
+
+    The journal is an append-only file (one JSON record per line) stored in the output directory. Each record
+    states that an utterance reached a stage (generated, converted or rendered) and gives the checksum of the
+    files of the utterance at that time (in the output directory/container or in the intermediate storage).
+    When resuming, a record is only trusted if all the files it lists are still there with the same checksum,
+    so an utterance interrupted in the middle of a stage is redone.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import os
+import json
+import time
+import logging
+
+from pyhts_containers import DirectoryWriter
+
+# The stages in their execution order
+STAGES = ["generated", "converted", "rendered"]
+
+
+class Journal:
+    """Per-utterance completion journal
+    """
+    def __init__(self, fname, out_path, resume=False, writer=None):
+        """Constructor. If the run is not resumed, the previous journal is discarded.
+
+        :param fname: the journal path
+        :param out_path: the output directory (default directory of the recorded files)
+        :param resume: switch to load the previous journal
+        :param writer: the writer of the outputs (default: the output directory)
+        :returns: None
+        :rtype:
+
+        """
+        self.logger = logging.getLogger("Journal")
+        self.fname = fname
+        self.out_path = out_path
+        self.writer = writer if writer is not None else DirectoryWriter(out_path)
+        self.records = dict()
+        self.valid = dict()
+
+        if resume and os.path.isfile(fname):
+            with open(fname) as f_journal:
+                for line in f_journal:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # NOTE: the last line may have been truncated by the crash
+                        self.logger.warning("ignore corrupted journal line: %s" % line.strip())
+                        continue
+                    self.records[(record["utterance"], record["stage"])] = (record.get("root", out_path),
+                                                                            record["outputs"],
+                                                                            record.get("published", True))
+            self.logger.info("%d records loaded from %s" % (len(self.records), fname))
+        else:
+            open(fname, "w").close()
+
+    def store(self, root, published):
+        """Get the accessor of the files of the given directory (the writer of the outputs for the published files of
+        the output directory, the files which are not published yet being on disk even if the output is a container)
+        """
+        if published and (root == self.out_path):
+            return self.writer
+        return DirectoryWriter(root)
+
+    def record(self, stage, gen_labfile_base_lst, root=None):
+        """Record that the given utterances reached the given stage
+
+        :param stage: the stage
+        :param gen_labfile_base_lst: the list of utterances
+        :param root: the directory containing the files of the utterances which are not published yet (default: the
+                     published files of the output directory)
+        :returns: None
+        :rtype:
+
+        """
+        published = root is None
+        if published:
+            root = self.out_path
+        store = self.store(root, published)
+
+        with open(self.fname, "a") as f_journal:
+            for base in gen_labfile_base_lst:
+                outputs = dict()
+                for rel_fname in store.files(base):
+                    outputs[rel_fname] = store.checksum(rel_fname)
+
+                f_journal.write(json.dumps({"utterance": base, "stage": stage, "time": time.time(),
+                                            "root": root, "published": published, "outputs": outputs}) + "\n")
+                self.records[(base, stage)] = (root, outputs, published)
+                self.valid[(base, stage)] = True
+
+            f_journal.flush()
+            os.fsync(f_journal.fileno())
+
+    def isDone(self, base, stage, root=None):
+        """Check if an utterance reached a stage (or a later one) and that the corresponding outputs are intact
+
+        :param base: the utterance
+        :param stage: the stage
+        :param root: the directory where the files are expected (besides the output directory)
+        :returns: True if the stage doesn't need to be redone
+        :rtype: bool
+
+        """
+        for cur_stage in STAGES[STAGES.index(stage):]:
+            key = (base, cur_stage)
+            if key not in self.records:
+                continue
+
+            # NOTE: the files of a previous run's intermediate storage are not available to the current run
+            if self.records[key][0] not in (self.out_path, root):
+                continue
+
+            if key not in self.valid:
+                (record_root, outputs, published) = self.records[key]
+                store = self.store(record_root, published)
+                self.valid[key] = bool(outputs) and all(store.checksum(rel_fname) == checksum
+                                                        for rel_fname, checksum in outputs.items())
+
+            if self.valid[key]:
+                return True
+
+        return False
+
+    def pending(self, stage, gen_labfile_base_lst, root=None):
+        """Get the utterances which still have to go through the given stage
+
+        :param stage: the stage
+        :param gen_labfile_base_lst: the list of utterances
+        :param root: the directory where the files are expected (besides the output directory)
+        :returns: the list of utterances for which the stage has to be (re)done
+        :rtype: list
+
+        """
+        return [base for base in gen_labfile_base_lst if not self.isDone(base, stage, root)]
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Shell-free process pipelines for the SPTK command chains.
+
+    The processes of a pipeline are directly connected with pipes (no "sh -c", no quoting). The input can be a
+    file or an in-memory buffer (bytes or numpy array) and the output a file or a buffer, so the intermediate
+    files are not needed anymore. The exit status of every process is checked, and the command metrics and spans
+    are recorded as for utils.run_shell_command:
+
+        Pipeline(logger).stage("mgc2sp", "-a", 0.42, "-m", 24, "-o", 2, mgc_fname) \\
+                        .stage("sopr", "-d", 32768.0, "-P") \\
+                        .run(stdout=sp_fname)
+
+        lf0 = Pipeline(logger).stage("sopr", "-magic", 0, "-MAGIC", -1e10).run_array(np.float32, stdin=data)
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import os
+import time
+import signal
+import logging
+import threading
+import subprocess
+
+import numpy as np
+
+import utils
+import pyhts_tracing
+
+
+class PipelineError(Exception):
+    """Exception raised when at least one process of a pipeline failed
+    """
+    def __init__(self, pipeline, failures):
+        """Constructor
+
+        :param pipeline: the description of the pipeline
+        :param failures: the list of (command, exit status, last lines of stderr) of the failed processes
+        :returns: None
+        :rtype:
+
+        """
+        self.failures = failures
+        msg = "pipeline \"%s\" failed" % pipeline
+        for command, status, stderr in failures:
+            msg += "\n  - %s (exit status = %d)%s" % (command, status, (": " + stderr) if stderr else "")
+        Exception.__init__(self, msg)
+
+
+class Pipeline:
+    """Pipeline of processes connected by pipes
+    """
+    def __init__(self, logger=None):
+        """Constructor
+
+        :param logger: the logger receiving the error output of the processes
+        :returns: None
+        :rtype:
+
+        """
+        self.logger = logger if logger is not None else logging.getLogger("Pipeline")
+        self.stages = []
+
+    def stage(self, *args):
+        """Add a process at the end of the pipeline
+
+        :param args: the program and its arguments (converted to strings)
+        :returns: the pipeline
+        :rtype: Pipeline
+
+        """
+        self.stages.append([str(arg) for arg in args])
+        return self
+
+    def __str__(self):
+        return " | ".join(" ".join(args) for args in self.stages)
+
+    def tools(self):
+        return "|".join(os.path.basename(args[0]) for args in self.stages)
+
+    def run(self, stdin=None, stdout=None):
+        """Run the pipeline
+
+        :param stdin: the input: None, a file path, bytes or a numpy array
+        :param stdout: the output: a file path or None to get the output as bytes
+        :returns: the output if stdout is None
+        :rtype: bytes
+
+        """
+        if not self.stages:
+            raise Exception("empty pipeline")
+
+        tool = self.tools()
+        self.logger.debug("Pipeline: %s" % self)
+        with pyhts_tracing.span(tool, "command", cmd=str(self)) as span_args:
+            start = time.time()
+            f_in = open(stdin, "rb") if isinstance(stdin, str) else None
+            f_out = open(stdout, "wb") if stdout is not None else None
+            buffer_in = stdin.tobytes() if isinstance(stdin, np.ndarray) else stdin if isinstance(stdin, bytes) else None
+
+            processes = []
+            stderrs = []
+            threads = []
+            try:
+                # Start the processes, each one reading the output of the previous one
+                for i, args in enumerate(self.stages):
+                    if i == 0:
+                        cur_stdin = f_in if f_in is not None else subprocess.PIPE if buffer_in is not None else subprocess.DEVNULL
+                    else:
+                        cur_stdin = processes[-1].stdout
+                    cur_stdout = subprocess.PIPE if (i < len(self.stages) - 1) or (f_out is None) else f_out
+
+                    process = subprocess.Popen(args, stdin=cur_stdin, stdout=cur_stdout, stderr=subprocess.PIPE)
+
+                    # NOTE: the parent must not keep the pipe, otherwise the previous process never gets SIGPIPE
+                    if i > 0:
+                        processes[-1].stdout.close()
+                    processes.append(process)
+
+                    stderr = []
+                    stderrs.append(stderr)
+                    threads.append(threading.Thread(target=self._readErrors, args=(process.stderr, args[0], stderr),
+                                                    daemon=True))
+                    threads[-1].start()
+
+                # Feed the input buffer
+                if buffer_in is not None:
+                    writer = threading.Thread(target=self._feed, args=(processes[0].stdin, buffer_in), daemon=True)
+                    writer.start()
+                    threads.append(writer)
+
+                # Read the output
+                output = None
+                if f_out is None:
+                    output = processes[-1].stdout.read()
+                    processes[-1].stdout.close()
+
+                for thread in threads:
+                    thread.join()
+
+                # Check every process
+                failures = []
+                statuses = []
+                for i, (args, process, stderr) in enumerate(zip(self.stages, processes, stderrs)):
+                    (_, status, rusage) = os.wait4(process.pid, 0)
+                    process.returncode = os.waitstatus_to_exitcode(status)
+                    # NOTE: a process killed by SIGPIPE only means that the next one stopped reading
+                    if (process.returncode == -signal.SIGPIPE) and (i < len(processes) - 1):
+                        process.returncode = 0
+                    statuses.append(process.returncode)
+                    utils._record_command(os.path.basename(args[0]), time.time() - start, rusage, process.returncode)
+                    if process.returncode != 0:
+                        failures.append((" ".join(args), process.returncode, " / ".join(stderr[-3:])))
+
+                span_args["status"] = statuses
+            finally:
+                # NOTE: if the pipeline failed (e.g. a missing program), the processes already started are killed and
+                #       reaped, and their pipes closed
+                for process in processes:
+                    for pipe in (process.stdin, process.stdout):
+                        if pipe is not None:
+                            try:
+                                pipe.close()
+                            except OSError:
+                                pass
+                    if process.returncode is None:
+                        process.kill()
+                        process.wait()
+
+                if f_in is not None:
+                    f_in.close()
+                if f_out is not None:
+                    f_out.close()
+
+        if failures:
+            raise PipelineError(str(self), failures)
+
+        return output
+
+    def run_array(self, dtype=np.float32, stdin=None):
+        """Run the pipeline and get its output as a numpy array
+
+        :param dtype: the type of the output values
+        :param stdin: the input: None, a file path, bytes or a numpy array
+        :returns: the output
+        :rtype: np.ndarray
+
+        """
+        return np.frombuffer(self.run(stdin=stdin), dtype=dtype)
+
+    def _feed(self, pipe, data):
+        """Write the input buffer in the first process (in a thread to avoid dead locks)
+        """
+        try:
+            pipe.write(data)
+        except BrokenPipeError:
+            pass
+        finally:
+            try:
+                pipe.close()
+            except BrokenPipeError:
+                pass
+
+    def _readErrors(self, pipe, program, lines):
+        """Stream the error output of a process to the log
+        """
+        for line in pipe:
+            line = line.decode(errors="replace").rstrip()
+            lines.append(line)
+            self.logger.warning("[%s] %s" % (os.path.basename(program), line))
+        pipe.close()
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Numerical regression harness: compare the outputs of a reference synthesis and of a candidate synthesis of the
+    same inputs, so that an optimization replacing a tool by an equivalent implementation (e.g. an external SPTK
+    binary by numpy) can be checked before being shipped.
+
+    Each output of the reference is compared with the same output of the candidate using the metrics of its stream:
+      - mgc: mel-cepstral distortion (dB, c0 excluded) and RMSE,
+      - lf0/f0: F0 RMSE (Hz, on the frames voiced in both) and V/UV error (ratio of frames),
+      - sp/ap: log-spectral distance (dB),
+      - wav (and the other audio formats: flac, ogg, opus): RMSE of the samples,
+      - any other stream of the configuration (bap, ema, weight, ...): RMSE,
+    and the number of frames (samples for wav) has to be the same. A metric above its tolerance (see
+    DEFAULT_TOLERANCES, which can be overriden by a JSON file) is a failure.
+
+    The outputs can be directories or containers (tar, zip, HDF5). The harness can either compare existing outputs:
+
+        python3 pyhts_regression.py compare -c voice/config.json <reference> <candidate>
+
+    or run synth.py twice on the same input (e.g. with the reference pyhts being a checkout of the previous
+    revision, or with different options) and compare the results:
+
+        git worktree add /tmp/pyhts_ref <revision>
+        python3 pyhts_regression.py run -c voice/config.json --reference_pyhts /tmp/pyhts_ref <input> <work_dir>
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import io
+import os
+import sys
+import json
+import shlex
+import logging
+import argparse
+import subprocess
+
+import numpy as np
+
+try:
+    import soundfile as sf
+    from rendering.utils.audio import AUDIO_FORMATS
+    AUDIO_EXTENSIONS = [ext for (_, _, ext) in AUDIO_FORMATS.values()]
+except ImportError:
+    sf = None
+    AUDIO_EXTENSIONS = ["wav", "flac", "ogg", "opus"]
+
+from pyhts_containers import open_input
+
+# Maximum value of each metric per stream ("*" = the streams which are not listed)
+DEFAULT_TOLERANCES = {
+    "mgc": {"frames": 0, "mcd": 0.1, "rmse": 1e-3},
+    "lf0": {"frames": 0, "f0_rmse": 0.5, "vuv_error": 0.0},
+    "f0": {"frames": 0, "f0_rmse": 0.5, "vuv_error": 0.0},
+    "sp": {"frames": 0, "lsd": 0.1},
+    "ap": {"frames": 0, "lsd": 0.1},
+    "wav": {"frames": 0, "rmse": 1e-3},
+    "*": {"frames": 0, "rmse": 1e-3},
+}
+
+# The lf0 of an unvoiced frame is -1e10
+UNVOICED_LF0 = -1.0e9
+
+MCD_FACTOR = 10.0 / np.log(10.0) * np.sqrt(2.0)
+
+
+###############################################################################
+# Metrics
+###############################################################################
+def rmse(ref, cand):
+    """Root mean square error
+
+    :param ref: the reference values
+    :param cand: the candidate values (same shape)
+    :returns: the RMSE
+    :rtype: float
+
+    """
+    if ref.size == 0:
+        return 0.0
+    return float(np.sqrt(np.mean((ref.astype(np.float64) - cand.astype(np.float64)) ** 2)))
+
+
+def mel_cepstral_distortion(ref, cand):
+    """Mean mel-cepstral distortion in dB (the energy c0 is excluded)
+
+    :param ref: the reference coefficients (frames x (order+1))
+    :param cand: the candidate coefficients (frames x (order+1))
+    :returns: the MCD
+    :rtype: float
+
+    """
+    if ref.shape[0] == 0:
+        return 0.0
+    diff = ref[:, 1:].astype(np.float64) - cand[:, 1:].astype(np.float64)
+    return float(np.mean(MCD_FACTOR * np.sqrt(np.sum(diff ** 2, axis=1))))
+
+
+def f0_errors(ref, cand, log_domain):
+    """F0 RMSE (in Hz, on the frames voiced in both) and V/UV error (ratio of frames whose voicing differs)
+
+    :param ref: the reference F0 (or log F0)
+    :param cand: the candidate F0 (or log F0)
+    :param log_domain: True if the values are log F0 (unvoiced = -1e10), False if they are F0 in Hz (unvoiced = 0)
+    :returns: the F0 RMSE and the V/UV error
+    :rtype: tuple
+
+    """
+    if log_domain:
+        (ref_voiced, cand_voiced) = (ref > UNVOICED_LF0, cand > UNVOICED_LF0)
+    else:
+        (ref_voiced, cand_voiced) = (ref > 0, cand > 0)
+
+    vuv_error = float(np.mean(ref_voiced != cand_voiced)) if ref.size > 0 else 0.0
+
+    voiced = ref_voiced & cand_voiced
+    (ref_f0, cand_f0) = (ref[voiced].astype(np.float64), cand[voiced].astype(np.float64))
+    if log_domain:
+        (ref_f0, cand_f0) = (np.exp(ref_f0), np.exp(cand_f0))
+
+    return (rmse(ref_f0, cand_f0), vuv_error)
+
+
+def log_spectral_distance(ref, cand):
+    """Mean log-spectral distance in dB between two power spectra
+
+    :param ref: the reference spectra (frames x bins)
+    :param cand: the candidate spectra (frames x bins)
+    :returns: the LSD
+    :rtype: float
+
+    """
+    if ref.shape[0] == 0:
+        return 0.0
+    ref_db = 10 * np.log10(np.maximum(ref.astype(np.float64), 1e-20))
+    cand_db = 10 * np.log10(np.maximum(cand.astype(np.float64), 1e-20))
+    return float(np.mean(np.sqrt(np.mean((ref_db - cand_db) ** 2, axis=1))))
+
+
+###############################################################################
+# Comparison
+###############################################################################
+def stream_dimensions(config_fname):
+    """Get the dimension of a frame of each output stream from the voice configuration
+
+    :param config_fname: the voice configuration file
+    :returns: the dictionary extension => dimension
+    :rtype: dict
+
+    """
+    with open(config_fname) as f_conf:
+        conf = json.load(f_conf)
+
+    spectrum_dim = int(conf["signal"].get("fft_len", 2048)) // 2 + 1
+    dims = {"lf0": 1, "f0": 1, "sp": spectrum_dim, "ap": spectrum_dim}
+    for cur_stream in conf["models"]["cmp"]["streams"]:
+        if cur_stream["kind"] not in dims:
+            dims[cur_stream["kind"]] = cur_stream["order"] + 1
+
+    return dims
+
+
+def generated_streams(config_fname):
+    """Get the streams generated for each utterance according to the voice configuration
+
+    :param config_fname: the voice configuration file
+    :returns: the list of extensions
+    :rtype: list
+
+    """
+    with open(config_fname) as f_conf:
+        conf = json.load(f_conf)
+
+    return [cur_stream["kind"] for cur_stream in conf["models"]["cmp"]["streams"]]
+
+
+def compare_file(ext, dim, ref_data, cand_data):
+    """Compute the metrics of one output
+
+    :param ext: the extension of the output (its stream)
+    :param dim: the dimension of a frame (None for the audio outputs)
+    :param ref_data: the content of the reference file
+    :param cand_data: the content of the candidate file
+    :returns: the dictionary metric => value
+    :rtype: dict
+
+    """
+    if ext in AUDIO_EXTENSIONS:
+        if sf is None:
+            raise Exception("soundfile is required to compare the waveforms")
+        (ref, _) = sf.read(io.BytesIO(ref_data), dtype="float32")
+        (cand, _) = sf.read(io.BytesIO(cand_data), dtype="float32")
+        nb_frames = min(ref.shape[0], cand.shape[0])
+        return {"frames": abs(ref.shape[0] - cand.shape[0]), "rmse": rmse(ref[:nb_frames], cand[:nb_frames])}
+
+    ref = np.frombuffer(ref_data, dtype=np.float32)
+    cand = np.frombuffer(cand_data, dtype=np.float32)
+    ref = ref[:ref.size // dim * dim].reshape(-1, dim)
+    cand = cand[:cand.size // dim * dim].reshape(-1, dim)
+    nb_frames = min(ref.shape[0], cand.shape[0])
+    metrics = {"frames": abs(ref.shape[0] - cand.shape[0])}
+    (ref, cand) = (ref[:nb_frames], cand[:nb_frames])
+
+    if ext == "mgc":
+        metrics["mcd"] = mel_cepstral_distortion(ref, cand)
+        metrics["rmse"] = rmse(ref, cand)
+    elif ext in ["lf0", "f0"]:
+        (metrics["f0_rmse"], metrics["vuv_error"]) = f0_errors(ref[:, 0], cand[:, 0], ext == "lf0")
+    elif ext in ["sp", "ap"]:
+        metrics["lsd"] = log_spectral_distance(ref, cand)
+    else:
+        metrics["rmse"] = rmse(ref, cand)
+
+    return metrics
+
+
+class OutputSet:
+    """Files of an output (directory or container)
+    """
+    def __init__(self, path):
+        """Constructor
+
+        :param path: the output directory or container
+        :returns: None
+        :rtype:
+
+        """
+        self.path = path
+        self.reader = open_input(path)
+
+    def names(self):
+        """List the files of the output
+
+        :returns: the list of file names (relative to the output)
+        :rtype: list
+
+        """
+        if not os.path.isdir(self.path):
+            return list(self.reader.names())
+
+        names = []
+        for root, _, fnames in os.walk(self.path):
+            for fname in fnames:
+                names.append(os.path.relpath(os.path.join(root, fname), self.path))
+        return names
+
+    def read(self, name):
+        return self.reader.read(name)
+
+
+def compare_outputs(ref_path, cand_path, dims, tolerances=None, expected_streams=None):
+    """Compare all the outputs of the reference with the ones of the candidate
+
+    :param ref_path: the reference output (directory or container)
+    :param cand_path: the candidate output (directory or container)
+    :param dims: the dictionary extension => dimension of a frame (see stream_dimensions)
+    :param tolerances: the tolerances (default: DEFAULT_TOLERANCES)
+    :param expected_streams: the streams which have to be in the reference (e.g. the generated ones)
+    :returns: the comparison of each output and the list of the failures
+    :rtype: tuple
+
+    """
+    if tolerances is None:
+        tolerances = DEFAULT_TOLERANCES
+
+    ref_set = OutputSet(ref_path)
+    cand_set = OutputSet(cand_path)
+    cand_names = set(cand_set.names())
+
+    results = dict()
+    failures = []
+    ref_names = sorted(ref_set.names())
+    ref_streams = set(os.path.splitext(name)[1][1:] for name in ref_names)
+    for ext in (expected_streams if expected_streams is not None else []):
+        if ext not in ref_streams:
+            failures.append("no %s output in the reference %s" % (ext, ref_path))
+
+    for name in ref_names:
+        ext = os.path.splitext(name)[1][1:]
+        if (ext not in AUDIO_EXTENSIONS) and (ext not in dims):
+            continue
+
+        if name not in cand_names:
+            failures.append("%s is missing in the candidate" % name)
+            continue
+
+        metrics = compare_file(ext, dims.get(ext), ref_set.read(name), cand_set.read(name))
+        results[name] = metrics
+
+        cur_tolerances = tolerances.get(ext, tolerances["wav"] if ext in AUDIO_EXTENSIONS else tolerances["*"])
+        for metric, value in sorted(metrics.items()):
+            if value > cur_tolerances.get(metric, float("inf")):
+                failures.append("%s: %s = %g (tolerance = %g)" % (name, metric, value, cur_tolerances[metric]))
+
+    if not results and not failures:
+        failures.append("no output to compare in %s" % ref_path)
+
+    return (results, failures)
+
+
+def summary(results):
+    """Get the worst value of each metric per stream
+
+    :param results: the comparison of each output (see compare_outputs)
+    :returns: the dictionary extension => metric => worst value
+    :rtype: dict
+
+    """
+    worst = dict()
+    for name, metrics in results.items():
+        ext = os.path.splitext(name)[1][1:]
+        if ext not in worst:
+            worst[ext] = dict()
+        for metric, value in metrics.items():
+            worst[ext][metric] = max(worst[ext].get(metric, value), value)
+
+    return worst
+
+
+def run_synthesis(pyhts_path, config_fname, input_path, out_path, extra_args):
+    """Run synth.py (of the given pyhts checkout) on the input. The intermediate files are preserved so that the
+    parameter streams (removed by the parameter conversion otherwise) are compared too.
+
+    :returns: None
+    :rtype:
+
+    """
+    cmd = [sys.executable, os.path.join(pyhts_path, "synth.py"), "-c", config_fname] + extra_args
+    if ("-r" not in extra_args) and ("--preserve" not in extra_args):
+        cmd.append("-r")
+    cmd += [input_path, out_path]
+    logging.getLogger("pyhts_regression").info("run %s" % " ".join(cmd))
+    if subprocess.call(cmd) != 0:
+        raise Exception("the synthesis failed: %s" % " ".join(cmd))
+
+
+###############################################################################
+#  Envelopping
+###############################################################################
+def main():
+    """Main entry function
+    """
+    parser = argparse.ArgumentParser(description="Compare the outputs of a reference and of a candidate synthesis")
+    parser.add_argument("-c", "--config", required=True,
+                        help="The voice configuration file (gives the dimension of the streams)")
+    parser.add_argument("-t", "--tolerances", default=None, type=str,
+                        help="JSON file overriding the default tolerances (stream => metric => maximum value)")
+    parser.add_argument("-o", "--report", default=None, type=str,
+                        help="JSON file receiving the metrics of each output and the failures")
+    subparsers = parser.add_subparsers(dest="command")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two existing outputs")
+    compare_parser.add_argument("reference", help="The reference output (directory or container)")
+    compare_parser.add_argument("candidate", help="The candidate output (directory or container)")
+
+    run_parser = subparsers.add_parser("run", help="Run the reference and the candidate synthesis, then compare them")
+    run_parser.add_argument("--reference_pyhts", default=None, type=str,
+                            help="The pyhts checkout of the reference (default: this one)")
+    run_parser.add_argument("--reference_args", default="", type=str,
+                            help="The additional synth.py options of the reference")
+    run_parser.add_argument("--candidate_args", default="", type=str,
+                            help="The additional synth.py options of the candidate")
+    run_parser.add_argument("input", help="The input directory or archive")
+    run_parser.add_argument("work_dir", help="The directory receiving the reference and candidate outputs")
+    args = parser.parse_args()
+
+    logging.basicConfig(format='[%(asctime)s] %(levelname)s : %(message)s', level=logging.INFO)
+    logger = logging.getLogger("pyhts_regression")
+
+    if args.command is None:
+        parser.error("a command (compare or run) is required")
+
+    # Tolerances
+    tolerances = dict((ext, dict(values)) for ext, values in DEFAULT_TOLERANCES.items())
+    if args.tolerances is not None:
+        with open(args.tolerances) as f_tol:
+            for ext, values in json.load(f_tol).items():
+                tolerances.setdefault(ext, dict(tolerances["*"])).update(values)
+
+    # Outputs (the generated streams have to be compared when the harness runs the synthesis)
+    expected_streams = None
+    if args.command == "run":
+        expected_streams = generated_streams(args.config)
+        this_pyhts = os.path.dirname(os.path.realpath(__file__))
+        ref_path = os.path.join(args.work_dir, "reference")
+        cand_path = os.path.join(args.work_dir, "candidate")
+        run_synthesis(args.reference_pyhts if args.reference_pyhts is not None else this_pyhts,
+                      os.path.abspath(args.config), os.path.abspath(args.input), os.path.abspath(ref_path),
+                      shlex.split(args.reference_args))
+        run_synthesis(this_pyhts, os.path.abspath(args.config), os.path.abspath(args.input), os.path.abspath(cand_path),
+                      shlex.split(args.candidate_args))
+    else:
+        (ref_path, cand_path) = (args.reference, args.candidate)
+
+    (results, failures) = compare_outputs(ref_path, cand_path, stream_dimensions(args.config), tolerances,
+                                          expected_streams)
+
+    for ext, metrics in sorted(summary(results).items()):
+        logger.info("%-6s %s" % (ext, ", ".join("%s = %g" % (m, v) for m, v in sorted(metrics.items()))))
+
+    if args.report is not None:
+        with open(args.report, "w") as f_report:
+            json.dump({"reference": ref_path, "candidate": cand_path, "tolerances": tolerances,
+                       "summary": summary(results), "outputs": results, "failures": failures}, f_report, indent=2)
+
+    for failure in failures:
+        logger.error(failure)
+
+    if failures:
+        logger.error("numerical drift detected: %d failures over %d outputs" % (len(failures), len(results)))
+        return 1
+
+    logger.info("%d outputs within the tolerances" % len(results))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Helpers to estimate the cost of each utterance so that the stages can be scheduled longest job first.
+
+    The cost of an utterance is derived from its number of frames: first estimated from the end time of the
+    input labels, then refined using the generated parameter files. An optional calibration file gives, for each
+    stage, the cost model cost = intercept + slope * nb_frames^exponent:
+
+        {
+            "default": {"intercept": 0, "slope": 1, "exponent": 1},
+            "WORLD synthesis": {"intercept": 0.2, "slope": 0.001, "exponent": 1}
+        }
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import os
+import re
+import json
+import heapq
+import logging
+
+LABEL_PATTERN = re.compile('[ \t]*([0-9]+)[ \t]+([0-9]+)[ \t]+(.*)')
+
+
+def label_frame_count(lab_lines, frameshift):
+    """Estimate the number of frames of an utterance from its labels
+
+    :param lab_lines: the lines of the label file
+    :param frameshift: the frameshift in ms
+    :returns: the number of frames (the number of labels if the labels are not timed)
+    :rtype: int
+
+    """
+    nb_labels = 0
+    end = None
+    for line in lab_lines:
+        line = line.strip()
+        if not line:
+            continue
+        nb_labels += 1
+        m = LABEL_PATTERN.match(line)
+        if m is not None:
+            end = int(m.group(2))
+
+    # HTK unit: 100ns
+    if end is not None:
+        return int(end / (frameshift * 10000))
+
+    return nb_labels
+
+
+def file_frame_count(fname, dim=1):
+    """Get the number of frames of a binary float32 parameter file
+
+    :param fname: the parameter file path
+    :param dim: the dimension of a frame
+    :returns: the number of frames
+    :rtype: int
+
+    """
+    return int(os.path.getsize(fname) / (4 * dim))
+
+
+class UtteranceCosts:
+    """Cost model of the utterances used to schedule the stages longest job first
+    """
+    def __init__(self, calibration_fname=None):
+        """Constructor
+
+        :param calibration_fname: the optional calibration file
+        :returns: None
+        :rtype:
+
+        """
+        self.logger = logging.getLogger("UtteranceCosts")
+        self.frames = dict()
+        self.models = {"default": {"intercept": 0.0, "slope": 1.0, "exponent": 1.0}}
+        if calibration_fname is not None:
+            with open(calibration_fname) as f_calib:
+                for stage, model in json.load(f_calib).items():
+                    self.models[stage] = dict(self.models["default"])
+                    self.models[stage].update(model)
+
+    def estimateFromLabels(self, reader, gen_labfile_base_lst, frameshift):
+        """Estimate the number of frames of the utterances from the input labels
+
+        :param reader: the reader of the input (see pyhts_containers.py)
+        :param gen_labfile_base_lst: the list of utterances
+        :param frameshift: the frameshift in ms
+        :returns: None
+        :rtype:
+
+        """
+        for base in gen_labfile_base_lst:
+            lab_lines = reader.read("%s.lab" % base).decode("utf-8").splitlines()
+            self.frames[base] = label_frame_count(lab_lines, frameshift)
+
+    def updateFromOutputs(self, out_path, gen_labfile_base_lst, ext, dim=1):
+        """Refine the number of frames using the generated parameter files (if available)
+
+        :param out_path: the output directory
+        :param gen_labfile_base_lst: the list of utterances
+        :param ext: the extension of the parameter files
+        :param dim: the dimension of a frame
+        :returns: None
+        :rtype:
+
+        """
+        for base in gen_labfile_base_lst:
+            fname = "%s/%s.%s" % (out_path, base, ext)
+            if os.path.isfile(fname):
+                self.frames[base] = file_frame_count(fname, dim)
+
+    def costs(self, stage, items):
+        """Compute the cost of the given items for the given stage
+
+        :param stage: the name of the stage
+        :param items: the items (the utterance basenames)
+        :returns: the list of costs or None if at least one item is unknown
+        :rtype: list
+
+        """
+        if any((not isinstance(item, str)) or (item not in self.frames) for item in items):
+            return None
+
+        model = self.models.get(stage, self.models["default"])
+        return [model["intercept"] + model["slope"] * (self.frames[item] ** model["exponent"]) for item in items]
+
+
+def lpt_makespan(costs, nb_proc):
+    """Estimate the makespan of the longest processing time first schedule
+
+    :param costs: the costs of the tasks
+    :param nb_proc: the number of workers
+    :returns: the estimated makespan and the lower bound of the optimal makespan
+    :rtype: tuple
+
+    """
+    loads = [0.0] * max(1, nb_proc)
+    for cost in sorted(costs, reverse=True):
+        heapq.heapreplace(loads, loads[0] + cost)
+
+    lower_bound = max(max(costs, default=0), sum(costs) / max(1, nb_proc))
+    return (max(loads), lower_bound)
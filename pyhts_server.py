@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Asyncio synthesis server batching the concurrent requests.
+
+    The requests are queued and gathered into batches: a batch is closed when it reaches max_frames frames (estimated
+    from the labels) or max_requests requests, or max_delay seconds after its first request. A batch is synthesized
+    by one call of the synthesizer (see pyhts_synthesizer.py), so that the DNN forwards the frames of all its requests
+    together (settings/dnn/batch_frames frames per session run) and HMGenS/the workers are started once per batch
+    instead of once per request. The results are then scattered back to the requests. The requests received while a
+    batch is synthesized are gathered into the next batch.
+
+    The server can have a batcher (and a synthesizer) per priority class (e.g. interactive and batch): the batches of
+    the different classes are then synthesized concurrently and their per-utterance tasks share the worker pool, which
+    runs them by priority class and deadline (see pyhts_executor.py).
+
+    Protocol: one JSON object per line, on both sides.
+      - request: {"id": ..., "labels": {"<utterance>": "<label file content>", ...}, "priority": "<class>",
+                  "deadline": seconds} (priority and deadline are optional)
+      - response: {"id": ..., "results": {"<utterance>": {"parameters": {"<stream>": array, ...}, "waveform": array,
+                   "samplerate": ..., "outputs": {"<file name>": base64 content}}}, "latency": seconds}
+        or {"id": ..., "error": "<message>"}
+      an array being encoded as {"dtype": ..., "shape": [...], "data": base64 of the raw values}.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import sys
+import json
+import time
+import base64
+import asyncio
+import logging
+import argparse
+import itertools
+import concurrent.futures
+
+import numpy as np
+
+from pyhts_scheduling import label_frame_count
+from pyhts_executor import PRIORITY_CLASSES
+from pyhts_synthesizer import Synthesizer, load_configuration
+
+
+###############################################################################
+# Encoding
+###############################################################################
+def encode_array(array):
+    """Encode a numpy array in a JSON compatible dictionary
+
+    :param array: the array (None is kept)
+    :returns: the dictionary dtype, shape and base64 data
+    :rtype: dict
+
+    """
+    if array is None:
+        return None
+    array = np.ascontiguousarray(array)
+    return {"dtype": str(array.dtype), "shape": list(array.shape), "data": base64.b64encode(array.tobytes()).decode()}
+
+
+def decode_array(encoded):
+    """Decode an array encoded by encode_array
+
+    :param encoded: the dictionary dtype, shape and base64 data
+    :returns: the array
+    :rtype: np.array
+
+    """
+    if encoded is None:
+        return None
+    return np.frombuffer(base64.b64decode(encoded["data"]), dtype=encoded["dtype"]).reshape(encoded["shape"])
+
+
+def encode_result(result):
+    """Encode the result of an utterance (see Synthesizer.synthesize)
+    """
+    return {"parameters": dict((kind, encode_array(values)) for kind, values in result["parameters"].items()),
+            "waveform": encode_array(result["waveform"]),
+            "samplerate": result["samplerate"],
+            "outputs": dict((name, base64.b64encode(data).decode()) for name, data in result["outputs"].items())}
+
+
+def percentile(values, q):
+    """Percentile (nearest rank) of a list of values (0 if the list is empty)
+    """
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(np.ceil(q / 100 * len(values))) - 1)]
+
+
+###############################################################################
+# Batching
+###############################################################################
+class _Request:
+    """A request waiting for its batch
+    """
+    def __init__(self, request_id, labels, frames, deadline, future):
+        self.id = request_id
+        self.labels = labels
+        self.frames = frames
+        self.deadline = deadline
+        self.future = future
+        self.arrival = time.time()
+
+
+class RequestBatcher:
+    """Gather the concurrent requests into batches synthesized by one call of the synthesizer
+    """
+    def __init__(self, synthesizer, max_delay=0.01, max_frames=20000, max_requests=64, priority=None):
+        """Constructor
+
+        :param synthesizer: the synthesizer
+        :param max_delay: the maximum time (in seconds) a batch waits for more requests after its first request
+        :param max_frames: the maximum number of frames of a batch (a longer request is synthesized alone)
+        :param max_requests: the maximum number of requests of a batch
+        :param priority: the priority class of the batches on the worker pool (see pyhts_executor.PRIORITY_CLASSES)
+        :returns: None
+        :rtype:
+
+        """
+        self.logger = logging.getLogger("RequestBatcher")
+        self.synthesizer = synthesizer
+        self.max_delay = max_delay
+        self.max_frames = max_frames
+        self.max_requests = max_requests
+        self.priority = priority
+
+        self.queue = None
+        self.carry = None
+        self.task = None
+        self.request_ids = itertools.count()
+
+        # NOTE: the synthesizer calls are serialized => one thread
+        self.thread_pool = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        # Statistics: latency of each request, (number of requests, number of frames, duration) of each batch
+        self.latencies = []
+        self.batches = []
+        self.start_time = None
+
+    def start(self):
+        """Start the batching loop (in the running event loop)
+
+        :returns: None
+        :rtype:
+
+        """
+        self.queue = asyncio.Queue()
+        self.start_time = time.time()
+        self.task = asyncio.ensure_future(self.loop())
+
+    async def stop(self):
+        """Stop the batching loop (the pending requests are cancelled)
+
+        :returns: None
+        :rtype:
+
+        """
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.thread_pool.shutdown(wait=True)
+
+    async def submit(self, labels, deadline=None):
+        """Synthesize the utterances of a request
+
+        :param labels: the dictionary utterance => label (content of the label file or list of its lines)
+        :param deadline: the time (time.time()) before which the request should be done (the deadline of a batch is
+                         the earliest deadline of its requests)
+        :returns: the dictionary utterance => result (see Synthesizer.synthesize)
+        :rtype: dict
+
+        """
+        # NOTE: the obviously malformed requests are rejected before being batched with the others
+        if (not isinstance(labels, dict)) or (not labels):
+            raise Exception("the labels must be a non empty dictionary utterance => label")
+        frameshift = self.synthesizer.conf.frameshift
+        frames = 0
+        for base, label in labels.items():
+            lines = label.split("\n") if isinstance(label, str) else label
+            if (not isinstance(base, str)) or (not base) or ("/" in base) or \
+               (not isinstance(lines, list)) or (not all(isinstance(line, str) for line in lines)):
+                raise Exception("invalid utterance \"%s\": the name must be a file name and the label a string "
+                                "or a list of lines" % base)
+            if not any(line.strip() for line in lines):
+                raise Exception("the label of the utterance \"%s\" is empty" % base)
+            frames += label_frame_count(lines, frameshift)
+
+        request = _Request(next(self.request_ids), labels, frames, deadline,
+                           asyncio.get_running_loop().create_future())
+        await self.queue.put(request)
+        try:
+            return await request.future
+        finally:
+            self.latencies.append(time.time() - request.arrival)
+
+    async def nextBatch(self):
+        """Gather the next batch of requests
+
+        :returns: the list of requests
+        :rtype: list
+
+        """
+        if self.carry is not None:
+            (batch, self.carry) = ([self.carry], None)
+        else:
+            batch = [await self.queue.get()]
+        frames = batch[0].frames
+
+        deadline = time.time() + self.max_delay
+        while (len(batch) < self.max_requests) and (frames < self.max_frames):
+            try:
+                request = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+                try:
+                    request = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+
+            # NOTE: the request not fitting in the batch opens the next one
+            if frames + request.frames > self.max_frames:
+                self.carry = request
+                break
+            batch.append(request)
+            frames += request.frames
+
+        return batch
+
+    def synthesize(self, batch):
+        """Synthesize a batch (in the thread of the synthesizer), the utterances being prefixed by their request
+
+        :param batch: the list of requests
+        :returns: the dictionary request id => (dictionary utterance => result)
+        :rtype: dict
+
+        """
+        labels = dict()
+        for request in batch:
+            for base, label in request.labels.items():
+                labels["r%d_%s" % (request.id, base)] = label
+
+        deadlines = [request.deadline for request in batch if request.deadline is not None]
+        results = self.synthesizer.synthesize(labels, priority=self.priority,
+                                              deadline=min(deadlines) if deadlines else None)
+
+        scattered = dict()
+        for request in batch:
+            prefix = "r%d_" % request.id
+            scattered[request.id] = dict()
+            for base in request.labels:
+                result = results[prefix + base]
+                result["outputs"] = dict((name[len(prefix):] if name.startswith(prefix) else name, data)
+                                         for name, data in result["outputs"].items())
+                scattered[request.id][base] = result
+
+        return scattered
+
+    async def runBatch(self, batch):
+        """Synthesize a batch and give their results to its requests
+
+        :param batch: the list of requests
+        :returns: None
+        :rtype:
+
+        """
+        start = time.time()
+        results = await asyncio.get_running_loop().run_in_executor(self.thread_pool, self.synthesize, batch)
+
+        duration = time.time() - start
+        self.batches.append((len(batch), sum(r.frames for r in batch), duration))
+        self.logger.debug("batch of %d requests (%d frames) synthesized in %.3f seconds" %
+                          (len(batch), self.batches[-1][1], duration))
+        for request in batch:
+            if not request.future.done():
+                request.future.set_result(results[request.id])
+
+    async def loop(self):
+        """Batching loop: if a batch fails, its requests are retried one by one so that a bad request (e.g. a
+        malformed label) only fails itself
+
+        :returns: None
+        :rtype:
+
+        """
+        while True:
+            batch = [r for r in await self.nextBatch() if not r.future.cancelled()]
+            if not batch:
+                continue
+
+            try:
+                await self.runBatch(batch)
+                continue
+            except Exception as ex:
+                if len(batch) > 1:
+                    self.logger.warning("batch of %d requests failed (%s), the requests are retried one by one" %
+                                        (len(batch), ex))
+                else:
+                    self.logger.error("request %d failed: %s" % (batch[0].id, ex))
+                    if not batch[0].future.done():
+                        batch[0].future.set_exception(ex)
+                    continue
+
+            for request in batch:
+                if request.future.done():
+                    continue
+                try:
+                    await self.runBatch([request])
+                except Exception as ex:
+                    self.logger.error("request %d failed: %s" % (request.id, ex))
+                    request.future.set_exception(ex)
+
+    def statistics(self):
+        """Statistics of the requests served so far
+
+        :returns: the dictionary of the statistics
+        :rtype: dict
+
+        """
+        elapsed = time.time() - self.start_time if self.start_time is not None else 0.0
+        nb_batches = max(1, len(self.batches))
+        return {
+            "requests": len(self.latencies),
+            "throughput": len(self.latencies) / elapsed if elapsed > 0 else 0.0,
+            "latency_p50": percentile(self.latencies, 50),
+            "latency_p95": percentile(self.latencies, 95),
+            "latency_p99": percentile(self.latencies, 99),
+            "latency_max": max(self.latencies) if self.latencies else 0.0,
+            "batches": len(self.batches),
+            "requests_per_batch": sum(b[0] for b in self.batches) / nb_batches,
+            "frames_per_batch": sum(b[1] for b in self.batches) / nb_batches,
+        }
+
+
+###############################################################################
+# Server
+###############################################################################
+class SynthesisServer:
+    """Line-delimited JSON front end of the request batchers
+    """
+    def __init__(self, batchers, default_priority=None):
+        """Constructor
+
+        :param batchers: the dictionary priority class => request batcher
+        :param default_priority: the class of the requests without priority (default: the first class of batchers)
+        :returns: None
+        :rtype:
+
+        """
+        self.logger = logging.getLogger("SynthesisServer")
+        self.batchers = batchers
+        self.default_priority = default_priority if default_priority is not None else list(batchers.keys())[0]
+
+    async def handle(self, reader, writer):
+        """Serve the requests of a connection (they can be pipelined, each one is answered when ready)
+
+        :param reader: the stream reader of the connection
+        :param writer: the stream writer of the connection
+        :returns: None
+        :rtype:
+
+        """
+        pending = set()
+        lock = asyncio.Lock()
+
+        async def answer(line):
+            start = time.time()
+            request_id = None
+            try:
+                request = json.loads(line)
+                request_id = request.get("id")
+                priority = request.get("priority", self.default_priority)
+                if priority not in self.batchers:
+                    raise Exception("unknown priority class \"%s\" (%s)" % (priority, ", ".join(self.batchers)))
+                deadline = start + request["deadline"] if request.get("deadline") is not None else None
+                results = await self.batchers[priority].submit(request["labels"], deadline)
+                response = {"id": request_id, "latency": time.time() - start,
+                            "results": dict((base, encode_result(result)) for base, result in results.items())}
+            except Exception as ex:
+                response = {"id": request_id, "error": str(ex)}
+            async with lock:
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if line.strip():
+                    task = asyncio.ensure_future(answer(line))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.wait(pending)
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        """Serve forever
+
+        :param host: the listening address
+        :param port: the listening port
+        :returns: None
+        :rtype:
+
+        """
+        for batcher in self.batchers.values():
+            batcher.start()
+        server = await asyncio.start_server(self.handle, host, port)
+        self.logger.info("listening on %s:%d" % (host, port))
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for priority, batcher in self.batchers.items():
+                self.logger.info("%s statistics: %s" % (priority, json.dumps(batcher.statistics())))
+                await batcher.stop()
+
+
+###############################################################################
+#  Envelopping
+###############################################################################
+def main():
+    """Main entry function
+    """
+    parser = argparse.ArgumentParser(description="Synthesis server batching the concurrent requests")
+    parser.add_argument("-c", "--config", required=True,
+                        help="Configuration file")
+    parser.add_argument("-G", "--generator", type=str, default=None,
+                        help="Override the configuration generator")
+    parser.add_argument("-R", "--renderer", type=str, default=None,
+                        help="Override the configuration renderer")
+    parser.add_argument("-P", "--nb_proc", default=1, type=int,
+                        help="The number of utterances processed at the same time")
+    parser.add_argument("--host", default="127.0.0.1", type=str,
+                        help="The listening address")
+    parser.add_argument("--port", default=8765, type=int,
+                        help="The listening port")
+    parser.add_argument("--max_delay", default=0.01, type=float,
+                        help="The maximum time (in seconds) a batch waits for more requests")
+    parser.add_argument("--max_frames", default=20000, type=int,
+                        help="The maximum number of frames of a batch")
+    parser.add_argument("--max_requests", default=64, type=int,
+                        help="The maximum number of requests of a batch")
+    parser.add_argument("--classes", default=["default"], nargs="+", choices=PRIORITY_CLASSES,
+                        help="The priority classes served, each one by its own synthesizer (the first one is the "
+                             "class of the requests without priority)")
+    parser.add_argument("--tmp_dir", default=None, type=str,
+                        help="The root of the temporary workspace (default: ./tmp)")
+    parser.add_argument("-v", "--verbosity", action="count", default=0,
+                        help="increase output verbosity")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=[logging.WARNING, logging.INFO, logging.DEBUG][min(args.verbosity, 2)],
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    batchers = dict()
+    try:
+        for priority in args.classes:
+            conf = load_configuration(args.config, args.generator, args.renderer, tmp_dir=args.tmp_dir)
+            batchers[priority] = RequestBatcher(Synthesizer(conf, args.nb_proc), args.max_delay, args.max_frames,
+                                                args.max_requests, priority)
+        asyncio.run(SynthesisServer(batchers).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for batcher in batchers.values():
+            batcher.synthesizer.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Helpers to split a corpus between several independent runs of synth.py (the shards) and to verify the
+    result once all the shards are done.
+
+    The partition only depends on the list of utterances and on their estimated number of frames, so each node
+    can compute its own shard without any communication. Each shard writes a manifest in the output directory
+    which can then be checked by running this script:
+
+        python3 pyhts_sharding.py <output>
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import os
+import sys
+import glob
+import json
+import heapq
+import hashlib
+import logging
+import argparse
+
+from pyhts_containers import DirectoryWriter, open_container
+
+MANIFEST_PATTERN = "manifest_shard_%d_of_%d.json"
+
+
+def corpus_digest(gen_labfile_base_lst):
+    """Compute a digest identifying the list of utterances (independently of its order)
+
+    :param gen_labfile_base_lst: the list of utterances
+    :returns: the digest
+    :rtype: str
+
+    """
+    return hashlib.sha1("\n".join(sorted(gen_labfile_base_lst)).encode("utf-8")).hexdigest()
+
+
+def partition(frames, shard_count):
+    """Split the utterances between the shards by balancing the number of frames. The utterances are taken
+    by decreasing number of frames (then by name) and given to the least loaded shard (then the lowest index),
+    so the partition is deterministic.
+
+    :param frames: the dictionary utterance => estimated number of frames
+    :param shard_count: the number of shards
+    :returns: the sorted list of utterances of each shard
+    :rtype: list
+
+    """
+    shards = [[] for _ in range(shard_count)]
+    loads = [(0, i) for i in range(shard_count)]
+    for base in sorted(frames.keys(), key=lambda b: (-frames[b], b)):
+        (load, i) = heapq.heappop(loads)
+        shards[i].append(base)
+        heapq.heappush(loads, (load + frames[base], i))
+
+    return [sorted(shard) for shard in shards]
+
+
+def write_manifest(out_path, shard_index, shard_count, gen_labfile_base_lst, shard_lst, frames, writer=None):
+    """Write the manifest of a shard in the output directory
+
+    :param out_path: the output directory
+    :param shard_index: the index of the shard
+    :param shard_count: the number of shards
+    :param gen_labfile_base_lst: the list of all the utterances of the corpus
+    :param shard_lst: the list of the utterances of the shard
+    :param frames: the dictionary utterance => estimated number of frames
+    :param writer: the writer of the outputs (default: the output directory)
+    :returns: the manifest path
+    :rtype: str
+
+    """
+    if writer is None:
+        writer = DirectoryWriter(out_path)
+
+    manifest = {
+        "shard_index": shard_index,
+        "shard_count": shard_count,
+        "corpus_digest": corpus_digest(gen_labfile_base_lst),
+        "nb_utterances": len(gen_labfile_base_lst),
+        "container": writer.container,
+        "utterances": dict()
+    }
+    for base in shard_lst:
+        manifest["utterances"][base] = {
+            "frames": frames.get(base, 0),
+            "outputs": writer.files(base)
+        }
+
+    fname = os.path.join(out_path, MANIFEST_PATTERN % (shard_index, shard_count))
+    with open(fname, "w") as f_manifest:
+        json.dump(manifest, f_manifest, indent=2, sort_keys=True)
+
+    return fname
+
+
+def verify_manifests(out_path):
+    """Verify that all the shards are done and that every utterance was produced exactly once
+
+    :param out_path: the output directory containing the outputs and the manifests
+    :returns: the list of the problems found (empty if everything is fine)
+    :rtype: list
+
+    """
+    manifests = []
+    for fname in sorted(glob.glob(os.path.join(glob.escape(out_path), MANIFEST_PATTERN.replace("%d", "*")))):
+        with open(fname) as f_manifest:
+            manifests.append(json.load(f_manifest))
+
+    if not manifests:
+        return ["no manifest found in %s" % out_path]
+
+    errors = []
+    reference = manifests[0]
+    for key in ["shard_count", "corpus_digest", "nb_utterances"]:
+        values = set(str(m[key]) for m in manifests)
+        if len(values) > 1:
+            errors.append("the manifests disagree on %s: %s" % (key, ", ".join(sorted(values))))
+
+    # Each shard exactly once
+    indices = [m["shard_index"] for m in manifests]
+    for i in range(reference["shard_count"]):
+        if indices.count(i) != 1:
+            errors.append("shard %d found %d times" % (i, indices.count(i)))
+
+    # Each utterance exactly once and produced
+    seen = dict()
+    for m in manifests:
+        # The outputs may be stored in a container
+        sizes = None
+        if m.get("container") is not None:
+            sizes = open_container(out_path, m["container"]).names()
+
+        for base, info in m["utterances"].items():
+            if base in seen:
+                errors.append("%s produced by shards %d and %d" % (base, seen[base], m["shard_index"]))
+                continue
+            seen[base] = m["shard_index"]
+
+            if not info["outputs"]:
+                errors.append("%s (shard %d) has no output" % (base, m["shard_index"]))
+            for rel_fname, size in info["outputs"].items():
+                if sizes is not None:
+                    cur_size = sizes.get(rel_fname)
+                else:
+                    fname = os.path.join(out_path, rel_fname)
+                    cur_size = os.path.getsize(fname) if os.path.isfile(fname) else None
+
+                if cur_size is None:
+                    errors.append("%s is missing" % rel_fname)
+                elif cur_size != size:
+                    errors.append("%s has been modified (%d bytes instead of %d)" % (rel_fname, cur_size, size))
+
+    if len(seen) != reference["nb_utterances"]:
+        errors.append("%d utterances produced instead of %d" % (len(seen), reference["nb_utterances"]))
+
+    return errors
+
+
+###############################################################################
+#  Envelopping
+###############################################################################
+def main():
+    """Main entry function
+    """
+    parser = argparse.ArgumentParser(description="Verify the output of a sharded synthesis")
+    parser.add_argument("output", help="The output directory shared by the shards")
+    args = parser.parse_args()
+
+    logging.basicConfig(format='[%(asctime)s] %(levelname)s : %(message)s', level=logging.INFO)
+    logger = logging.getLogger("pyhts_sharding")
+
+    errors = verify_manifests(args.output)
+    for error in errors:
+        logger.error(error)
+
+    if errors:
+        return 1
+
+    logger.info("all the utterances have been produced exactly once")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Storage of the intermediate files (.dur, .lab, .ffi/.ffo, .mean/.var, .lf0/.mgc/.bap, .f0/.sp/.ap, ...) produced
+    between the parameter generation and the rendering.
+
+    As the intermediate files are also read/written by external binaries (HMGenS, SPTK, STRAIGHT, ...), the storage
+    is a directory given to the generator and the renderer instead of the output directory. Depending on the backend,
+    this directory is:
+      - out: the output directory itself (everything is written on the persistent storage),
+      - workspace: a directory of the temporary workspace of the run,
+      - shm: a directory in shared memory (/dev/shm), the workspace is used if it is not available.
+
+    Once an utterance is rendered, its remaining files (the deliverables, the renderers removing the intermediate files
+    unless asked to preserve them) are published in the output directory or container (see pyhts_containers.py).
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import os
+import shutil
+import logging
+
+from pyhts_containers import output_files, DirectoryWriter
+from pyhts_workspace import TMPFS_ROOT
+
+# Available backends
+STORAGE_BACKENDS = ["out", "workspace", "shm"]
+
+
+class IntermediateStorage:
+    """Directory storing the intermediate files of the utterances before their publication in the output directory
+    """
+    def __init__(self, conf, out_path, backend="out", writer=None):
+        """Constructor
+
+        :param conf: the configuration object
+        :param out_path: the output directory
+        :param backend: the backend (see STORAGE_BACKENDS)
+        :param writer: the writer of the outputs (default: the output directory)
+        :returns: None
+        :rtype:
+
+        """
+        if backend not in STORAGE_BACKENDS:
+            raise Exception("unknown intermediate storage \"%s\" (available: %s)" % (backend, ", ".join(STORAGE_BACKENDS)))
+
+        self.logger = logging.getLogger("IntermediateStorage")
+        self.out_path = out_path
+        self.writer = writer if writer is not None else DirectoryWriter(out_path)
+        self.pid = os.getpid()
+
+        # Statistics
+        self.intermediate_bytes = 0
+        self.persistent_bytes = 0
+
+        if (backend == "shm") and not os.path.isdir(TMPFS_ROOT):
+            self.logger.warning("%s is not available, the workspace is used instead" % TMPFS_ROOT)
+            backend = "workspace"
+        self.backend = backend
+
+        # NOTE: the input files extracted from an archive are kept apart as some generators write .lab files
+        if backend == "out":
+            self.path = out_path
+            self.input_path = os.path.join(conf.TMP_PATH, "input")
+        elif backend == "workspace":
+            self.path = os.path.join(conf.TMP_PATH, "intermediate")
+            self.input_path = os.path.join(conf.TMP_PATH, "input")
+        else:
+            self.path = os.path.join(TMPFS_ROOT, "pyhts_%d" % os.getuid(), conf.workspace.run_id)
+            self.input_path = self.path + "_input"
+        os.makedirs(self.path, exist_ok=True)
+        os.makedirs(self.input_path, exist_ok=True)
+
+    def measure(self, gen_labfile_base_lst):
+        """Add the size of the current files of the given utterances to the intermediate statistics
+
+        :param gen_labfile_base_lst: the list of utterances
+        :returns: None
+        :rtype:
+
+        """
+        for base in gen_labfile_base_lst:
+            self.intermediate_bytes += sum(output_files(self.path, base).values())
+
+    def publish(self, gen_labfile_base_lst):
+        """Move the files of the given utterances to the output (directory or container)
+
+        :param gen_labfile_base_lst: the list of utterances
+        :returns: None
+        :rtype:
+
+        """
+        for base in gen_labfile_base_lst:
+            self.persistent_bytes += self.writer.add(self.path, base)
+        self.writer.flush()
+
+    def report(self):
+        """Log the amount of data written in the intermediate storage and in the persistent storage
+
+        :returns: None
+        :rtype:
+
+        """
+        self.logger.info("intermediate files (%s): at least %.1f MB" % (self.backend, self.intermediate_bytes / 2**20))
+        if self.backend == "out":
+            self.logger.info("persistent storage: %.1f MB of deliverables + the intermediate files" %
+                             (self.persistent_bytes / 2**20))
+        else:
+            self.logger.info("persistent storage: %.1f MB of deliverables" % (self.persistent_bytes / 2**20))
+
+    def cleanup(self):
+        """Remove the shared memory directory (the other backends are cleaned with the output directory or the workspace)
+
+        :returns: None
+        :rtype:
+
+        """
+        if (self.backend == "shm") and (self.pid == os.getpid()):
+            shutil.rmtree(self.path, ignore_errors=True)
+            shutil.rmtree(self.input_path, ignore_errors=True)
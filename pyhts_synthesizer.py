@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Library API: synthesize labels given as strings and get the parameters and the waveforms as numpy arrays,
+    without going through synth.py.
+
+        from pyhts_synthesizer import Synthesizer, load_configuration
+
+        with Synthesizer(load_configuration("voice/config.json", renderer="world"), nb_proc=4) as synthesizer:
+            results = synthesizer.synthesize({"utt1": label_string_1, "utt2": label_string_2})
+            (mgc, wav) = (results["utt1"]["parameters"]["mgc"], results["utt1"]["waveform"])
+
+    The synthesizer keeps its workspace, its generator and its renderer between two calls, so that what has been
+    loaded once is reused: the composed HTS models (as long as they cover the labels of the call), the restored DNN
+    and the worker pool. The files of each call are written in the workspace and removed once the results are loaded.
+
+    The calls of a synthesizer are serialized, but several synthesizers (e.g. one for the interactive requests and one
+    for the batch requests) can be used by different threads: their per-utterance tasks share the worker pool, which
+    runs them by priority class and deadline.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import os
+import shutil
+import logging
+import argparse
+import threading
+import itertools
+
+import numpy as np
+
+try:
+    import soundfile as sf
+except ImportError:
+    sf = None
+
+from pyhts_configuration import Configuration
+from pyhts_containers import output_files
+from pyhts_executor import scheduling
+from utils import generate_label_list
+import generation
+import rendering
+
+# The extensions of the audio outputs (see rendering.utils.audio)
+AUDIO_EXTENSIONS = ["wav", "flac", "ogg", "opus"]
+
+
+###############################################################################
+# Helpers
+###############################################################################
+def load_configuration(config_fname, generator=None, renderer=None, **options):
+    """Load a voice configuration with the default values of the synth.py options
+
+    :param config_fname: the voice configuration file
+    :param generator: the generator overriding the one of the configuration
+    :param renderer: the renderer(s) overriding the one of the configuration
+    :param options: the other synth.py options (e.g. pg_type, imposed_duration, tmp_dir, tmpfs, task_timeout)
+    :returns: the configuration object
+    :rtype: Configuration
+
+    """
+    args = argparse.Namespace(config=config_fname, generator=generator, renderer=renderer, straight_path=None,
+                              pg_type=0, imposed_duration=False)
+    for name, value in options.items():
+        setattr(args, name, value)
+
+    return Configuration(args)
+
+
+###############################################################################
+# Synthesizer
+###############################################################################
+class Synthesizer:
+    """In-process synthesizer keeping the loaded models between two calls. The calls are serialized (the generators
+    and the renderers use the fixed file names of the workspace).
+    """
+    def __init__(self, conf, nb_proc=1, preserve=False):
+        """Constructor. The generator and the renderer are loaded on the first call.
+
+        :param conf: the configuration object (see load_configuration)
+        :param nb_proc: the number of utterances processed at the same time
+        :param preserve: keep the files of each call (in the workspace) and the workspace
+        :returns: None
+        :rtype:
+
+        """
+        self.conf = conf
+        self.logger = logging.getLogger("Synthesizer")
+        self.nb_proc = nb_proc
+        self.preserve = preserve
+
+        self.generator = None
+        self.renderer = None
+        self.lock = threading.Lock()
+        self.call_ids = itertools.count()
+
+        # The dimension of a frame of each parameter stream
+        self.dims = dict()
+        for cur_stream in self.conf.STREAMS:
+            self.dims[cur_stream["kind"]] = cur_stream["order"] + 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.close()
+
+    def writeLabels(self, labels, in_path):
+        """Write the labels of a call
+
+        :param labels: the dictionary utterance => label (the content of the label file or the list of its lines)
+        :param in_path: the input directory
+        :returns: None
+        :rtype:
+
+        """
+        for base, label in labels.items():
+            if not isinstance(label, str):
+                label = "\n".join(line.rstrip("\n") for line in label)
+            with open(os.path.join(in_path, "%s.lab" % base), "w") as f_lab:
+                f_lab.write(label.rstrip("\n") + "\n")
+
+    def writeParameters(self, parameters, out_path):
+        """Write the parameters given by the caller (e.g. for the NONE generator or to impose a stream)
+
+        :param parameters: the dictionary utterance => (dictionary stream => array of frames)
+        :param out_path: the directory of the generated parameters
+        :returns: None
+        :rtype:
+
+        """
+        for base, streams in parameters.items():
+            for kind, values in streams.items():
+                np.asarray(values, dtype=np.float32).tofile(os.path.join(out_path, "%s.%s" % (base, kind)))
+
+    def readStream(self, fname, kind):
+        """Load a parameter stream file as an array of frames
+
+        :param fname: the file of the stream
+        :param kind: the kind of the stream
+        :returns: the array frames x dimension
+        :rtype: np.array
+
+        """
+        data = np.fromfile(fname, dtype=np.float32)
+        return data[:data.size // self.dims[kind] * self.dims[kind]].reshape(-1, self.dims[kind])
+
+    def readParameters(self, out_path, base):
+        """Load the parameter streams of an utterance
+
+        :param out_path: the output directory of the call
+        :param base: the utterance
+        :returns: the dictionary stream => array of frames
+        :rtype: dict
+
+        """
+        parameters = dict()
+        for kind in self.dims:
+            fname = os.path.join(out_path, "%s.%s" % (base, kind))
+            if os.path.isfile(fname):
+                parameters[kind] = self.readStream(fname, kind)
+
+        return parameters
+
+    def readOutputs(self, out_path, base):
+        """Load the outputs of an utterance
+
+        :param out_path: the output directory of the call
+        :param base: the utterance
+        :returns: the dictionary of the results (see synthesize)
+        :rtype: dict
+
+        """
+        result = {"parameters": dict(), "waveform": None, "samplerate": int(self.conf.SIGNAL["samplerate"]),
+                  "outputs": dict()}
+        for name in sorted(output_files(out_path, base)):
+            fname = os.path.join(out_path, name)
+            ext = os.path.splitext(name)[1][1:]
+            if (name == "%s.%s" % (base, ext)) and (ext in self.dims):
+                result["parameters"][ext] = self.readStream(fname, ext)
+            elif (name == "%s.%s" % (base, ext)) and (ext in AUDIO_EXTENSIONS) and (sf is not None):
+                (result["waveform"], result["samplerate"]) = sf.read(fname, dtype=self.conf.SIGNAL_DTYPE)
+            else:
+                with open(fname, "rb") as f_out:
+                    result["outputs"][name] = f_out.read()
+
+        return result
+
+    def synthesize(self, labels, parameters=None, render=True, priority=None, deadline=None):
+        """Synthesize some utterances
+
+        :param labels: the dictionary utterance => label (the content of the label file or the list of its lines),
+                       or the list of the labels (the utterances are then named utt_0000, utt_0001, ...)
+        :param parameters: the parameters replacing the generated ones, dictionary utterance => (stream => frames)
+        :param render: switch to run the renderer (otherwise only the parameters are generated)
+        :param priority: the priority class of the per-utterance tasks on the shared worker pool
+                         (see pyhts_executor.PRIORITY_CLASSES)
+        :param deadline: the time (time.time()) before which the synthesis should be done
+        :returns: the dictionary utterance => {"parameters": stream => frames array, "waveform": samples array (None
+                  if there is no audio output or if soundfile is not available), "samplerate": the sampling rate,
+                  "outputs": file name => content of the other outputs (e.g. EMA, weights, video)}
+        :rtype: dict
+
+        """
+        if not isinstance(labels, dict):
+            labels = dict(("utt_%04d" % i, label) for i, label in enumerate(labels))
+        bases = list(labels.keys())
+
+        with self.lock, scheduling(priority, deadline):
+            call_path = os.path.join(self.conf.TMP_PATH, "call_%d" % next(self.call_ids))
+            in_path = os.path.join(call_path, "in")
+            out_path = os.path.join(call_path, "out")
+            os.makedirs(in_path)
+            os.makedirs(out_path)
+            try:
+                self.writeLabels(labels, in_path)
+
+                # Parameter generation
+                if self.generator is None:
+                    self.generator = generation.generateGenerator(self.conf, self.nb_proc, self.preserve)
+                if self.conf.generator.upper() != "NONE":
+                    generate_label_list(self.conf, in_path, bases)
+                self.generator.generate(in_path, out_path, bases, self.conf.use_gv)
+                if parameters is not None:
+                    self.writeParameters(parameters, out_path)
+
+                # NOTE: the renderers remove the parameter files unless the intermediate files are preserved
+                generated = dict((base, self.readParameters(out_path, base)) for base in bases)
+
+                # Rendering
+                if render:
+                    if self.renderer is None:
+                        self.renderer = rendering.generateRenderer(self.conf, self.nb_proc, self.preserve)
+                    self.renderer.render(in_path, out_path, bases)
+
+                # The streams produced by the renderers (e.g. ema) are added to the generated ones
+                results = dict()
+                for base in bases:
+                    results[base] = self.readOutputs(out_path, base)
+                    generated[base].update(results[base]["parameters"])
+                    results[base]["parameters"] = generated[base]
+
+                return results
+            finally:
+                if not self.preserve:
+                    shutil.rmtree(call_path, ignore_errors=True)
+
+    def close(self):
+        """Release the loaded models and the workspace
+
+        :returns: None
+        :rtype:
+
+        """
+        with self.lock:
+            if self.generator is not None:
+                self.generator.close()
+                self.generator = None
+            self.renderer = None
+
+            self.conf.workspace.release()
+            if not self.preserve:
+                self.conf.workspace.cleanup()
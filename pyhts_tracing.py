@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Span based tracing of a synthesis run.
+
+    A span covers a stage of the run, a task of a per-utterance stage or an external command. When the tracing is
+    enabled, each process (main process, workers, sub-renderers) appends its spans to its own file of the trace
+    directory. At the end of the run, the spans are merged and exported as a Chrome trace-event JSON file (which can
+    be opened in chrome://tracing or https://ui.perfetto.dev) and summarized by a table of the wall and CPU times.
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import os
+import glob
+import json
+import time
+import logging
+import resource
+import threading
+
+from contextlib import contextmanager
+
+# The trace directory is inherited by the spawned processes through the environment
+TRACE_DIR_ENV = "PYHTS_TRACE_DIR"
+
+_trace_dir = os.environ.get(TRACE_DIR_ENV)
+_trace_file = None
+_trace_pid = None
+_owner_pid = None
+
+
+def enable(trace_dir):
+    """Enable the tracing for the current process and its future children
+
+    :param trace_dir: the directory storing the spans of each process
+    :returns: None
+    :rtype:
+
+    """
+    global _trace_dir, _owner_pid
+    os.makedirs(trace_dir, exist_ok=True)
+    _trace_dir = trace_dir
+    _owner_pid = os.getpid()
+    os.environ[TRACE_DIR_ENV] = trace_dir
+
+
+def inherit():
+    """Follow the tracing state given by the environment. Needed by the processes which are not forked from the
+    traced process (e.g. the workers started by the fork server)
+
+    :returns: None
+    :rtype:
+
+    """
+    global _trace_dir
+    _trace_dir = os.environ.get(TRACE_DIR_ENV)
+
+
+def is_enabled():
+    """Check if the tracing is enabled
+    """
+    return _trace_dir is not None
+
+
+def _cpu_time():
+    """CPU time (user + system) of the current process and of its waited children (the external commands, not the
+    persistent workers)
+    """
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return time.process_time() + children.ru_utime + children.ru_stime
+
+
+def _write(event):
+    """Append an event to the span file of the current process
+    """
+    global _trace_file, _trace_pid
+    if _trace_pid != os.getpid():
+        # NOTE: a forked process has its own file
+        _trace_pid = os.getpid()
+        _trace_file = open(os.path.join(_trace_dir, "spans_%d.jsonl" % _trace_pid), "a", buffering=1)
+    _trace_file.write(json.dumps(event) + "\n")
+
+
+@contextmanager
+def span(name, category="stage", **args):
+    """Record a span around the enclosed code (no-op if the tracing is disabled)
+
+    :param name: the name of the span (the summary groups the spans by category and name)
+    :param category: the category of the span (stage, task, command, ...)
+    :param args: additional information attached to the span (e.g. the utterance)
+    :returns: the dictionary of the span arguments, which can be completed by the enclosed code
+    :rtype: dict
+
+    """
+    if _trace_dir is None:
+        yield args
+        return
+
+    start = time.time()
+    start_cpu = _cpu_time()
+    try:
+        yield args
+    finally:
+        _write({"name": name, "cat": category, "ph": "X",
+                "ts": int(start * 1e6), "dur": int((time.time() - start) * 1e6),
+                "pid": os.getpid(), "tid": threading.get_ident() % 2**31,
+                "args": dict(args, cpu=_cpu_time() - start_cpu)})
+
+
+def load_spans(trace_dir):
+    """Load the spans recorded by all the processes
+
+    :param trace_dir: the trace directory
+    :returns: the list of spans
+    :rtype: list
+
+    """
+    spans = []
+    for fname in glob.glob(os.path.join(trace_dir, "spans_*.jsonl")):
+        with open(fname) as f_spans:
+            for line in f_spans:
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    pass
+
+    return sorted(spans, key=lambda s: s["ts"])
+
+
+def export_chrome_trace(spans, trace_fname):
+    """Export the spans in the Chrome trace-event format
+
+    :param spans: the list of spans
+    :param trace_fname: the output JSON file
+    :returns: None
+    :rtype:
+
+    """
+    with open(trace_fname, "w") as f_trace:
+        json.dump({"traceEvents": spans, "displayTimeUnit": "ms"}, f_trace)
+
+
+def summary(spans):
+    """Summarize the spans by category and name
+
+    :param spans: the list of spans
+    :returns: the lines of the summary table
+    :rtype: list
+
+    """
+    groups = dict()
+    for cur_span in spans:
+        key = (cur_span["cat"], cur_span["name"])
+        if key not in groups:
+            groups[key] = [0, 0.0, 0.0, 0.0]
+        groups[key][0] += 1
+        groups[key][1] += cur_span["dur"] / 1e6
+        groups[key][2] = max(groups[key][2], cur_span["dur"] / 1e6)
+        groups[key][3] += cur_span["args"].get("cpu", 0.0)
+
+    header = "%-8s %-32s %7s %12s %10s %10s %12s" % ("category", "name", "count", "wall (s)", "mean (s)",
+                                                      "max (s)", "cpu (s)")
+    lines = [header, "-" * len(header)]
+    for (category, name), (count, wall, longest, cpu) in sorted(groups.items(), key=lambda g: -g[1][1]):
+        lines.append("%-8s %-32s %7d %12.2f %10.3f %10.3f %12.2f" % (category, name[:32], count, wall, wall / count,
+                                                                   longest, cpu))
+
+    return lines
+
+
+def report(trace_fname):
+    """Merge the spans of all the processes, export them in trace_fname and log the summary table
+
+    :param trace_fname: the Chrome trace-event file
+    :returns: None
+    :rtype:
+
+    """
+    global _owner_pid
+    # NOTE: only the process which enabled the tracing reports, and only once
+    if (_trace_dir is None) or (_owner_pid != os.getpid()):
+        return
+    _owner_pid = None
+
+    logger = logging.getLogger("Tracing")
+    spans = load_spans(_trace_dir)
+    export_chrome_trace(spans, trace_fname)
+    logger.info("%d spans exported in %s" % (len(spans), trace_fname))
+
+    lines = summary(spans)
+    with open(os.path.splitext(trace_fname)[0] + "_summary.txt", "w") as f_summary:
+        f_summary.write("\n".join(lines) + "\n")
+    for line in lines:
+        logger.info(line)
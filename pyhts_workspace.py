@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Temporary workspace of a synthesis run.
+
+    Each run gets its own unique directory under a common root (cwd/tmp by default, optionally on a tmpfs) so that
+    several runs can share the same working directory. The read-only assets (e.g. the window files) are copied once
+    in a shared directory of the root and reference counted: a shared directory is removed when the last run using
+    it releases it. A run only removes its own directory and its own references.
+
+        <root>/run_<host>_<pid>_XXXX/      the private directory of a run
+        <root>/shared/<name>/              a shared asset
+        <root>/shared/<name>.refs/<run>    the references of the runs using the asset
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import os
+import fcntl
+import shutil
+import socket
+import logging
+import tempfile
+
+from contextlib import contextmanager
+
+# Default tmpfs root
+TMPFS_ROOT = "/dev/shm"
+
+
+def _pid_alive(pid):
+    """Check if a process of the current host is still alive
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Workspace:
+    """Unique temporary workspace of a run
+    """
+    def __init__(self, root, tmpfs=False):
+        """Constructor. The private directory of the run is created.
+
+        :param root: the root directory shared by the runs
+        :param tmpfs: switch to put the root on the tmpfs (if available)
+        :returns: None
+        :rtype:
+
+        """
+        self.logger = logging.getLogger("Workspace")
+        if tmpfs:
+            if os.path.isdir(TMPFS_ROOT):
+                root = os.path.join(TMPFS_ROOT, "pyhts_%d" % os.getuid(), root.strip(os.sep).replace(os.sep, "_"))
+            else:
+                self.logger.warning("%s is not available, %s is used instead" % (TMPFS_ROOT, root))
+
+        self.root = root
+        self.shared_root = os.path.join(root, "shared")
+        os.makedirs(self.shared_root, exist_ok=True)
+
+        self.host = socket.gethostname()
+        self.pid = os.getpid()
+        self.path = tempfile.mkdtemp(prefix="run_%s_%d_" % (self.host, self.pid), dir=root)
+        self.run_id = os.path.basename(self.path)
+        self.shared_names = []
+
+    @contextmanager
+    def lock(self):
+        """Lock the shared part of the root (between the runs)
+        """
+        with open(os.path.join(self.shared_root, ".lock"), "w") as f_lock:
+            fcntl.flock(f_lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f_lock, fcntl.LOCK_UN)
+
+    def pruneReferences(self, refs_dir):
+        """Remove the references of the dead runs of the current host
+
+        :param refs_dir: the directory containing the references of a shared asset
+        :returns: the remaining references
+        :rtype: list
+
+        """
+        refs = []
+        prefix = "run_%s_" % self.host
+        for ref in os.listdir(refs_dir):
+            pid = ref[len(prefix):].split("_", 1)[0] if ref.startswith(prefix) else ""
+            if pid.isdigit() and (int(pid) != self.pid) and not _pid_alive(int(pid)):
+                self.logger.debug("remove stale reference %s" % ref)
+                os.remove(os.path.join(refs_dir, ref))
+            else:
+                refs.append(ref)
+
+        return refs
+
+    def shared(self, name, src_dir):
+        """Get a shared read-only copy of the directory src_dir (created if needed) and add a reference to it
+
+        :param name: the name of the shared asset (should identify the content)
+        :param src_dir: the source directory
+        :returns: the path of the shared copy
+        :rtype: str
+
+        """
+        shared_dir = os.path.join(self.shared_root, name)
+        refs_dir = shared_dir + ".refs"
+        with self.lock():
+            if not os.path.isdir(shared_dir):
+                # Copy then rename so that a partial copy is never used
+                tmp_dir = tempfile.mkdtemp(prefix=".%s_" % name, dir=self.shared_root)
+                shutil.rmtree(tmp_dir)
+                shutil.copytree(src_dir, tmp_dir)
+                os.rename(tmp_dir, shared_dir)
+
+            os.makedirs(refs_dir, exist_ok=True)
+            open(os.path.join(refs_dir, self.run_id), "w").close()
+
+        if name not in self.shared_names:
+            self.shared_names.append(name)
+        return shared_dir
+
+    def release(self):
+        """Release the references of the run to the shared assets. The shared assets which are not referenced
+        anymore are removed.
+
+        :returns: None
+        :rtype:
+
+        """
+        # NOTE: the forked workers inherit the workspace but don't own it
+        if self.pid != os.getpid():
+            return
+
+        with self.lock():
+            for name in self.shared_names:
+                shared_dir = os.path.join(self.shared_root, name)
+                refs_dir = shared_dir + ".refs"
+                try:
+                    os.remove(os.path.join(refs_dir, self.run_id))
+                except FileNotFoundError:
+                    pass
+
+                if os.path.isdir(refs_dir) and not self.pruneReferences(refs_dir):
+                    shutil.rmtree(shared_dir, ignore_errors=True)
+                    shutil.rmtree(refs_dir, ignore_errors=True)
+        self.shared_names = []
+
+    def cleanup(self):
+        """Release the shared assets and remove the private directory of the run
+
+        :returns: None
+        :rtype:
+
+        """
+        if self.pid != os.getpid():
+            return
+
+        self.release()
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -16,14 +16,45 @@ LICENSE
 """
 
 
-from rendering.straightrenderer import *
-from rendering.worldrenderer import *
-from rendering.emarenderer import *
-from rendering.straightemarenderer import *
-from rendering.weightrenderer import *
+import importlib
 
-def generateRenderer(conf, is_parallel=False, preserve=False):
+from rendering.compositerenderer import CompositeRenderer
+
+# Renderer name => (module, class). The module is only imported when the renderer is used, so that for example
+# a STRAIGHT run never loads pyworld nor soundfile.
+RENDERERS = {
+    "STRAIGHT": ("rendering.straightrenderer", "STRAIGHTRenderer"),
+    "WORLD": ("rendering.worldrenderer", "WORLDRenderer"),
+    "EMA": ("rendering.emarenderer", "EMARenderer"),
+    "STRAIGHTEMA": ("rendering.straightemarenderer", "STRAIGHTEMARenderer"),
+    "WEIGHT": ("rendering.weightrenderer", "WEIGHTRenderer"),
+}
+
+def registerRenderer(name, module_name, class_name):
+    """Helper to add a renderer to the registry (case insensitive name)
+    """
+    RENDERERS[name.strip().upper()] = (module_name, class_name)
+
+def getRendererClass(name):
+    """Helper to retrieve (and import on demand) the renderer class corresponding to the given name (case insensitive)
+    """
     try:
-        return globals()[conf.renderer.upper() + "Renderer"](conf, is_parallel, preserve)
+        (module_name, class_name) = RENDERERS[name.strip().upper()]
     except KeyError:
-        raise Exception("Renderer " + conf.renderer.upper() + "Renderer" + " unknown")
+        raise Exception("Renderer " + name.strip().upper() + "Renderer" + " unknown")
+
+    return getattr(importlib.import_module(module_name), class_name)
+
+def generateRenderer(conf, is_parallel=False, preserve=False):
+    """Helper to instanciate the accurate renderer based on the given configuration object conf.
+    If the renderer is a list (or names joined by "+", e.g. "world+ema"), the renderers are combined
+    into a CompositeRenderer.
+    """
+    names = conf.renderer
+    if isinstance(names, str):
+        names = names.split("+")
+
+    if len(names) == 1:
+        return getRendererClass(names[0])(conf, is_parallel, preserve)
+
+    return CompositeRenderer(conf, is_parallel, preserve, [getRendererClass(name) for name in names])
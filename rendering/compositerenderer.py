@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+
+    Package which contains the renderer combining several renderers which are run concurrently
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import logging
+
+from multiprocessing.connection import wait
+
+from pyhts_executor import get_executor, forward_logs
+
+###############################################################################
+# Functions
+###############################################################################
+class CompositeRenderer:
+    """Renderer running a set of sub-renderers concurrently. The sub-renderers are expected to read
+    disjoint streams, the number of processes (nb_proc) is shared between them.
+    """
+    def __init__(self, conf, nb_proc, preserve, renderer_classes):
+        """Constructor
+
+        :param conf: the configuration object
+        :param nb_proc: the number of process to run (shared by all the sub-renderers)
+        :param preserve: switch to preserve intermediate files or not
+        :param renderer_classes: the list of the classes of the sub-renderers
+        :returns: None
+        :rtype:
+
+        """
+        self.conf = conf
+        self.logger = logging.getLogger("CompositeRenderer")
+        self.nb_proc = nb_proc
+        self.preserve = preserve
+
+        self.renderers = []
+        for renderer_class, budget in zip(renderer_classes, self.splitBudget(nb_proc, len(renderer_classes))):
+            self.renderers.append(renderer_class(conf, budget, preserve))
+
+    def splitBudget(self, nb_proc, nb_renderers):
+        """Split the process budget between the sub-renderers
+
+        :param nb_proc: the number of processes available
+        :param nb_renderers: the number of sub-renderers
+        :returns: the number of processes given to each sub-renderer
+        :rtype: list
+
+        """
+        budgets = [max(1, nb_proc // nb_renderers)] * nb_renderers
+        for i in range(max(0, nb_proc - sum(budgets))):
+            budgets[i] += 1
+
+        return budgets
+
+    def render(self, in_path, out_path, gen_labfile_base_lst):
+        """Rendering: each sub-renderer is run in its own process. If there is less processes available than
+        sub-renderers, the sub-renderers are queued.
+
+        :param in_path: the input directory path
+        :param out_path: the output directory path
+        :param gen_labfile_base_lst: the list of utterances
+        :returns: None
+        :rtype:
+
+        """
+        # NOTE: the sub-renderers are started like the workers (not forked from this process)
+        executor = get_executor(1, getattr(self.conf, "START_METHOD", None))
+        pending = list(self.renderers)
+        running = {}
+        failed = []
+        max_running = max(1, self.nb_proc)
+        while pending or running:
+            # Start as many sub-renderers as authorized
+            while pending and (len(running) < max_running):
+                renderer = pending.pop(0)
+                name = type(renderer).__name__
+                self.logger.info("start %s (%d processes)" % (name, renderer.nb_proc))
+                (process, conn) = executor.startProcess(renderer.render, (in_path, out_path, gen_labfile_base_lst),
+                                                        name=name)
+                running[process.sentinel] = (process, conn)
+
+            # Forward the logs until at least one of them finishes
+            ready = wait(list(running.keys()) + [conn for (_, conn) in running.values() if not conn.closed])
+            for (process, conn) in list(running.values()):
+                if (not conn.closed) and (conn in ready):
+                    try:
+                        forward_logs(conn)
+                    except EOFError:
+                        conn.close()
+
+            for sentinel in [s for s in ready if s in running]:
+                (process, conn) = running.pop(sentinel)
+                process.join()
+                if not conn.closed:
+                    try:
+                        forward_logs(conn)
+                    except EOFError:
+                        pass
+                    conn.close()
+
+                if process.exitcode != 0:
+                    self.logger.error("%s failed (exit code = %d)" % (process.name, process.exitcode))
+                    failed.append(process.name)
+                else:
+                    self.logger.info("%s done" % process.name)
+
+        if failed:
+            raise Exception("the following renderers failed: %s" % ", ".join(failed))
@@ -24,7 +24,7 @@ import re
 import logging
 from rendering.utils.ema import *
 
-from multiprocessing import Process, Queue, JoinableQueue
+from pyhts_executor import run_stage
 from shutil import copyfile # For copying files
 
 import numpy as np
@@ -60,54 +60,27 @@ class EMARenderer:
         :rtype:
 
         """
-
-        # Convert duration to labels
-        q = JoinableQueue()
-        processs = []
-        for base in range(self.nb_proc):
-            t = EMAToJSON(self.conf, out_path, self.logger, q)
-            t.start()
-            processs.append(t)
-
-        for base in gen_labfile_base_lst:
-            base = base.strip()
-            base = os.path.splitext(os.path.basename(base))[0]
-            q.put(base)
-
-        # stop workers
-        for i in range(len(processs)):
-            q.put(None)
-
-        for t in processs:
-            t.join()
+        bases = [os.path.splitext(os.path.basename(base.strip()))[0] for base in gen_labfile_base_lst]
+        run_stage(self.conf, "EMA to JSON", EMAToJSON(self.conf, out_path), bases, self.nb_proc)
 
     def debug_part(self, out_path, gen_labfile_base_lst):
         """Generate PLY debug information
 
+        Each worker of the pool (at most nb_proc) holds at most one utterance in memory.
+
         :param out_path: the output directory path
         :param gen_labfile_base_lst: the file containing the list of utterances
         :returns: None
         :rtype:
 
         """
-        list_processs = []
-        for base in gen_labfile_base_lst:
-            process = JSONtoPLY(self.conf, out_path, base, self.logger)
-            process.start()
-
-            if not self.nb_proc:
-                process.join()
-            else:
-                list_processs.append(process)
-
-        if self.nb_proc:
-            for process in list_processs:
-                process.join()
+        run_stage(self.conf, "EMA to PLY", EMAToPLY(self.conf, out_path), gen_labfile_base_lst, self.nb_proc)
 
 
-    def render(self, out_path, gen_labfile_base_lst):
+    def render(self, in_path, out_path, gen_labfile_base_lst):
         """Rendering the EMA
 
+        :param in_path: the input directory path
         :param out_path: the output directory path
         :param gen_labfile_base_lst: the file containing the list of utterances
         :returns: None
@@ -13,15 +13,14 @@ LICENSE
     This script is in the public domain, free from copyrights or restrictions.
     Created: 10 October 2016
 """
-import logging
-
+from rendering.compositerenderer import CompositeRenderer
 from rendering.emarenderer import EMARenderer
 from rendering.straightrenderer import STRAIGHTRenderer
 
 ###############################################################################
 # Functions
 ###############################################################################
-class STRAIGHTEMARenderer(STRAIGHTRenderer, EMARenderer):
+class STRAIGHTEMARenderer(CompositeRenderer):
     """Composite renderer to produce STRAIGHT audio signal and EMA related results
     """
     def __init__(self, conf, nb_proc, preserve):
@@ -34,21 +33,4 @@ class STRAIGHTEMARenderer(STRAIGHTRenderer, EMARenderer):
         :rtype:
 
         """
-
-        self.conf = conf
-        self.logger = logging.getLogger("STRAIGHTEMARenderer")
-        self.nb_proc = nb_proc
-        self.preserve = preserve
-        self.MATLAB="matlab"
-
-    def render(self, out_path, gen_labfile_base_lst):
-        """Rendering
-
-        :param out_path: the output directory path
-        :param gen_labfile_base_lst: the file containing the list of utterances
-        :returns: None
-        :rtype:
-
-        """
-        STRAIGHTRenderer.render(self, out_path, gen_labfile_base_lst)
-        EMARenderer.render(self, out_path, gen_labfile_base_lst)
+        CompositeRenderer.__init__(self, conf, nb_proc, preserve, [STRAIGHTRenderer, EMARenderer])
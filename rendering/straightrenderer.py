@@ -17,8 +17,7 @@ LICENSE
 import os
 import logging
 
-from multiprocessing import JoinableQueue
-
+from pyhts_executor import run_stage
 from rendering.utils.parameterconversion import ParameterConversion
 
 from utils import run_shell_command
@@ -47,6 +46,30 @@ class STRAIGHTRenderer:
         self.preserve = preserve
         self.MATLAB="matlab"
 
+    def audiowriteOptions(self):
+        """Generate the audiowrite extension and options corresponding to the configured output format
+
+        :returns: the file extension and the additional audiowrite arguments
+        :rtype: tuple
+
+        """
+        audio_output = self.conf.AUDIO_OUTPUT
+        if audio_output["format"] == "opus":
+            raise Exception("Opus is not supported by the matlab audiowrite function")
+
+        options = ""
+        if (audio_output["subtype"] is not None) and (audio_output["format"] != "ogg"):
+            bits = {"PCM_U8": 8, "PCM_16": 16, "PCM_24": 24, "PCM_32": 32, "FLOAT": 32, "DOUBLE": 64}
+            options += ", 'BitsPerSample', %d" % bits[audio_output["subtype"].upper()]
+
+        if audio_output["compression_level"] is not None:
+            if audio_output["format"] == "ogg":
+                options += ", 'Quality', %d" % round(100 * (1 - audio_output["compression_level"]))
+            else:
+                self.logger.warning("the compression level is ignored by the matlab audiowrite function")
+
+        return (audio_output["format"], options)
+
     def straight_part(self, in_path, out_path, gen_labfile_base_lst):
         """Achieving the straight generation
 
@@ -65,8 +88,9 @@ class STRAIGHTRenderer:
             f.write("prm.levelNormalizationIndicator = 0;\n\n")
 
             # Now some parameters
+            (audio_ext, audio_options) = self.audiowriteOptions()
             f.write("out_path = '%s';\n" % out_path)
-            f.write("fft_len = %d;\n" % 1025) # FIXME: hardcoded
+            f.write("fft_len = %d;\n" % self.conf.SPECTRUM_DIM)
             f.write("samplerate = %d;\n" % self.conf.SIGNAL["samplerate"])
             f.write("basenames = {};\n")
             for i in range(1, len(gen_labfile_base_lst)+1):
@@ -104,7 +128,8 @@ class STRAIGHTRenderer:
 
             # Synthesis process part 2
             f.write("\t\t[sy] = exstraightsynth(f0, sp, ap, samplerate, prm);\n")
-            f.write("\t\taudiowrite(sprintf('%s/%s.wav', out_path, basenames{i}), sy, samplerate);\n")
+            f.write("\t\taudiowrite(sprintf('%%s/%%s.%s', out_path, basenames{i}), sy, samplerate%s);\n" %
+                    (audio_ext, audio_options))
 
             f.write("\tcatch me\n")
             f.write("\t\twarning(sprintf('cannot render %s: %s', basenames{i}, me.message));\n")
@@ -116,7 +141,7 @@ class STRAIGHTRenderer:
 
         # Synthesis!
         cmd = '%s -nojvm -nosplash -nodisplay < %s' % (self.MATLAB, self.conf.STRAIGHT_SCRIPT)
-        run_shell_command(cmd, self.logger)
+        run_shell_command(cmd, self.logger, check=True)
 
         if not self.preserve:
             os.remove(self.conf.STRAIGHT_SCRIPT)
@@ -136,28 +161,8 @@ class STRAIGHTRenderer:
         :rtype:
 
         """
-
-        # Convert duration to labels
-        q = JoinableQueue()
-        processs = []
-        for base in range(self.nb_proc):
-            t = ParameterConversion(self.conf, out_path, self.preserve, q)
-            t.start()
-            processs.append(t)
-
-        for base in gen_labfile_base_lst:
-            q.put(base)
-
-
-        # block until all tasks are done
-        q.join()
-
-        # stop workers
-        for i in range(len(processs)):
-            q.put(None)
-
-        for t in processs:
-            t.join()
+        run_stage(self.conf, "parameter conversion", ParameterConversion(self.conf, out_path, self.preserve),
+                  gen_labfile_base_lst, self.nb_proc)
 
     def render(self, in_path, out_path, gen_labfile_base_lst):
         """Rendering
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Package providing the helper to save the rendered waveforms in the output format given
+    in the configuration (signal/output)
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import logging
+
+import soundfile as sf
+
+# format name => (libsndfile major format, default subtype, file extension)
+AUDIO_FORMATS = {
+    "wav": ("WAV", "PCM_16", "wav"),
+    "flac": ("FLAC", "PCM_16", "flac"),
+    "ogg": ("OGG", "VORBIS", "ogg"),
+    "opus": ("OGG", "OPUS", "opus"),
+}
+
+OPUS_SAMPLERATES = [8000, 12000, 16000, 24000, 48000]
+
+
+class AudioWriter:
+    """Helper to encode a waveform directly in the configured output format
+    """
+    def __init__(self, conf):
+        """Constructor
+
+        :param conf: the configuration object
+        :returns: None
+        :rtype:
+
+        """
+        self.logger = logging.getLogger("AudioWriter")
+        self.conf = conf
+
+        (self.format, default_subtype, self.extension) = AUDIO_FORMATS[conf.AUDIO_OUTPUT["format"]]
+        self.subtype = conf.AUDIO_OUTPUT["subtype"]
+        if self.subtype is None:
+            self.subtype = default_subtype
+        self.compression_level = conf.AUDIO_OUTPUT["compression_level"]
+        self.block_size = conf.AUDIO_OUTPUT["block_size"]
+
+        if not sf.check_format(self.format, self.subtype):
+            raise Exception("The local libsndfile (%s) doesn't support the format %s/%s" %
+                            (sf.__libsndfile_version__, self.format, self.subtype))
+
+        samplerate = int(conf.SIGNAL["samplerate"])
+        if (self.subtype == "OPUS") and (samplerate not in OPUS_SAMPLERATES):
+            raise Exception("Opus doesn't support a sampling rate of %d Hz" % samplerate)
+
+    def write(self, fname_base, y, samplerate):
+        """Encode and save the waveform
+
+        :param fname_base: the output file path without the extension
+        :param y: the waveform
+        :param samplerate: the sampling rate
+        :returns: the path of the saved file
+        :rtype: str
+
+        """
+        fname = "%s.%s" % (fname_base, self.extension)
+
+        # NOTE: libsndfile rejects a compression level for the uncompressed formats
+        kwargs = {}
+        if (self.compression_level is not None) and (self.format != "WAV"):
+            kwargs["compression_level"] = self.compression_level
+
+        with sf.SoundFile(fname, "w", samplerate, 1, subtype=self.subtype, format=self.format, **kwargs) as f_out:
+            if self.block_size is None:
+                f_out.write(y)
+            else:
+                for start in range(0, y.shape[0], self.block_size):
+                    f_out.write(y[start:start+self.block_size])
+
+        return fname
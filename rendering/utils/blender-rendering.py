@@ -7,17 +7,22 @@ DESCRIPTION
     Package needed by blender to achieve the rendering of the tongue.
     Based on https://wiki.blender.org/index.php/Dev:Py/Scripts/Cookbook/Code_snippets/Three_ways_to_create_objects
 
+    The script renders a batch of utterances described by the job file given after "--":
+        blender empty.blend --background --python blender-rendering.py -- job.json
+    The frames are piped as raw RGB to ffmpeg which directly encodes the video.
+
 LICENSE
     This script is in the public domain, free from copyrights or restrictions.
     Created: 28 November 2016
 """
 
 
+import sys
 import json
-import os
+import time
+import subprocess
 
 import bpy
-import bmesh
 import mathutils
 import numpy
 
@@ -48,14 +53,40 @@ def createMeshFromData(name, origin, verts, faces):
     # return created mesh
     return me
 
+def setupViewer(scene):
+    """Route the render result to a viewer node so that the pixels can be read back without saving an image
+    """
+    scene.use_nodes = True
+    tree = scene.node_tree
+    render_layers = tree.nodes.get("Render Layers")
+    if render_layers is None:
+        render_layers = tree.nodes.new("CompositorNodeRLayers")
+    viewer = tree.nodes.new("CompositorNodeViewer")
+    viewer.use_alpha = False
+    tree.links.new(render_layers.outputs[0], viewer.inputs[0])
+
+def renderFrame(width, height):
+    """Render the current scene and get the frame as raw RGB bytes (top to bottom)
+    """
+    bpy.ops.render.render()
+    pixels = bpy.data.images["Viewer Node"].pixels
+    buf = numpy.empty(width * height * 4, dtype=numpy.float32)
+    if hasattr(pixels, "foreach_get"):
+        pixels.foreach_get(buf)
+    else:
+        buf[:] = pixels[:]
+
+    rgb = buf.reshape((height, width, 4))[::-1, :, :3]
+    return (numpy.clip(rgb, 0, 1) * 255).astype(numpy.uint8).tobytes()
+
+# read the job description
+with open(sys.argv[sys.argv.index("--") + 1]) as jobFile:
+    job = json.load(jobFile)
+
 # open model file
 builder = multilinearmodel.ModelBuilder()
 
-modelData = builder.build_from(os.getenv("model_file"))
-
-# open ema data
-with open(os.getenv('input_file')) as inputFile:
-    emaData = json.load(inputFile)
+modelData = builder.build_from(job["model_file"])
 
 # initialize reconstructor object
 reconstructor = multilinearmodel.ModelReconstructor(modelData)
@@ -74,47 +105,63 @@ faces = modelData.faces
 
 baseMesh = createMeshFromData("model", ((0,0,0)),  verts, faces)
 
-# create a bmesh version for manipulation purposes
-bm = bmesh.new()
-bm.from_mesh(baseMesh)
-
-# ensure that a look up table is present
-# http://blender.stackexchange.com/questions/31738/how-to-fix-outdated-internal-index-table-in-an-addon
-bm.verts.ensure_lookup_table()
-
-# keep track of the frame number
-frameNumber = -1
-
-# read base name of output files
-outputBase = os.getenv('output_file')
-
-# iterate through the ema data frames
-output_frame_number= 0
-for frame in emaData:
-    # increase frame number
-    frameNumber += 1 # FIXME: hardcoded
-
-    if (frameNumber % 8) != 0: # FIXME: hardcoded 200 => 25 frame per seconds
+# prepare the rendering
+scene = bpy.data.scenes["Scene"]
+width = int(scene.render.resolution_x * scene.render.resolution_percentage / 100)
+height = int(scene.render.resolution_y * scene.render.resolution_percentage / 100)
+setupViewer(scene)
+
+# only every stride-th frame is rendered, the framerate is adapted so that the video is aligned with the parameters
+stride = max(1, int(round(1000.0 / (job["frameshift"] * job["framerate"]))))
+framerate = 1000.0 / (job["frameshift"] * stride)
+
+stats = []
+failed = []
+for utterance in job["utterances"]:
+    start = time.time()
+
+    # open ema data and keep only the rendered frames
+    with open(utterance["input_file"]) as inputFile:
+        emaData = json.load(inputFile)[::stride]
+
+    # start the encoder which reads the raw frames from its standard input
+    encoder = subprocess.Popen(["ffmpeg", "-y", "-loglevel", "error",
+                                "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", "%dx%d" % (width, height),
+                                "-framerate", "%f" % framerate, "-i", "-",
+                                "-c:v", "libx264", "-pix_fmt", "yuv420p", utterance["output_file"]],
+                               stdin=subprocess.PIPE)
+
+    # iterate through the rendered ema data frames
+    output_frame_number = 0
+    for frame in emaData:
+        # get speaker weights
+        weights.speakerWeights = numpy.array(frame["speakerWeights"])
+        # get phoneme weights
+        weights.phonemeWeights = numpy.array(frame["phonemeWeights"])
+
+        # reconstruct vertex positions for current weights
+        verts = numpy.asarray(reconstructor.reconstruct_from_weights(weights), dtype=numpy.float32)
+
+        # update all the vertex positions at once
+        baseMesh.vertices.foreach_set("co", verts.ravel())
+        baseMesh.update()
+
+        # render scene and send the frame to the encoder
+        encoder.stdin.write(renderFrame(width, height))
+        output_frame_number += 1
+
+    encoder.stdin.close()
+    if encoder.wait() != 0:
+        print("ffmpeg failed to encode %s (exit code = %d)" % (utterance["output_file"], encoder.returncode),
+              file=sys.stderr)
+        failed.append(utterance["base"])
         continue
 
-    # get speaker weights
-    weights.speakerWeights = numpy.array(frame["speakerWeights"])
-    # get phoneme weights
-    weights.phonemeWeights = numpy.array(frame["phonemeWeights"])
-
-    # reconstruct vertex positions for current weights
-    verts = reconstructor.reconstruct_from_weights(weights)
-
-    # use bmesh to manipulate vertex positions
-    for i in range(0, len(bm.verts)):
-        bm.verts[i].co = verts[i]
+    stats.append({"base": utterance["base"], "nb_frames": output_frame_number, "time": time.time() - start})
 
-    # update base mesh
-    bm.to_mesh(baseMesh)
-    baseMesh.update()
+with open(job["stats_file"], "w") as statsFile:
+    json.dump(stats, statsFile)
 
-    # create output file name and render scene
-    # http://stackoverflow.com/questions/14982836/rendering-and-saving-images-through-blender-python
-    bpy.data.scenes["Scene"].render.filepath = '{0}_{1:07d}.png'.format(outputBase, output_frame_number)
-    bpy.ops.render.render(write_still=True)
-    output_frame_number += 1
+# the blender worker fails if one of its videos couldn't be encoded
+if failed:
+    sys.exit(1)
@@ -14,127 +14,125 @@ LICENSE
 """
 
 import logging
-import subprocess
 import numpy as np
 import json
 
-from multiprocessing import Process
-
+from rendering.utils.serialization import format_matrix, save_npz, save_raw
 
 CHANNELS =  ["T3", "T2", "T1", "ref", "jaw", "upperlip", "lowerlip"]
 
 
-class EMAToJSON(Process):
-    """Helper class to convert binary EMA to JSON formatted EMA
+class EMAToJSON:
+    """Helper class to convert binary EMA to JSON formatted EMA and the other export formats
+    (see rendering.utils.serialization)
     """
-    def __init__(self, conf, out_path, queue):
+    def __init__(self, conf, out_path):
         """Constructor
 
         :param conf: the configuration object
         :param out_path: the output directory
-        :param queue: the queue of utterance to deal with
         :returns: None
         :rtype:
 
         """
-        Process.__init__(self)
         self.logger = logging.getLogger("EMAToJSON")
         self.conf = conf
         self.out_path = out_path
-        self.queue = queue
 
-    def run(self):
-        """Achieve the conversion
+    def writeJSON(self, fname, input_data, cur_channels, timestamps):
+        """Write the JSON formatted EMA, each array is formatted at once
 
+        :param fname: the output JSON file path
+        :param input_data: the EMA matrix (frames x (channels*3))
+        :param cur_channels: the channel labels
+        :param timestamps: the frame timestamps
         :returns: None
         :rtype:
 
         """
+        row_fmt = "\t\t\t\t%f, \t\t\t\t%f, \t\t\t\t%f"
 
-        while True:
-            base = self.queue.get()
-            if base is None:
-                break
+        content = ["{\n", "\t\"channels\": {\n"]
+        for idx_c in range(0, len(cur_channels)):
+            c = idx_c*3
+            content.append("\t\t\"%s\": {\n" % cur_channels[idx_c])
+            content.append("\t\t\t\"position\": [\n")
+            content.append(format_matrix(row_fmt, input_data[:, c:c+3], ",\n"))
+            content.append("\n\t\t\t]\n")
+            content.append("\t\t},\n")
 
-            for cur_stream in self.conf.STREAMS:
-                if cur_stream["kind"] == "ema":
-                    cur_channels = CHANNELS
-                    if ("parameters" in cur_stream) and \
-                       ("channel_labels" in cur_stream["parameters"]) :
-                        cur_channels = cur_stream["parameters"]["channel_labels"]
+        content.append("\t\t\"ignore\": {\n")
+        content.append("\t\t}\n")
+        content.append("\t},\n")
 
-                    input_data = np.fromfile("%s/%s.ema" % (self.out_path, base),
-                                             dtype=np.float32)
-                    nb_frames = int(input_data.size / (len(cur_channels)*3))
+        content.append("\t\"timestamps\": [\n")
+        content.append(format_matrix("\t\t%f", timestamps[:, np.newaxis], ",\n"))
+        content.append("\n\t]\n")
+        content.append("}\n")
 
-                    input_data = np.reshape(input_data, (nb_frames, len(cur_channels)*3))
+        with open(fname, "w") as output_file:
+            output_file.write("".join(content))
 
-                    with open("%s/%s.json" % (self.out_path, base), "w") as output_file:
-                        output_file.write("{\n")
-                        output_file.write("\t\"channels\": {\n")
-                        for idx_c in range(0, len(cur_channels)):
-                            c = idx_c*3
-                            output_file.write("\t\t\"%s\": {\n" % cur_channels[idx_c])
-                            output_file.write("\t\t\t\"position\": [\n")
+    def __call__(self, base):
+        """Achieve the conversion for the given utterance
 
-                            # Frame values
-                            for f in range(0, nb_frames-1):
-                                output_file.write("\t\t\t\t%f, " % input_data[f, c])
-                                output_file.write("\t\t\t\t%f, " % input_data[f, c+1])
-                                output_file.write("\t\t\t\t%f,\n" % input_data[f, c+2])
-                                # output_file.write("\t\t\t\t%f," % 0)
+        :param base: the basename of the utterance
+        :returns: None
+        :rtype:
 
-                            # Last frame
-                            output_file.write("\t\t\t\t%f, " % input_data[nb_frames-1, c])
-                            output_file.write("\t\t\t\t%f, " % input_data[nb_frames-1, c+1])
-                            output_file.write("\t\t\t\t%f\n" % input_data[nb_frames-1, c+2])
-                            # output_file.write("\t\t\t\t%f" % 0)
+        """
 
-                            # Closing
-                            output_file.write("\t\t\t]\n")
-                            output_file.write("\t\t},\n")
+        for cur_stream in self.conf.STREAMS:
+            if cur_stream["kind"] == "ema":
+                cur_channels = CHANNELS
+                export_formats = ["json"]
+                if "parameters" in cur_stream:
+                    cur_channels = cur_stream["parameters"].get("channel_labels", cur_channels)
+                    export_formats = cur_stream["parameters"].get("export_formats", export_formats)
 
-                        output_file.write("\t\t\"ignore\": {\n")
-                        output_file.write("\t\t}\n")
-                        output_file.write("\t},\n")
+                input_data = np.fromfile("%s/%s.ema" % (self.out_path, base),
+                                         dtype=np.float32)
+                input_data = np.reshape(input_data, (-1, len(cur_channels)*3))
+                timestamps = np.arange(input_data.shape[0]) * (self.conf.frameshift / 1000.0)
 
-                        output_file.write("\t\"timestamps\": [\n")
-                        for f in range(0, nb_frames-1):
-                            output_file.write("\t\t%f,\n" % (f*0.005))
+                if "json" in export_formats:
+                    self.writeJSON("%s/%s.json" % (self.out_path, base), input_data, cur_channels, timestamps)
 
-                        output_file.write("\t\t%f\n" % ((nb_frames-1)*0.005))
-                        output_file.write("\t]\n")
+                if "npz" in export_formats:
+                    save_npz("%s/%s_ema.npz" % (self.out_path, base),
+                             ema=input_data.reshape((-1, len(cur_channels), 3)),
+                             channels=np.array(cur_channels), timestamps=timestamps)
 
-                        output_file.write("}\n")
+                if "raw" in export_formats:
+                    save_raw("%s/%s_ema.f32" % (self.out_path, base),
+                             input_data.reshape((-1, len(cur_channels), 3)),
+                             {"channels": cur_channels, "frameshift": self.conf.frameshift})
 
-                    # Cleaning
-                    # os.remove("%s/%s.ema" % (self.out_path, base))
-            self.queue.task_done()
+                # Cleaning
+                # os.remove("%s/%s.ema" % (self.out_path, base))
 
 
-class JSONToEMA(Process):
+class JSONToEMA:
     """Helper class to convert JSON formatted EMA to binary EMA
     """
-    def __init__(self, conf, out_path, queue):
+    def __init__(self, conf, out_path):
         """Constructor
 
         :param conf: the configuration object
         :param out_path: the output directory
-        :param queue: the queue of utterance to deal with
         :returns: None
         :rtype:
 
         """
 
-        Process.__init__(self)
         self.logger = logging.getLogger("JSONToEMA")
         self.conf = conf
         self.out_path = out_path
-        self.queue = queue
 
-    def run(self):
-        """Achieve the conversion
+    def __call__(self, base):
+        """Achieve the conversion for the given utterance
 
+        :param base: the basename of the utterance
         :returns: None
         :rtype:
 
@@ -147,70 +145,84 @@ class JSONToEMA(Process):
                    ("channel_labels" in cur_stream["parameters"]) :
                     cur_channels = cur_stream["parameters"]["channel_labels"]
 
-        while True:
-            base = self.queue.get()
-            if base is None:
-                break
-
-            input_filename = "%s/%s_ema.json" % (self.out_path, base)
-            output_filename = "%s/%s.ema" % (self.out_path, base)
-
-            with open(input_filename) as f:
-                json_ema = json.load(f)
+        input_filename = "%s/%s_ema.json" % (self.out_path, base)
+        output_filename = "%s/%s.ema" % (self.out_path, base)
 
-                nb_frames = int(len(json_ema["channels"][cur_channels[0]]["position"])/3)
-                matrix = np.ndarray((nb_frames, len(cur_channels)*3),dtype=np.float32)
+        with open(input_filename) as f:
+            json_ema = json.load(f)
 
-                for i in range(0, nb_frames):
-                    for j, c in enumerate(cur_channels):
-                        for d in range(0, 3):
-                            matrix[i, j*3+d] = json_ema["channels"][c]["position"][i*3+d]
+            # Frames x channels x coordinates
+            matrix = np.stack([np.asarray(json_ema["channels"][c]["position"], dtype=np.float32).reshape((-1, 3))
+                               for c in cur_channels], axis=1)
+            matrix = matrix.reshape((matrix.shape[0], len(cur_channels)*3))
 
-                with open(output_filename, "wb") as f_out:
-                    matrix.tofile(f_out)
+            with open(output_filename, "wb") as f_out:
+                matrix.tofile(f_out)
 
-            self.queue.task_done()
 
-
-class JSONtoPLY(Process):
-    """Helper class to convert JSON formatted EMA to meshes
+class EMAToPLY:
+    """Helper class to convert binary EMA to meshes (binary PLY, one per channel). Each mesh contains the trajectory
+    of the channel: one vertex per frame and one edge between consecutive frames.
     """
-    def __init__(self, conf, out_path, logger, queue):
+    def __init__(self, conf, out_path):
         """Constructor
 
         :param conf: the configuration object
         :param out_path: the output directory
-        :param logger: the logger
-        :param queue: the queue of utterance to deal with
         :returns: None
         :rtype:
 
         """
 
-        Process.__init__(self)
-        self.logger = logger
+        self.logger = logging.getLogger("EMAToPLY")
         self.conf = conf
         self.out_path = out_path
-        self.queue = queue
 
-    def run(self):
-        """Achieve the conversion
+    def writePLY(self, fname, positions):
+        """Write the trajectory of one channel as a binary PLY mesh
 
+        :param fname: the output PLY file path
+        :param positions: the positions of the channel (frames x 3)
         :returns: None
         :rtype:
 
         """
+        nb_frames = positions.shape[0]
+        edges = np.stack([np.arange(0, nb_frames-1), np.arange(1, nb_frames)], axis=1).astype("<i4")
+
+        header = "ply\n"
+        header += "format binary_little_endian 1.0\n"
+        header += "element vertex %d\n" % nb_frames
+        header += "property float x\nproperty float y\nproperty float z\n"
+        header += "element edge %d\n" % edges.shape[0]
+        header += "property int vertex1\nproperty int vertex2\n"
+        header += "end_header\n"
+
+        with open(fname, "wb") as f_out:
+            f_out.write(header.encode("ascii"))
+            f_out.write(np.ascontiguousarray(positions, dtype="<f4").tobytes())
+            f_out.write(edges.tobytes())
+
+    def __call__(self, base):
+        """Achieve the conversion for the given utterance
+
+        :param base: the basename of the utterance
+        :returns: None
+        :rtype:
 
-        while True:
-            base = self.queue.get()
-            if base is None:
-                break
+        """
+
+        for cur_stream in self.conf.STREAMS:
+            if cur_stream["kind"] == "ema":
+                cur_channels = CHANNELS
+                if "parameters" in cur_stream:
+                    cur_channels = cur_stream["parameters"].get("channel_labels", cur_channels)
 
-            for c in cur_channels:
-                cmd = ["ema-json-to-mesh",
-                       "--input", "%s/%s.json" % (self.out_path, base),
-                       "--channel", c,
-                       "--output", "%s/%s_%s.ply" % (self.out_path, base, c)]
-                subprocess.call(cmd)
+                # Frames x channels x coordinates
+                input_data = np.fromfile("%s/%s.ema" % (self.out_path, base), dtype=np.float32)
+                input_data = input_data.reshape((-1, len(cur_channels), 3))
 
-            self.queue.task_done()
+                # NOTE: no "_" in the channel part of the file name, otherwise the mesh could be taken for a file
+                #       of another utterance (see pyhts_containers.MEMBER_SUFFIX)
+                for idx_c, c in enumerate(cur_channels):
+                    self.writePLY("%s/%s_%s.ply" % (self.out_path, base, c.replace("_", "-")), input_data[:, idx_c, :])
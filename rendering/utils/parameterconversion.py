@@ -14,29 +14,26 @@ LICENSE
 """
 
 import os
-import subprocess       # Shell command calling
+import shutil
 import logging
-from multiprocessing import Process
 
-import utils
+from pyhts_pipeline import Pipeline
 
-class ParameterConversion(Process):
+class ParameterConversion:
     """Helper to convert acoustic parameters to STRAIGHT compatible parameters
     """
 
-    def __init__(self, conf, out_path, preserve, queue, keep_bap=False):
+    def __init__(self, conf, out_path, preserve, keep_bap=False):
         """Constructor
 
         :param conf: the configuration object
         :param out_path: the output directory
-        :param logger: the logger
         :param preserve: switch to preserve or not intermediate files
-        :param queue: the queue of utterance to deal with
+        :param keep_bap: switch to use directly the bap as aperiodicity
         :returns: None
         :rtype:
 
         """
-        Process.__init__(self)
         self.logger = logging.getLogger("ParameterConversion")
         self.conf = conf
         self.out_path = out_path
@@ -45,58 +42,52 @@ class ParameterConversion(Process):
         self.SOPR = "sopr"
         self.MGC2SP = "mgc2sp"
 
-        self.queue = queue
         self.keep_bap = keep_bap
 
-    def run(self):
-        """Achieve the conversion
+    def __call__(self, base):
+        """Achieve the conversion for the given utterance
 
+        :param base: the basename of the utterance
         :returns: None
         :rtype:
 
         """
-
-        while True:
-            base = self.queue.get()
-            if base is None:
-                break
-
-            # bap => aperiodicity
-            for cur_stream in self.conf.STREAMS:
-                if cur_stream["kind"] == "lf0":
-                    # lf0 => f0
-                    f0_fn = '%s/%s.f0' % (self.out_path, base)
-                    cmd = '%s -magic -1.0E+10 -EXP -MAGIC 0.0 %s/%s.lf0 > %s' % \
-                      (self.SOPR, self.out_path, base, f0_fn)
-
-                    utils.run_shell_command(cmd, self.logger)
-                elif cur_stream["kind"] == "bap":
-                    ap_fn = '%s/%s.ap' % (self.out_path, base)
-
-                    if not self.keep_bap:
-                        cmd = '%s -a %f -g 0 -m %d -l 2048 -o 2 %s/%s.bap | %s -d 32768.0 -P > %s' % \
-                              (self.MGC2SP, self.conf.FREQWARPING, cur_stream["order"],
-                               self.out_path, base, self.SOPR, ap_fn)
-                    else:
-                        cmd = 'cat %s/%s.bap > %s' % (self.out_path, base, ap_fn)
-
-                    utils.run_shell_command(cmd, self.logger)
-                elif cur_stream["kind"] == "mgc":
-                    sp_fn = '%s/%s.sp' % (self.out_path, base)
-
-                    cmd = '%s -a %f -g %f -m %d -l 2048 -o 2 %s/%s.mgc | %s -d 32768.0 -P > %s' % \
-                      (self.MGC2SP, self.conf.FREQWARPING, cur_stream['parameters']['gamma'], cur_stream["order"],
-                       self.out_path, base, self.SOPR, sp_fn)
-
-                    utils.run_shell_command(cmd, self.logger)
-
-            if not self.preserve:
-                try:
-                    for cur_stream in self.conf.STREAMS:
+        # bap => aperiodicity
+        for cur_stream in self.conf.STREAMS:
+            if cur_stream["kind"] == "lf0":
+                # lf0 => f0
+                f0_fn = '%s/%s.f0' % (self.out_path, base)
+                Pipeline(self.logger).stage(self.SOPR, "-magic", "-1.0E+10", "-EXP", "-MAGIC", "0.0",
+                                            "%s/%s.lf0" % (self.out_path, base)) \
+                                     .run(stdout=f0_fn)
+            elif cur_stream["kind"] == "bap":
+                ap_fn = '%s/%s.ap' % (self.out_path, base)
+
+                if not self.keep_bap:
+                    Pipeline(self.logger).stage(self.MGC2SP, "-a", "%f" % self.conf.FREQWARPING, "-g", 0,
+                                                "-m", cur_stream["order"], "-l", self.conf.FFT_LEN, "-o", 2,
+                                                "%s/%s.bap" % (self.out_path, base)) \
+                                         .stage(self.SOPR, "-d", "32768.0", "-P") \
+                                         .run(stdout=ap_fn)
+                else:
+                    shutil.copyfile("%s/%s.bap" % (self.out_path, base), ap_fn)
+            elif cur_stream["kind"] == "mgc":
+                sp_fn = '%s/%s.sp' % (self.out_path, base)
+
+                Pipeline(self.logger).stage(self.MGC2SP, "-a", "%f" % self.conf.FREQWARPING,
+                                            "-g", "%f" % cur_stream['parameters']['gamma'],
+                                            "-m", cur_stream["order"], "-l", self.conf.FFT_LEN, "-o", 2,
+                                            "%s/%s.mgc" % (self.out_path, base)) \
+                                     .stage(self.SOPR, "-d", "32768.0", "-P") \
+                                     .run(stdout=sp_fn)
+
+        # NOTE: only the converted streams are removed, the other ones (ema, weight, ...) can be used by another renderer
+        if not self.preserve:
+            try:
+                for cur_stream in self.conf.STREAMS:
+                    if cur_stream["kind"] in ["lf0", "bap", "mgc"]:
                         os.remove('%s/%s.%s' % (self.out_path, base, cur_stream["kind"]))
-                    os.remove('%s/%s.dur' % (self.out_path, base))
-                except FileNotFoundError:
-                    pass
-
-            self.queue.task_done()
+                os.remove('%s/%s.dur' % (self.out_path, base))
+            except FileNotFoundError:
+                pass
 # parameterconversion.py ends here
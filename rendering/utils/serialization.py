@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Package containing helpers to serialize the frame matrices (EMA, weights, ...) in text and binary formats
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import json
+import numpy as np
+
+# Supported export formats
+EXPORT_FORMATS = ["json", "npz", "raw"]
+
+
+def format_matrix(row_fmt, matrix, row_sep):
+    """Format all the rows of a matrix in one formatting operation
+
+    :param row_fmt: the format of one row (one %-placeholder per column)
+    :param matrix: the matrix to format
+    :param row_sep: the separator between the rows
+    :returns: the formatted matrix
+    :rtype: str
+
+    """
+    if matrix.shape[0] == 0:
+        return ""
+
+    fmt = row_sep.join([row_fmt] * matrix.shape[0])
+    return fmt % tuple(matrix.ravel().tolist())
+
+
+def save_npz(fname, **arrays):
+    """Save the given arrays in a numpy archive
+
+    :param fname: the archive path (.npz)
+    :param arrays: the arrays indexed by their names
+    :returns: None
+    :rtype:
+
+    """
+    np.savez(fname, **arrays)
+
+
+def save_raw(fname, matrix, header):
+    """Save the matrix as a flat float32 file and its description in a JSON header (fname + ".json")
+    so that it can be loaded using load_raw.
+
+    :param fname: the binary file path
+    :param matrix: the matrix to save
+    :param header: additional information to store in the header
+    :returns: None
+    :rtype:
+
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    matrix.tofile(fname)
+
+    header = dict(header)
+    header["dtype"] = "float32"
+    header["shape"] = list(matrix.shape)
+    with open(fname + ".json", "w") as f_header:
+        json.dump(header, f_header)
+
+
+def load_raw(fname, mmap=True):
+    """Load a matrix saved by save_raw
+
+    :param fname: the binary file path
+    :param mmap: switch to memory-map the file instead of reading it
+    :returns: the matrix and the header
+    :rtype: tuple
+
+    """
+    with open(fname + ".json") as f_header:
+        header = json.load(f_header)
+
+    if mmap:
+        matrix = np.memmap(fname, dtype=header["dtype"], mode="r", shape=tuple(header["shape"]))
+    else:
+        matrix = np.fromfile(fname, dtype=header["dtype"]).reshape(header["shape"])
+
+    return matrix, header
@@ -18,155 +18,235 @@ import subprocess
 import numpy as np
 
 
-from multiprocessing import Process, Queue, JoinableQueue
-
 from shutil import copyfile # For copying files
 
+from rendering.utils.serialization import format_matrix, save_npz, save_raw
+
+# NOTE: the multilinear model module is only needed by the in-process EMA reconstruction
+try:
+    import multilinearmodel
+except ImportError:
+    multilinearmodel = None
+
+# Scale to apply to the model coordinates (in mm) to get the EMA coordinates
+UNIT_SCALES = {"mm": 1.0, "cm": 0.1}
 
-class WeightsToJSON(Process):
+
+class WeightsToJSON:
     """
-    Helper to conver binary weight to JSON formatted weight file
+    Helper to conver binary weight to JSON formatted weight file and the other export formats
+    (see rendering.utils.serialization)
     """
 
-    def __init__(self, conf, out_path, queue):
+    def __init__(self, conf, out_path, export_formats=("json",)):
         """Constructor
 
         :param conf: the configuration object
         :param out_path: the output directory
-        :param queue: the queue of utterance to deal with
+        :param export_formats: the list of formats to produce (json, npz and/or raw)
         :returns: None
         :rtype:
 
         """
-        Process.__init__(self)
         self.logger = logging.getLogger("WeightsToJSON")
         self.conf = conf
         self.out_path = out_path
-        self.queue = queue
+        self.export_formats = list(export_formats)
 
-    def run(self):
-        """Achieve the conversion
+    def writeJSON(self, fname, input_data, speakerWeights, timestamps):
+        """Write the JSON formatted weights, all the frames are formatted at once
 
+        :param fname: the output JSON file path
+        :param input_data: the phoneme weight matrix (frames x dim)
+        :param speakerWeights: the speaker weights
+        :param timestamps: the frame timestamps
         :returns: None
         :rtype:
 
         """
-        while True:
-            base = self.queue.get()
+        dim = input_data.shape[1]
+
+        # The speaker weights are constant => formatted once
+        speaker_part = "\t\t\"speakerWeights\": [\n"
+        speaker_part += ",\n".join(["\t\t\t%f" % w for w in speakerWeights])
+        speaker_part += "\n\t\t],\n"
+
+        frame_fmt = "\t{\n"
+        frame_fmt += "\t\t\"phonemeWeights\": [\n"
+        frame_fmt += ",\n".join(["\t\t\t%f"] * dim)
+        frame_fmt += "\n\t\t],\n"
+        frame_fmt += speaker_part.replace("%", "%%")
+        frame_fmt += "\t\t\"timeStamp\" :%f\n"
+        frame_fmt += "\t}"
+
+        frames = np.hstack([input_data, timestamps[:, np.newaxis]])
+        with open(fname, "w") as output_file:
+            output_file.write("[\n")
+            output_file.write(format_matrix(frame_fmt, frames, ",\n"))
+            output_file.write("\n]\n")
+
+    def __call__(self, base):
+        """Achieve the conversion for the given utterance
+
+        :param base: the basename of the utterance
+        :returns: None
+        :rtype:
 
-            if base is None:
-                break
+        """
+        for cur_stream in self.conf.STREAMS:
+            if cur_stream["kind"] == "weight":
+                speakerWeights = cur_stream["parameters"]["speakerWeights"]
 
-            for cur_stream in self.conf.STREAMS:
-                if cur_stream["kind"] == "weight":
-                    speakerWeights = cur_stream["parameters"]["speakerWeights"]
+                dim = cur_stream["order"]+1
+                input_data = np.fromfile("%s/%s.weight" % (self.out_path, base),
+                                         dtype=np.float32)
+                input_data = np.reshape(input_data, (-1, dim))
+                timestamps = np.arange(input_data.shape[0]) * (self.conf.frameshift / 1000.0)
 
-                    dim = cur_stream["order"]+1
-                    input_data = np.fromfile("%s/%s.weight" % (self.out_path, base),
-                                             dtype=np.float32)
-                    nb_frames = int(input_data.size / dim)
+                if "json" in self.export_formats:
+                    self.writeJSON("%s/%s_weight.json" % (self.out_path, base), input_data, speakerWeights, timestamps)
 
-                    input_data = np.reshape(input_data, (nb_frames,dim))
+                if "npz" in self.export_formats:
+                    save_npz("%s/%s_weight.npz" % (self.out_path, base),
+                             phonemeWeights=input_data, speakerWeights=np.array(speakerWeights),
+                             timestamps=timestamps)
 
-                    with open("%s/%s_weight.json" % (self.out_path, base), "w") as output_file:
-                        output_file.write("[\n")
+                if "raw" in self.export_formats:
+                    save_raw("%s/%s_weight.f32" % (self.out_path, base), input_data,
+                             {"speakerWeights": speakerWeights, "frameshift": self.conf.frameshift})
 
-                        for f in range(0, nb_frames-1):
-                            output_file.write("\t{\n")
 
-                            # Dump phoneme weights
-                            output_file.write("\t\t\"phonemeWeights\": [\n")
-                            for d in range(0, dim-1):
-                                output_file.write("\t\t\t%f,\n" % input_data[f, d])
-                            output_file.write("\t\t\t%f\n" % input_data[f, dim-1])
-                            output_file.write("\t\t],\n")
+class WeightsToEMA:
+    """Helper to convert the weights to the EMA JSON formatted file
+    """
 
-                            # Dump speaker weights
-                            output_file.write("\t\t\"speakerWeights\": [\n")
-                            for d in range(0, len(speakerWeights)-1):
-                                output_file.write("\t\t\t%f,\n" % speakerWeights[d])
-                            output_file.write("\t\t\t%f\n" % speakerWeights[len(speakerWeights)-1])
-                            output_file.write("\t\t],\n")
+    def __init__(self, conf, out_path):
+        """Constructor
 
-                            # Dump timestamp
-                            output_file.write("\t\t\"timeStamp\" :%f\n" % (f*0.005)) # FIXME: hardcoded frameshift
-                            output_file.write("\t},\n")
+        :param conf: the configuration object
+        :param out_path: the output directory
+        :returns: None
+        :rtype:
 
+        """
+        self.logger = logging.getLogger("WeightsToEMA")
+        self.conf = conf
+        self.out_path = out_path
 
-                        output_file.write("\t{\n")
+    def __call__(self, base):
+        """Achieve the conversion for the given utterance
 
-                        # Dump phoneme weights
-                        output_file.write("\t\t\"phonemeWeights\": [")
-                        for d in range(0, dim-1):
-                            output_file.write("\t\t\t%f,\n" % input_data[(nb_frames-1), d])
-                        output_file.write("\t\t\t%f\n" % input_data[(nb_frames-1), dim-1])
-                        output_file.write("\t\t],\n")
+        :param base: the basename of the utterance
+        :returns: None
+        :rtype:
 
-                        # Dump speaker weights
-                        output_file.write("\t\t\"speakerWeights\": [\n")
-                        for d in range(0, len(speakerWeights)-1):
-                            output_file.write("\t\t\t%f,\n" % speakerWeights[d])
-                        output_file.write("\t\t\t%f\n" % speakerWeights[len(speakerWeights)-1])
-                        output_file.write("\t\t],\n")
+        """
 
-                        # Dump timestamp
-                        output_file.write("\t\t\"timeStamp\" :%f\n" % ((nb_frames-1)*0.005)) # FIXME: hardcoded frameshift
-                        output_file.write("\t}\n")
+        for cur_stream in self.conf.STREAMS:
+            if cur_stream["kind"] == "weight":
+                param =  cur_stream["parameters"]
+                cmd = [
+                    "weights-to-ema-json",
+                    "--input", "%s/%s_weight.json" % (self.out_path, base),
+                    "--model", param["tongue_model"].replace(".json", ".yaml"),
+                    "--output", "%s/%s_ema.json" % (self.out_path, base),
+                    "--reference", param["ref"], "--unit", "cm"
+                ]
 
-                        output_file.write("]\n")
+                cmd += ["--sourceIds"] + [str(i) for i in param["sourceIds"]]
+                cmd += ["--channels"] + param["channel_labels"]
 
-            self.queue.task_done()
+                subprocess.call(cmd)
 
 
-class WeightsToEMA(Process):
-    """Helper to convert the weights to the EMA JSON formatted file
+class TongueModel:
+    """Multilinear tongue model restricted to the vertices used as EMA sources.
+
+    For a fixed speaker, the model is affine in the phoneme weights. The model is therefore reduced once to an offset
+    (C x 3) and a basis tensor (P x C x 3), so that the positions of all the frames are given by a single tensor
+    contraction.
     """
+    def __init__(self, model_fname, speaker_weights, nb_phoneme_weights, source_ids, unit="cm"):
+        """Constructor
+
+        :param model_fname: the tongue model file
+        :param speaker_weights: the (fixed) speaker weights
+        :param nb_phoneme_weights: the number of phoneme weights
+        :param source_ids: the indexes of the vertices corresponding to the EMA channels
+        :param unit: the unit of the produced EMA (mm or cm)
+        :returns: None
+        :rtype:
+
+        """
+        if multilinearmodel is None:
+            raise Exception("the multilinearmodel module is required for the in-process EMA reconstruction")
+
+        self.logger = logging.getLogger("TongueModel")
+        self.logger.info("load tongue model %s" % model_fname)
+
+        model_data = multilinearmodel.ModelBuilder().build_from(model_fname)
+        reconstructor = multilinearmodel.ModelReconstructor(model_data)
+        weights = multilinearmodel.ModelWeights()
+        weights.speakerWeights = np.array(speaker_weights)
+        source_ids = np.array(source_ids, dtype=np.int64)
+
+        def reconstruct(phoneme_weights):
+            weights.phonemeWeights = phoneme_weights
+            verts = np.asarray(reconstructor.reconstruct_from_weights(weights), dtype=np.float64)
+            return verts.reshape((-1, 3))[source_ids]
+
+        self.offset = reconstruct(np.zeros(nb_phoneme_weights))
+        self.basis = np.stack([reconstruct(e) - self.offset for e in np.eye(nb_phoneme_weights)])
+
+        scale = UNIT_SCALES[unit]
+        self.offset *= scale
+        self.basis *= scale
+
+    def reconstruct(self, phoneme_weights):
+        """Reconstruct the EMA channel positions for all the frames at once
 
-    def __init__(self, conf, out_path, queue):
+        :param phoneme_weights: the phoneme weights (T x P)
+        :returns: the EMA matrix (T x (C*3))
+        :rtype: np.ndarray
+
+        """
+        positions = np.tensordot(phoneme_weights, self.basis, axes=(1, 0)) + self.offset
+        return positions.reshape((phoneme_weights.shape[0], -1)).astype(np.float32)
+
+
+class WeightsToBinaryEMA:
+    """Helper to convert directly the binary weights to binary EMA using an already loaded tongue model
+    """
+
+    def __init__(self, conf, out_path, tongue_model):
         """Constructor
 
         :param conf: the configuration object
         :param out_path: the output directory
-        :param logger: the logger
-        :param queue: the queue of utterance to deal with
+        :param tongue_model: the tongue model (TongueModel)
         :returns: None
         :rtype:
 
         """
-        Process.__init__(self)
-        self.logger = logging.getLogger("WeightsToEMA")
+        self.logger = logging.getLogger("WeightsToBinaryEMA")
         self.conf = conf
         self.out_path = out_path
-        self.queue = queue
+        self.tongue_model = tongue_model
 
-    def run(self):
-        """Achieve the conversion
+    def __call__(self, base):
+        """Achieve the conversion for the given utterance
 
+        :param base: the basename of the utterance
         :returns: None
         :rtype:
 
         """
 
-        while True:
-            base = self.queue.get()
-
-            if base is None:
-                break
-
-            for cur_stream in self.conf.STREAMS:
-                if cur_stream["kind"] == "weight":
-                    param =  cur_stream["parameters"]
-                    cmd = [
-                        "weights-to-ema-json",
-                        "--input", "%s/%s_weight.json" % (self.out_path, base),
-                        "--model", param["tongue_model"].replace(".json", ".yaml"),
-                        "--output", "%s/%s_ema.json" % (self.out_path, base),
-                        "--reference", param["ref"], "--unit", "cm"
-                    ]
-
-                    cmd += ["--sourceIds"] + [str(i) for i in param["sourceIds"]]
-                    cmd += ["--channels"] + param["channel_labels"]
-
-                    subprocess.call(cmd)
+        for cur_stream in self.conf.STREAMS:
+            if cur_stream["kind"] == "weight":
+                dim = cur_stream["order"]+1
+                input_data = np.fromfile("%s/%s.weight" % (self.out_path, base), dtype=np.float32)
+                input_data = input_data.reshape((-1, dim))
 
-            self.queue.task_done()
+                ema = self.tongue_model.reconstruct(input_data)
+                ema.tofile("%s/%s.ema" % (self.out_path, base))
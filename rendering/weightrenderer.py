@@ -15,10 +15,12 @@ LICENSE
 """
 
 import os
+import time
+import json
 import logging
-import shutil
+import subprocess
 
-from multiprocessing import JoinableQueue
+from pyhts_executor import run_stage
 from rendering.utils.weights import *
 from rendering.utils.ema import *
 
@@ -42,38 +44,31 @@ class WEIGHTRenderer:
         self.nb_proc = nb_proc
         self.preserve = preserve
 
-    def generateWeightJSON(self, out_path, gen_labfile_base_lst):
-        """Convert the binary weights to JSON formatted weights
+    def weightStream(self):
+        """Retrieve the description of the weight stream
 
-        :param out_path: the output directory path
-        :param gen_labfile_base_lst: the file containing the list of utterances
-        :returns: None
-        :rtype:
+        :returns: the weight stream configuration
+        :rtype: dict
 
         """
+        for cur_stream in self.conf.STREAMS:
+            if cur_stream["kind"] == "weight":
+                return cur_stream
 
-        # Convert duration to labels
-        q = JoinableQueue()
-        processs = []
-        for base in range(self.nb_proc):
-            t = WeightsToJSON(self.conf, out_path, self.logger, q)
-            t.start()
-            processs.append(t)
-
-        for base in gen_labfile_base_lst:
-            q.put(base)
+        raise Exception("No weight stream defined in the configuration")
 
+    def generateWeightJSON(self, out_path, gen_labfile_base_lst, export_formats=("json",)):
+        """Convert the binary weights to JSON formatted weights (and/or the other export formats)
 
-        # block until all tasks are done
-        q.join()
-
-        # stop workers
-        for i in range(len(processs)):
-            q.put(None)
-
-        for t in processs:
-            t.join()
+        :param out_path: the output directory path
+        :param gen_labfile_base_lst: the file containing the list of utterances
+        :param export_formats: the list of formats to produce (json, npz and/or raw)
+        :returns: None
+        :rtype:
 
+        """
+        run_stage(self.conf, "weights export", WeightsToJSON(self.conf, out_path, export_formats),
+                  gen_labfile_base_lst, self.nb_proc)
 
     def generateEMAFromWeights(self, out_path, gen_labfile_base_lst):
         """Rendering EMA from the weights
@@ -84,29 +79,25 @@ class WEIGHTRenderer:
         :rtype:
 
         """
+        run_stage(self.conf, "weights to EMA JSON", WeightsToEMA(self.conf, out_path), gen_labfile_base_lst, self.nb_proc)
 
-        # Convert duration to labels
-        q = JoinableQueue()
-        processs = []
-        for base in range(self.nb_proc):
-            t = WeightsToEMA(self.conf, out_path, q)
-            t.start()
-            processs.append(t)
-
-        for base in gen_labfile_base_lst:
-            q.put(base)
-
-        # block until all tasks are done
-        q.join()
+    def generateBinaryEMAFromWeights(self, out_path, gen_labfile_base_lst):
+        """Rendering binary EMA from the binary weights in-process. The tongue model is loaded once
+        and shared by all the workers.
 
-        # stop workers
-        for i in range(len(processs)):
-            q.put(None)
-
-        for t in processs:
-            t.join()
+        :param out_path: the output directory path
+        :param gen_labfile_base_lst: the file containing the list of utterances
+        :returns: None
+        :rtype:
 
+        """
+        stream = self.weightStream()
+        param = stream["parameters"]
+        tongue_model = TongueModel(param["tongue_model"], param["speakerWeights"], stream["order"]+1,
+                                   param["sourceIds"], param.get("unit", "cm"))
 
+        run_stage(self.conf, "weights to EMA", WeightsToBinaryEMA(self.conf, out_path, tongue_model),
+                  gen_labfile_base_lst, self.nb_proc)
 
     def convertEMAJSONToBinary(self, out_path, gen_labfile_base_lst):
         """Convert JSON formatted EMA to binary EMA
@@ -117,64 +108,80 @@ class WEIGHTRenderer:
         :rtype:
 
         """
+        run_stage(self.conf, "EMA JSON to binary", JSONToEMA(self.conf, out_path), gen_labfile_base_lst, self.nb_proc)
 
-        # Convert duration to labels
-        q = JoinableQueue()
-        processs = []
-        for base in range(self.nb_proc):
-            t = JSONToEMA(self.conf, out_path, q)
-            t.start()
-            processs.append(t)
-
-
-        for base in gen_labfile_base_lst:
-            q.put(base)
-
-        # block until all tasks are done
-        q.join()
-
-        # stop workers
-        for i in range(len(processs)):
-            q.put(None)
-
-        for t in processs:
-            t.join()
-
-    def videoRendering(self, gen_labfile_base_lst, model, out_path):
+    def videoRendering(self, gen_labfile_base_lst, model, out_path, framerate=25):
         """Rendering tongue video using the given model and the predicted weights
 
-        FIXME: not quite sure I can parallelize this one
+        The utterances are split in nb_proc batches. Each batch is rendered by one blender instance which
+        stays alive for the whole batch and pipes the raw frames to ffmpeg.
 
         :param gen_labfile_base_lst: the file containing the list of utterances
         :param model: the tongue shape model
         :param out_path: the output directory path
+        :param framerate: the target framerate of the video (adapted to be a divisor of the parameter rate)
         :returns: None
         :rtype:
 
         """
-        framerate = 25
-        for base in gen_labfile_base_lst:
-            self.logger.info("\trendering video for %s" % base)
-            tmp_output_dir = "%s/%s-%s" % (self.conf.TMP_PATH, base, os.getpid())
-            os.mkdir(tmp_output_dir)
-
-            # set environment variables
-            os.putenv('input_file', "%s/%s_weight.json" % (out_path, base))
-            os.putenv('model_file', model)
-            os.putenv('output_file', tmp_output_dir + "/output")
-
-            # start blender, open empty scene, and process core script (FIXME: path for the blender script)
-            os.system('blender rendering/utils/empty.blend --python rendering/utils/blender-rendering.py -b >/dev/null 2> /dev/null')
-
-            # Render the video (FIXME: downsample or something like that)
-            self.logger.debug("ffmpeg -f %d -i %s/output_%%07d.png -c:v libx264 -r %d -pix_fmt yuv420p %s/%s.mp4" % (framerate, tmp_output_dir, framerate, out_path, base))
-            os.system("ffmpeg -framerate %d -i %s/output_%%07d.png -c:v libx264 -r %d -pix_fmt yuv420p %s/%s.mp4 >/dev/null 2>/dev/null" % (framerate, tmp_output_dir, framerate, out_path, base))
-
-            shutil.rmtree(tmp_output_dir)
-
-    def render(self, out_path, gen_labfile_base_lst):
+        script_dir = os.path.join(self.conf.PYHTS_PATH, "rendering", "utils")
+        nb_workers = max(1, min(self.nb_proc, len(gen_labfile_base_lst)))
+
+        # Start one blender per batch
+        start = time.time()
+        workers = []
+        for i in range(nb_workers):
+            job = {
+                "model_file": model,
+                "framerate": framerate,
+                "frameshift": self.conf.frameshift,
+                "stats_file": "%s/video_stats_%d_%d.json" % (self.conf.TMP_PATH, os.getpid(), i),
+                "utterances": [{"base": base,
+                                "input_file": "%s/%s_weight.json" % (out_path, base),
+                                "output_file": "%s/%s.mp4" % (out_path, base)}
+                               for base in gen_labfile_base_lst[i::nb_workers]]
+            }
+
+            job_fname = "%s/video_job_%d_%d.json" % (self.conf.TMP_PATH, os.getpid(), i)
+            with open(job_fname, "w") as f_job:
+                json.dump(job, f_job)
+
+            self.logger.info("start blender worker %d (%d utterances)" % (i, len(job["utterances"])))
+            cmd = ["blender", os.path.join(script_dir, "empty.blend"), "--background",
+                   "--python-exit-code", "1", "--python", os.path.join(script_dir, "blender-rendering.py"),
+                   "--", job_fname]
+            process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            workers.append((process, job_fname, job["stats_file"]))
+
+        # Wait for the workers and gather the statistics
+        nb_frames = 0
+        failed = []
+        for i, (process, job_fname, stats_fname) in enumerate(workers):
+            if process.wait() != 0:
+                self.logger.error("blender worker %d failed (exit code = %d)" % (i, process.returncode))
+                failed.append(i)
+
+            if os.path.exists(stats_fname):
+                with open(stats_fname) as f_stats:
+                    for stats in json.load(f_stats):
+                        self.logger.debug("\t%s: %d frames in %.2f s" % (stats["base"], stats["nb_frames"], stats["time"]))
+                        nb_frames += stats["nb_frames"]
+                os.remove(stats_fname)
+
+            if not self.preserve:
+                os.remove(job_fname)
+
+        elapsed = time.time() - start
+        self.logger.info("video rendering: %d frames in %.2f s (%.1f frames per second)" %
+                         (nb_frames, elapsed, nb_frames / elapsed if elapsed > 0 else 0))
+
+        if failed:
+            raise Exception("the video rendering failed for %d blender worker(s) out of %d" % (len(failed), nb_workers))
+
+    def render(self, in_path, out_path, gen_labfile_base_lst):
         """Rendering
 
+        :param in_path: the input directory path
         :param out_path: the output directory path
         :param gen_labfile_base_lst: the file containing the list of utterances
         :returns: None
@@ -182,17 +189,36 @@ class WEIGHTRenderer:
 
         """
 
-        self.logger.info("Generate Weights json file")
-        self.generateWeightJSON(out_path, gen_labfile_base_lst)
+        param = self.weightStream()["parameters"]
+        export_formats = param.get("export_formats", ["json"] if param.get("export_json", False) else [])
+
+        # Default path: weights => JSON => weights-to-ema-json => JSON => binary EMA
+        # NOTE: the in-process reconstruction is opt-in as it doesn't apply the --reference alignment of weights-to-ema-json
+        if param.get("reconstruction", "external") == "external":
+            self.logger.info("Generate Weights json file")
+            self.generateWeightJSON(out_path, gen_labfile_base_lst, sorted(set(export_formats) | set(["json"])))
+
+            self.logger.info("Generate EMA from weights")
+            self.generateEMAFromWeights(out_path, gen_labfile_base_lst)
+
+            self.logger.info("Convert JSON EMA to Binary EMA")
+            self.convertEMAJSONToBinary(out_path, gen_labfile_base_lst)
+
+        else:
+            self.logger.info("Generate binary EMA from weights")
+            self.generateBinaryEMAFromWeights(out_path, gen_labfile_base_lst)
 
-        self.logger.info("Generate EMA from weights")
-        self.generateEMAFromWeights(out_path, gen_labfile_base_lst)
+            # NOTE: the video rendering relies on the JSON formatted weights
+            if param.get("video", False) and ("json" not in export_formats):
+                export_formats = export_formats + ["json"]
 
-        self.logger.info("Convert JSON EMA to Binary EMA")
-        self.convertEMAJSONToBinary(out_path, gen_labfile_base_lst)
+            if export_formats:
+                self.logger.info("Export Weights (%s)" % ", ".join(export_formats))
+                self.generateWeightJSON(out_path, gen_labfile_base_lst, export_formats)
 
-        # self.logger.info("Generate Video")
-        # self.videoRendering(gen_labfile_base_lst, "/home/slemaguer/work/expes/current/mngu0_weights_hts2.3/synthesis/build/resources/tongue_model.json", out_path)
+        if param.get("video", False):
+            self.logger.info("Generate Video")
+            self.videoRendering(gen_labfile_base_lst, param["tongue_model"], out_path, param.get("video_framerate", 25))
 
         # self.logger.info("EMA binary to JSON")
         # self.ema2json(out_path, gen_labfile_base_lst)
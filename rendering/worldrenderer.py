@@ -19,64 +19,88 @@ import os
 import logging
 
 import numpy as np
-from scipy.interpolate import interp1d
-# from scipy.io import wavfile
 import pyworld as pw
-import soundfile as sf
-
-from multiprocessing import Process, JoinableQueue
 
+from pyhts_executor import run_stage
 from rendering.utils.parameterconversion import ParameterConversion
+from rendering.utils.audio import AudioWriter
+
+class WORLDSynthesis:
+    """Helper to synthesize the waveform of one utterance from the WORLD parameters (f0, sp, ap)
+    """
+    def __init__(self, conf, out_path, preserve):
+        """Constructor
+
+        :param conf: the configuration object
+        :param out_path: the output directory
+        :param preserve: switch to preserve or not intermediate files
+        :returns: None
+        :rtype:
 
-class WORLDProcess(Process):
-    def __init__(self, conf, out_path, preserve, queue):
-        Process.__init__(self)
-        self.logger = logging.getLogger("WORLDProcess")
+        """
+        self.logger = logging.getLogger("WORLDSynthesis")
         self.conf = conf
         self.out_path = out_path
         self.preserve = preserve
-        self.queue = queue
+        self.audio_writer = AudioWriter(conf)
+
+    def loadSpectralMatrix(self, fname, nb_frames, dtype):
+        """Load a spectral matrix (sp or ap) produced by the parameter conversion
+
+        :param fname: the binary file path
+        :param nb_frames: the number of frames expected
+        :param dtype: the numpy type of the returned matrix
+        :returns: the matrix (nb_frames x SPECTRUM_DIM)
+        :rtype: np.ndarray
+
+        """
+        data = np.fromfile(fname, dtype=np.float32)
+        if data.size != nb_frames * self.conf.SPECTRUM_DIM:
+            raise Exception("%s contains %d values, %d frames of %d bins expected (check fft_len)" %
+                            (fname, data.size, nb_frames, self.conf.SPECTRUM_DIM))
+
+        return data.reshape((nb_frames, self.conf.SPECTRUM_DIM)).astype(dtype, copy=False)
 
-    def run(self):
-        while True:
-            base = self.queue.get()
-            if base is None:
-                break
+    def __call__(self, base):
+        """Synthesize the waveform of the given utterance
 
-            # Get some information
-            samplerate = int(self.conf.SIGNAL['samplerate'])
-            frameshift = float(self.conf.SIGNAL['frameshift'])
+        :param base: the basename of the utterance
+        :returns: None
+        :rtype:
 
-            # F0
-            f0_fname = os.path.join(self.out_path, base + ".f0")
-            f0 = np.fromfile(f0_fname, dtype=np.float32)
-            f0 = f0.astype(np.float64)
-            nb_frames = f0.shape[0]
+        """
+        # Get some information
+        samplerate = int(self.conf.SIGNAL['samplerate'])
+        frameshift = float(self.conf.SIGNAL['frameshift'])
+        dtype = np.dtype(self.conf.SIGNAL_DTYPE)
 
-            # Spectrum
-            sp_fname = os.path.join(self.out_path, base + ".sp")
-            sp = np.fromfile(sp_fname, dtype=np.float32)
-            sp = sp.reshape((nb_frames, int(sp.shape[0]/nb_frames)))
-            sp = sp.astype(np.float64)
+        # F0
+        f0_fname = os.path.join(self.out_path, base + ".f0")
+        f0 = np.fromfile(f0_fname, dtype=np.float32).astype(dtype, copy=False)
+        nb_frames = f0.shape[0]
 
-            # Aperiodicity
-            ap_fname = os.path.join(self.out_path, base + ".ap")
-            ap = np.fromfile(ap_fname, dtype=np.float32)
-            ap = ap.reshape((nb_frames, int(ap.shape[0]/nb_frames)))
-            ap = ap.astype(np.float64)
+        # Spectrum
+        sp_fname = os.path.join(self.out_path, base + ".sp")
+        sp = self.loadSpectralMatrix(sp_fname, nb_frames, dtype)
 
-            y = pw.synthesize(f0, sp, ap, samplerate, frameshift);
+        # Aperiodicity
+        ap_fname = os.path.join(self.out_path, base + ".ap")
+        ap = self.loadSpectralMatrix(ap_fname, nb_frames, dtype)
 
-            # Save the waveform
-            wav_fname = os.path.join(self.out_path, base + ".wav")
-            sf.write(wav_fname, y, samplerate)
+        # NOTE: pyworld only accepts double precision, the cast is done at the last moment
+        y = pw.synthesize(np.ascontiguousarray(f0, dtype=np.float64),
+                          np.ascontiguousarray(sp, dtype=np.float64),
+                          np.ascontiguousarray(ap, dtype=np.float64),
+                          samplerate, frameshift)
+        del sp, ap
 
-            if not self.preserve:
-                os.remove(f0_fname)
-                os.remove(ap_fname)
-                os.remove(sp_fname)
+        # Save the waveform
+        self.audio_writer.write(os.path.join(self.out_path, base), y.astype(dtype, copy=False), samplerate)
 
-            self.queue.task_done()
+        if not self.preserve:
+            os.remove(f0_fname)
+            os.remove(ap_fname)
+            os.remove(sp_fname)
 
 
 ###############################################################################
@@ -104,30 +128,17 @@ class WORLDRenderer:
         self.preserve = preserve
 
     def world_part(self, in_path, out_path, gen_labfile_base_lst):
-        # Convert duration to labels
-        q = JoinableQueue()
-        processes = []
-        for base in range(self.nb_proc):
-            t = WORLDProcess(self.conf, out_path, self.preserve, q)
-            t.start()
-            processes.append(t)
-
-        for base in gen_labfile_base_lst:
-            base = base.strip()
-            base = os.path.splitext(base)[0]
-            q.put(base)
-
-
-        # block until all tasks are done
-        q.join()
+        """Synthesize the waveforms using WORLD
 
-        # stop workers
-        for i in range(len(processes)):
-            q.put(None)
-
-        for t in processes:
-            t.join()
+        :param out_path: the output directory path
+        :param gen_labfile_base_lst: the file containing the list of utterances
+        :returns: None
+        :rtype:
 
+        """
+        bases = [os.path.splitext(base.strip())[0] for base in gen_labfile_base_lst]
+        run_stage(self.conf, "WORLD synthesis", WORLDSynthesis(self.conf, out_path, self.preserve),
+                  bases, self.nb_proc)
 
     def parameter_conversion(self, in_path, out_path, gen_labfile_base_lst):
         """Convert acoustic parameters to STRAIGHT compatible parameters
@@ -138,30 +149,9 @@ class WORLDRenderer:
         :rtype:
 
         """
-
-        # Convert duration to labels
-        q = JoinableQueue()
-        processs = []
-        for base in range(self.nb_proc):
-            t = ParameterConversion(self.conf, out_path, self.preserve, q)
-            t.start()
-            processs.append(t)
-
-        for base in gen_labfile_base_lst:
-            base = base.strip()
-            base = os.path.splitext(base)[0]
-            q.put(base)
-
-
-        # block until all tasks are done
-        q.join()
-
-        # stop workers
-        for i in range(len(processs)):
-            q.put(None)
-
-        for t in processs:
-            t.join()
+        bases = [os.path.splitext(base.strip())[0] for base in gen_labfile_base_lst]
+        run_stage(self.conf, "parameter conversion", ParameterConversion(self.conf, out_path, self.preserve),
+                  bases, self.nb_proc)
 
     def render(self, in_path, out_path, gen_labfile_base_lst):
         """Rendering
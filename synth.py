@@ -16,6 +16,7 @@ LICENSE
 import sys
 import os
 import shutil
+import atexit
 
 # Arguments
 import argparse
@@ -25,22 +26,21 @@ import traceback
 import time
 import logging
 
-# Regular expression
-import re
-
 # Math
 import numpy as np
 
 # Subpackages
 from pyhts_configuration import Configuration
+from pyhts_scheduling import UtteranceCosts
+import pyhts_sharding
+import pyhts_tracing
+from utils import enable_command_metrics, report_command_metrics, generate_label_list
+from pyhts_journal import Journal
+from pyhts_storage import IntermediateStorage, STORAGE_BACKENDS
+from pyhts_containers import open_input, open_output, OUTPUT_CONTAINERS
 import rendering
 import generation
 
-# NOTE: get rid of stupid tensorflow warning
-import absl.logging
-logging.root.removeHandler(absl.logging._absl_handler)
-absl.logging._warn_preinit_stderr = False
-
 
 ###############################################################################
 # global constants
@@ -81,27 +81,6 @@ def adapt_f0_files(_in_path, _out_path, gen_labfile_base_lst, ext):
         # Finally save the F0
         lf0.astype(np.float32).tofile("%s/%s.%s" % (_out_path, base, ext))
 
-def generate_label_list(conf, in_path, input_label_list):
-    """
-    Generate the label list file to get it through the tree
-    """
-    pattern = re.compile('[ \t]*([0-9]+)[ \t]+([0-9]+)[ \t]+(.*)')
-    full_set = set()
-
-    # Fullcontext list (Training + generation)
-    for input_label in input_label_list:
-        with open("%s/%s.lab" % (in_path, input_label)) as lab_file:
-            for line in lab_file:
-                line = line.strip()
-                m = pattern.match(line)
-                if m is not None:
-                    lab = m.group(3)
-                else:
-                    lab = line
-                full_set.add(lab)
-
-    with open(conf.LABEL_LIST_FNAME, 'w') as list_file:
-        list_file.write('\n'.join(full_set))
 
 ###############################################################################
 # Main function
@@ -113,6 +92,18 @@ def main():
 
     conf = Configuration(args)
 
+    # Whatever happens, the shared assets used by this run are released
+    atexit.register(conf.workspace.release)
+    logger.info("workspace: %s" % conf.TMP_PATH)
+
+    # Metrics of the external commands of all the processes
+    enable_command_metrics(os.path.join(conf.TMP_PATH, "metrics"))
+
+    # Tracing (reported even if the run fails)
+    if args.trace is not None:
+        pyhts_tracing.enable(os.path.join(conf.TMP_PATH, "trace"))
+        atexit.register(pyhts_tracing.report, args.trace)
+
     # Out directory
     in_path = args.input
     out_path = os.path.join(conf.CWD_PATH, args.output)
@@ -124,42 +115,110 @@ def main():
         pass
 
     # 1. Generate list file
-    gen_labfile_base_lst = []
-    for r, d, f in os.walk(in_path):
-        for file in f:
-            if '.lab' in file:
-                tmp = os.path.join(r, file).replace(".lab", "").replace(in_path, "")
-                tmp = re.sub(r"^/", "", tmp)
-                gen_labfile_base_lst.append(tmp)
-                logger.info("Add %s" % tmp)
-    if conf.generator.upper() != "NONE":
-        generate_label_list(conf, in_path, gen_labfile_base_lst)
-
-    # 2. Parameter generation
-    parameter_generator = generation.generateGenerator(conf, int(args.nb_proc), args.preserve)
-    parameter_generator.generate(in_path, out_path, gen_labfile_base_lst, conf.use_gv)
+    with pyhts_tracing.span("label listing"):
+        reader = open_input(args.input)
+        gen_labfile_base_lst = reader.utterances()
+        for base in gen_labfile_base_lst:
+            logger.info("Add %s" % base)
+
+        # Estimate the utterance costs to schedule the longest utterances first
+        conf.utterance_costs = UtteranceCosts(conf.COST_MODEL)
+        conf.utterance_costs.estimateFromLabels(reader, gen_labfile_base_lst, conf.frameshift)
+
+    # Only keep the utterances of the current shard (balanced by number of frames)
+    corpus_lst = gen_labfile_base_lst
+    if conf.SHARD_COUNT > 1:
+        gen_labfile_base_lst = pyhts_sharding.partition(conf.utterance_costs.frames, conf.SHARD_COUNT)[conf.SHARD_INDEX]
+        logger.info("shard %d/%d: %d utterances out of %d" % (conf.SHARD_INDEX, conf.SHARD_COUNT,
+                                                              len(gen_labfile_base_lst), len(corpus_lst)))
+
+    # Resume: only redo what is missing or has been interrupted
+    journal_fname = os.path.join(out_path, "journal.jsonl")
+    if conf.SHARD_COUNT > 1:
+        journal_fname = os.path.join(out_path, "journal_shard_%d_of_%d.jsonl" % (conf.SHARD_INDEX, conf.SHARD_COUNT))
+    container_name = "synthesis"
+    if conf.SHARD_COUNT > 1:
+        container_name = "synthesis_shard_%d_of_%d" % (conf.SHARD_INDEX, conf.SHARD_COUNT)
+    writer = open_output(out_path, args.output_container, container_name)
+    journal = Journal(journal_fname, out_path, args.resume, writer)
+
+    # The intermediate files are kept out of the output directory if asked
+    storage = IntermediateStorage(conf, out_path, args.intermediate, writer)
+    atexit.register(storage.cleanup)
+    work_path = storage.path
+
+    to_render = journal.pending("rendered", gen_labfile_base_lst)
+    to_convert = journal.pending("converted", to_render, work_path)
+    to_generate = journal.pending("generated", to_convert, work_path)
+    if args.resume:
+        logger.info("resume: %d utterances to generate, %d to convert, %d to render (out of %d)" %
+                    (len(to_generate), len(to_convert), len(to_render), len(gen_labfile_base_lst)))
+
+    # 2. Parameter generation (the input files are extracted if the input is an archive)
+    if to_generate:
+        with pyhts_tracing.span("label materialization"):
+            in_path = reader.materialize(to_generate, storage.input_path)
+            if conf.generator.upper() != "NONE":
+                generate_label_list(conf, in_path, to_generate)
+
+        with pyhts_tracing.span("parameter generation"):
+            parameter_generator = generation.generateGenerator(conf, int(args.nb_proc), args.preserve)
+            parameter_generator.generate(in_path, work_path, to_generate, conf.use_gv)
+            parameter_generator.close()
+        journal.record("generated", to_generate, work_path)
+        storage.measure(to_generate)
 
     # 3. Convert/adapt parameters
     if (args.impose_f0_dir is not None) and (args.impose_interpolated_f0_dir  is not None):
         raise Exception("cannot impose 2 kind of F0 at the same time")
 
-    if args.impose_f0_dir is not None:
-        logger.info("replace f0 using imposed one")
-        copy_imposed_files(args.impose_f0_dir, out_path, gen_labfile_base_lst, "lf0")
-    if args.impose_interpolated_f0_dir is not None:
-        logger.info("replace f0 using interpolated one")
-        adapt_f0_files(args.impose_interpolated_f0_dir, out_path, gen_labfile_base_lst, "lf0")
-    if args.impose_bap_dir is not None:
-        copy_imposed_files(args.impose_mgc_dir, out_path, gen_labfile_base_lst, "mgc")
-    if args.impose_bap_dir is not None:
-        copy_imposed_files(args.impose_bap_dir, out_path, gen_labfile_base_lst, "bap")
-
-    # 4. Render signal from parameters
+    with pyhts_tracing.span("conversion"):
+        if args.impose_f0_dir is not None:
+            logger.info("replace f0 using imposed one")
+            copy_imposed_files(args.impose_f0_dir, work_path, to_convert, "lf0")
+        if args.impose_interpolated_f0_dir is not None:
+            logger.info("replace f0 using interpolated one")
+            adapt_f0_files(args.impose_interpolated_f0_dir, work_path, to_convert, "lf0")
+        if args.impose_bap_dir is not None:
+            copy_imposed_files(args.impose_mgc_dir, work_path, to_convert, "mgc")
+        if args.impose_bap_dir is not None:
+            copy_imposed_files(args.impose_bap_dir, work_path, to_convert, "bap")
+    journal.record("converted", to_convert, work_path)
+
+    # The generated parameters give the actual number of frames
+    conf.utterance_costs.updateFromOutputs(work_path, to_render, "lf0")
+    to_render.sort(key=lambda base: -conf.utterance_costs.frames.get(base, 0))
+
+    # 4. Render signal from parameters (by chunks so that an interruption only loses the current chunk)
+    # NOTE: the renderers run several stages per utterance, so an utterance is only known to be rendered at the end of
+    #       its chunk => each chunk is a barrier (trade-off between the idle tail and the work lost, see --checkpoint_size)
     renderer = rendering.generateRenderer(conf, int(args.nb_proc), args.preserve)
-    renderer.render(in_path, out_path, gen_labfile_base_lst)
-
+    chunk_size = args.checkpoint_size if args.checkpoint_size is not None else 4 * int(args.nb_proc)
+    if chunk_size <= 0:
+        chunk_size = max(1, len(to_render))
+    for i in range(0, len(to_render), chunk_size):
+        chunk = to_render[i:i+chunk_size]
+        with pyhts_tracing.span("rendering", utterances=len(chunk)):
+            renderer.render(in_path, work_path, chunk)
+        with pyhts_tracing.span("publication", utterances=len(chunk)):
+            storage.publish(chunk)
+        journal.record("rendered", chunk)
+    storage.report()
+
+    # 5. Record what this shard produced
+    if conf.SHARD_COUNT > 1:
+        manifest_fname = pyhts_sharding.write_manifest(out_path, conf.SHARD_INDEX, conf.SHARD_COUNT, corpus_lst,
+                                                       gen_labfile_base_lst, conf.utterance_costs.frames, writer)
+        logger.info("manifest written in %s" % manifest_fname)
+
+    logger.info("External commands:")
+    report_command_metrics(logger)
+    if args.trace is not None:
+        pyhts_tracing.report(args.trace)
+
+    # NOTE: only reached if everything succeeded, otherwise the workspace is kept to investigate
     if not args.preserve:
-        shutil.rmtree(conf.TMP_PATH)
+        conf.workspace.cleanup()
 
 
 ###############################################################################
@@ -176,6 +235,35 @@ if __name__ == '__main__':
                             help="The parameter generation type (0, 1 or 2!)")
         parser.add_argument("-P", "--nb_proc", default=1, type=int,
                             help="The number of parallel processes authorized")
+        parser.add_argument("-T", "--task_timeout", default=None, type=float,
+                            help="The maximum duration (in seconds) of one per-utterance task")
+        parser.add_argument("--task_retries", default=0, type=int,
+                            help="The number of times a failed per-utterance task is retried")
+        parser.add_argument("--start_method", default=None, choices=["forkserver", "spawn", "fork"],
+                            help="How the workers are started (default: forkserver if available, spawn otherwise)")
+        parser.add_argument("--cost_model", default=None, type=str,
+                            help="The calibration file of the per-utterance cost model (JSON)")
+        parser.add_argument("--resume", action="store_true",
+                            help="Resume a previous run using the journal of the output directory")
+        parser.add_argument("--checkpoint_size", default=None, type=int,
+                            help="The number of utterances rendered between two journal checkpoints (default: 4 * nb_proc, "
+                                 "0 = no checkpoint). Each checkpoint is a barrier where the workers idle until the "
+                                 "slowest utterance of the chunk is rendered: a larger value is faster but redoes more "
+                                 "work after an interruption")
+        parser.add_argument("--shard_index", default=0, type=int,
+                            help="The index of the shard to synthesize (from 0 to shard_count-1)")
+        parser.add_argument("--shard_count", default=1, type=int,
+                            help="The number of shards the corpus is split into")
+        parser.add_argument("--tmp_dir", default=None, type=str,
+                            help="The root of the temporary workspaces (default: ./tmp)")
+        parser.add_argument("--tmpfs", action="store_true",
+                            help="Put the temporary workspaces on the tmpfs (/dev/shm)")
+        parser.add_argument("--intermediate", default="out", choices=STORAGE_BACKENDS,
+                            help="Where to store the intermediate files: out (output directory), workspace or shm (shared memory)")
+        parser.add_argument("--output_container", default="dir", choices=list(OUTPUT_CONTAINERS.keys()),
+                            help="Store the outputs in the output directory (dir) or in a container of it (tar, zip or hdf5)")
+        parser.add_argument("--trace", default=None, type=str,
+                            help="Trace the stages and export the spans in this Chrome trace-event file (+ a summary table)")
         parser.add_argument("-r", "--preserve", action="store_true",
                             help="Preserve the intermediate and temporary files")
         parser.add_argument("-D", "--imposed_duration", action="store_true",
@@ -203,7 +291,7 @@ if __name__ == '__main__':
                             help="increase output verbosity")
 
         # Add arguments
-        parser.add_argument("input", help="The input file/directory")
+        parser.add_argument("input", help="The input directory or archive (tar, zip or HDF5)")
         parser.add_argument("output", help="The output directory")
 
         # Parsing arguments
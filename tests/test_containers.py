@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Round trips of the output containers: the files added through the writer are read back by the writer, by a writer
+    reopened on the output directory and by the input reader of the container (the HDF5 cases require h5py).
+
+        python3 -m unittest discover tests
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import os
+import sys
+import shutil
+import hashlib
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyhts_containers import h5py, open_input, open_output, open_container, output_files
+
+# The files of each utterance, a_b being a distinct utterance whose name starts with a
+FILES = {
+    "a": {"a.lab": b"0 50000 x\n", "a.wav": b"RIFF" + bytes(range(256)), "a.lf0.mean": b"\x00\x01",
+          "a_weight.npz": b"PK", "a_T1.ply": b"ply\n"},
+    "a_b": {"a_b.lab": b"0 50000 y\n", "a_b.wav": b"RIFF" + bytes(64)},
+}
+
+
+class ContainerRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self.out_path = tempfile.mkdtemp(prefix="pyhts_test_")
+        self.work_path = os.path.join(self.out_path, "work")
+
+    def tearDown(self):
+        shutil.rmtree(self.out_path, ignore_errors=True)
+
+    def publish(self, writer, base):
+        os.makedirs(self.work_path, exist_ok=True)
+        for name, data in FILES[base].items():
+            with open(os.path.join(self.work_path, name), "wb") as f_out:
+                f_out.write(data)
+        nb_bytes = writer.add(self.work_path, base)
+        writer.flush()
+        self.assertEqual(nb_bytes, sum(len(data) for data in FILES[base].values()))
+
+    def check(self, writer):
+        for base, files in FILES.items():
+            self.assertEqual(writer.files(base), dict((name, len(data)) for name, data in files.items()))
+            for name, data in files.items():
+                self.assertEqual(writer.read(name), data)
+                self.assertEqual(writer.checksum(name), hashlib.sha1(data).hexdigest())
+        self.assertIsNone(writer.checksum("missing.wav"))
+
+    def roundTrip(self, kind):
+        writer = open_output(self.out_path, kind)
+        # NOTE: one chunk per utterance, the second one is appended to the existing container
+        for base in FILES:
+            self.publish(writer, base)
+        self.check(writer)
+
+        # Reopened on the output directory, as by a resumed run or by the shard verification
+        self.check(open_container(self.out_path, writer.container))
+
+        # Read back as the input of another run
+        path = self.out_path if writer.container is None else os.path.join(self.out_path, writer.container)
+        reader = open_input(path)
+        self.assertEqual(reader.utterances(), sorted(FILES))
+        for files in FILES.values():
+            for name, data in files.items():
+                self.assertEqual(reader.read(name), data)
+
+        dest_path = os.path.join(self.out_path, "extracted")
+        os.makedirs(dest_path)
+        materialized_path = reader.materialize(["a"], dest_path)
+        self.assertEqual(sorted(output_files(materialized_path, "a")), sorted(FILES["a"]))
+        if writer.container is not None:
+            # NOTE: only the files of a are extracted, not the ones of a_b
+            self.assertEqual(sorted(os.listdir(dest_path)), sorted(FILES["a"]))
+
+    def test_directory(self):
+        self.roundTrip("dir")
+
+    def test_tar(self):
+        self.roundTrip("tar")
+
+    def test_zip(self):
+        self.roundTrip("zip")
+
+    @unittest.skipIf(h5py is None, "h5py is not available")
+    def test_hdf5(self):
+        self.roundTrip("hdf5")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Failure handling of the shared worker pool: a task which kills its worker or which times out makes its stage
+    fail with a TaskError, and the next stages still run, for each start method.
+
+        python3 -m unittest discover tests
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import os
+import sys
+import time
+import unittest
+import threading
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyhts_executor import Executor, TaskError, get_context
+
+
+def crash(item):
+    """Task killing its worker for the item 1
+    """
+    if item == 1:
+        os._exit(3)
+    return item
+
+
+def hang(item):
+    """Task hanging for the item 1
+    """
+    if item == 1:
+        time.sleep(60)
+    return item
+
+
+def double(item):
+    return 2 * item
+
+
+class ExecutorFailureTest(unittest.TestCase):
+    def run_stage(self, executor, function, timeout=None):
+        """Run a stage in a thread so that a hung executor fails the test instead of blocking it
+        """
+        outcome = dict()
+
+        def target():
+            try:
+                outcome["results"] = executor.map(function, range(6), timeout=timeout)
+            except TaskError as e:
+                outcome["error"] = e
+
+        thread = threading.Thread(target=target, daemon=True)
+        thread.start()
+        thread.join(30)
+        self.assertFalse(thread.is_alive(), "the stage \"%s\" is blocked" % function.__name__)
+        return outcome
+
+    def check(self, start_method, function, timeout=None):
+        executor = Executor(2, get_context(start_method))
+        try:
+            outcome = self.run_stage(executor, function, timeout)
+            self.assertIn("error", outcome)
+            self.assertEqual(list(outcome["error"].errors), [1])
+
+            # The worker is replaced => the next stages run normally
+            for _ in range(2):
+                self.assertEqual(self.run_stage(executor, double), {"results": [0, 2, 4, 6, 8, 10]})
+        finally:
+            executor.shutdown()
+
+    def test_crash(self):
+        for start_method in multiprocessing.get_all_start_methods():
+            with self.subTest(start_method=start_method):
+                self.check(start_method, crash)
+
+    def test_timeout(self):
+        for start_method in multiprocessing.get_all_start_methods():
+            with self.subTest(start_method=start_method):
+                self.check(start_method, hang, timeout=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
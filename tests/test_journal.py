@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Resume logic of the completion journal: the utterances whose recorded outputs are intact are skipped, the ones
+    whose outputs were tampered with, removed or never published are redone, for a directory and a container output.
+
+        python3 -m unittest discover tests
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyhts_journal import Journal
+from pyhts_containers import open_output
+
+
+def write_file(fname, data):
+    with open(fname, "wb") as f_out:
+        f_out.write(data)
+
+
+class JournalResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.out_path = tempfile.mkdtemp(prefix="pyhts_test_")
+        self.work_path = os.path.join(self.out_path, "work")
+        os.makedirs(self.work_path)
+        self.journal_fname = os.path.join(self.out_path, "journal.jsonl")
+        self.bases = ["a", "a_b", "c"]
+
+    def tearDown(self):
+        shutil.rmtree(self.out_path, ignore_errors=True)
+
+    def render(self, kind, work_path):
+        """Generate, render and publish all the utterances, recording each stage
+
+        :returns: the writer of the outputs
+        """
+        writer = open_output(self.out_path, kind)
+        journal = Journal(self.journal_fname, self.out_path, False, writer)
+        for base in self.bases:
+            write_file(os.path.join(work_path, "%s.lf0" % base), base.encode())
+        journal.record("generated", self.bases, work_path)
+        for base in self.bases:
+            write_file(os.path.join(work_path, "%s.wav" % base), b"RIFF" + base.encode())
+            writer.add(work_path, base)
+        writer.flush()
+        journal.record("rendered", self.bases)
+        return writer
+
+    def resume(self, kind):
+        return Journal(self.journal_fname, self.out_path, True, open_output(self.out_path, kind))
+
+    def test_intact_outputs_are_skipped(self):
+        for kind in ["dir", "tar", "zip"]:
+            with self.subTest(kind=kind):
+                self.render(kind, self.work_path)
+                self.assertEqual(self.resume(kind).pending("rendered", self.bases), [])
+
+    def test_tampered_output_is_redone(self):
+        self.render("dir", self.work_path)
+        write_file(os.path.join(self.out_path, "a.wav"), b"tampered")
+        os.remove(os.path.join(self.out_path, "c.lf0"))
+
+        # NOTE: the files of a_b don't belong to a
+        self.assertEqual(self.resume("dir").pending("rendered", self.bases), ["a", "c"])
+
+    def test_not_resumed_journal_is_discarded(self):
+        self.render("dir", self.work_path)
+        journal = Journal(self.journal_fname, self.out_path, False)
+        self.assertEqual(journal.pending("rendered", self.bases), self.bases)
+
+    def test_unpublished_outputs_are_checked_on_disk(self):
+        # The intermediate files in the output directory while the deliverables go to a container
+        for kind in ["tar", "zip"]:
+            with self.subTest(kind=kind):
+                writer = open_output(self.out_path, kind)
+                journal = Journal(self.journal_fname, self.out_path, False, writer)
+                for base in self.bases:
+                    write_file(os.path.join(self.out_path, "%s.lf0" % base), base.encode())
+                journal.record("generated", self.bases, self.out_path)
+
+                write_file(os.path.join(self.out_path, "c.lf0"), b"tampered")
+                journal = self.resume(kind)
+                self.assertEqual(journal.pending("generated", self.bases, self.out_path), ["c"])
+                self.assertEqual(journal.pending("rendered", self.bases), self.bases)
+
+    def test_intermediate_storage_of_another_run_is_ignored(self):
+        writer = open_output(self.out_path, "dir")
+        journal = Journal(self.journal_fname, self.out_path, False, writer)
+        for base in self.bases:
+            write_file(os.path.join(self.work_path, "%s.lf0" % base), base.encode())
+        journal.record("generated", self.bases, self.work_path)
+
+        journal = self.resume("dir")
+        self.assertEqual(journal.pending("generated", self.bases, self.work_path), [])
+        self.assertEqual(journal.pending("generated", self.bases, os.path.join(self.out_path, "other")), self.bases)
+
+
+if __name__ == '__main__':
+    unittest.main()
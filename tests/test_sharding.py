@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AUTHOR
+
+    Sébastien Le Maguer <lemagues@tcd.ie>
+
+DESCRIPTION
+    Partition of the corpus between the shards: every shard count gives disjoint shards covering the whole corpus,
+    and the same partition whatever the order in which the utterances are listed.
+
+        python3 -m unittest discover tests
+
+LICENSE
+    This script is in the public domain, free from copyrights or restrictions.
+    Created: 19 October 2026
+"""
+
+import os
+import sys
+import random
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pyhts_sharding import partition
+
+
+class PartitionTest(unittest.TestCase):
+    def setUp(self):
+        rng = random.Random(0)
+        # NOTE: a few identical lengths to exercise the tie-break on the names
+        self.frames = dict(("utt_%03d" % i, rng.choice([100, 250, 250, 400, 1000])) for i in range(53))
+
+    def test_disjoint_and_complete(self):
+        for shard_count in range(1, 6):
+            with self.subTest(shard_count=shard_count):
+                shards = partition(self.frames, shard_count)
+                self.assertEqual(len(shards), shard_count)
+                self.assertEqual(sum(len(shard) for shard in shards), len(self.frames))
+                self.assertEqual(set().union(*shards), set(self.frames))
+                for shard in shards:
+                    self.assertEqual(shard, sorted(shard))
+
+    def test_deterministic(self):
+        rng = random.Random(1)
+        for shard_count in range(1, 6):
+            with self.subTest(shard_count=shard_count):
+                expected = partition(self.frames, shard_count)
+                self.assertEqual(partition(self.frames, shard_count), expected)
+
+                bases = list(self.frames)
+                rng.shuffle(bases)
+                shuffled = dict((base, self.frames[base]) for base in bases)
+                self.assertEqual(partition(shuffled, shard_count), expected)
+
+    def test_balanced(self):
+        shard_count = 4
+        loads = [sum(self.frames[base] for base in shard) for shard in partition(self.frames, shard_count)]
+        self.assertLessEqual(max(loads) - min(loads), max(self.frames.values()))
+
+    def test_more_shards_than_utterances(self):
+        shards = partition({"a": 10, "b": 20}, 3)
+        self.assertEqual(shards, [["b"], ["a"], []])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,28 +1,209 @@
 #!/usr/bin/python3
 
+import os
+import re
+import json
+import glob
+import time
 import shlex
 import subprocess
 
-def run_shell_command(command_line, logger):
+import pyhts_tracing
+
+# The metrics directory is inherited by the spawned processes through the environment
+METRICS_DIR_ENV = "PYHTS_METRICS_DIR"
+
+# Per-process command metrics: tool => [calls, failures, wall, user, sys, peak RSS (KB)]
+_command_metrics = dict()
+
+
+def enable_command_metrics(metrics_dir):
+    """Record the metrics of the commands of the current process and of its future children in metrics_dir
+    (one file per process) so that they can be aggregated at the end of the run
+
+    :param metrics_dir: the directory storing the metrics of each process
+    :returns: None
+    :rtype:
+
+    """
+    os.makedirs(metrics_dir, exist_ok=True)
+    os.environ[METRICS_DIR_ENV] = metrics_dir
+
+
+def command_tools(command_line):
+    """Get the tools of a command line (e.g. "sopr|mgc2sp" for a pipeline)
+
+    :param command_line: the command line
+    :returns: the tools joined by "|"
+    :rtype: str
+
+    """
+    lexer = shlex.shlex(command_line, posix=True, punctuation_chars=True)
+    tools = []
+    expect_tool = True
+    try:
+        for token in lexer:
+            if token in ("|", "||", "&&", ";", "&"):
+                expect_tool = True
+            elif expect_tool and (token not in ("<", ">", ">>")) and ("=" not in token):
+                tools.append(os.path.basename(token))
+                expect_tool = False
+    except ValueError:
+        pass
+
+    return "|".join(tools) if tools else "sh"
+
+
+def _record_command(tool, wall, rusage, status):
+    """Add the metrics of one command to the counters of the process (and to its metrics file if enabled)
+    """
+    failed = 1 if status != 0 else 0
+    if tool not in _command_metrics:
+        _command_metrics[tool] = [0, 0, 0.0, 0.0, 0.0, 0]
+    metrics = _command_metrics[tool]
+    metrics[0] += 1
+    metrics[1] += failed
+    metrics[2] += wall
+    metrics[3] += rusage.ru_utime
+    metrics[4] += rusage.ru_stime
+    metrics[5] = max(metrics[5], rusage.ru_maxrss)
+
+    metrics_dir = os.environ.get(METRICS_DIR_ENV)
+    if metrics_dir is not None:
+        with open(os.path.join(metrics_dir, "commands_%d.jsonl" % os.getpid()), "a") as f_metrics:
+            f_metrics.write(json.dumps({"tool": tool, "wall": wall, "user": rusage.ru_utime, "sys": rusage.ru_stime,
+                                        "maxrss": rusage.ru_maxrss, "status": status}) + "\n")
+
+
+def command_metrics():
+    """Aggregate the command metrics of all the processes (or of the current process if the metrics are not recorded
+    in a directory)
+
+    :returns: the dictionary tool => {calls, failures, wall, user, sys, maxrss (KB)}
+    :rtype: dict
+
+    """
+    metrics_dir = os.environ.get(METRICS_DIR_ENV)
+    if metrics_dir is None:
+        return dict((tool, dict(zip(["calls", "failures", "wall", "user", "sys", "maxrss"], values)))
+                    for tool, values in _command_metrics.items())
+
+    aggregated = dict()
+    for fname in glob.glob(os.path.join(metrics_dir, "commands_*.jsonl")):
+        with open(fname) as f_metrics:
+            for line in f_metrics:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record["tool"] not in aggregated:
+                    aggregated[record["tool"]] = {"calls": 0, "failures": 0, "wall": 0.0, "user": 0.0, "sys": 0.0,
+                                                  "maxrss": 0}
+                metrics = aggregated[record["tool"]]
+                metrics["calls"] += 1
+                metrics["failures"] += 1 if record["status"] != 0 else 0
+                metrics["wall"] += record["wall"]
+                metrics["user"] += record["user"]
+                metrics["sys"] += record["sys"]
+                metrics["maxrss"] = max(metrics["maxrss"], record["maxrss"])
+
+    return aggregated
+
+
+def report_command_metrics(logger):
+    """Log the table of the aggregated command metrics
+
+    :param logger: the logger
+    :returns: the aggregated metrics
+    :rtype: dict
+
+    """
+    metrics = command_metrics()
+    header = "%-32s %7s %8s %12s %12s %12s %14s" % ("tool", "calls", "failed", "wall (s)", "user (s)", "sys (s)",
+                                                    "peak RSS (MB)")
+    logger.info(header)
+    logger.info("-" * len(header))
+    for tool, cur in sorted(metrics.items(), key=lambda m: -m[1]["wall"]):
+        logger.info("%-32s %7d %8d %12.2f %12.2f %12.2f %14.1f" % (tool[:32], cur["calls"], cur["failures"], cur["wall"],
+                                                                 cur["user"], cur["sys"], cur["maxrss"] / 1024))
+
+    return metrics
+
+
+def run_shell_command(command_line, logger, check=False):
+    """Run a shell command: its output is streamed line by line to the logger and its wall time, CPU time,
+    peak RSS and exit status are recorded (see command_metrics)
+
+    :param command_line: the command line
+    :param logger: the logger
+    :param check: switch to raise an exception if the command failed (so that the task fails and can be retried)
+    :returns: True if the command succeeded (exit status 0), False else
+    :rtype: bool
+
+    """
     command_line_args = " ".join(shlex.split(command_line))
+    tool = command_tools(command_line_args)
 
     logger.info('Subprocess: "' + str(command_line_args) + '"')
 
     try:
-        command_line_process = subprocess.Popen(
-            ["sh", "-c", command_line_args],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-        )
-
-        process_output, _ =  command_line_process.communicate()
-        logger.info(process_output.decode())
+        with pyhts_tracing.span(tool, "command", cmd=command_line_args) as span_args:
+            start = time.time()
+            command_line_process = subprocess.Popen(
+                ["sh", "-c", command_line_args],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+            )
+
+            for line in command_line_process.stdout:
+                logger.info("[%s] %s" % (tool, line.decode(errors="replace").rstrip()))
+            command_line_process.stdout.close()
+
+            # NOTE: wait4 gives the resource usage of the shell and of the tools it waited for
+            (_, status, rusage) = os.wait4(command_line_process.pid, 0)
+            command_line_process.returncode = os.waitstatus_to_exitcode(status)
+            wall = time.time() - start
+
+            span_args["status"] = command_line_process.returncode
+            span_args["maxrss"] = rusage.ru_maxrss
+
+        _record_command(tool, wall, rusage, command_line_process.returncode)
     except (OSError, subprocess.CalledProcessError) as exception:
         logger.error('Exception occured: ' + str(exception))
         logger.error('Subprocess failed')
+        if check:
+            raise Exception('Subprocess failed: "%s" (%s)' % (command_line_args, exception))
+        return False
+
+    if command_line_process.returncode != 0:
+        logger.error('Subprocess failed (exit status = %d): "%s"' % (command_line_process.returncode, command_line_args))
+        if check:
+            raise Exception('Subprocess failed (exit status = %d): "%s"' % (command_line_process.returncode,
+                                                                           command_line_args))
         return False
-    else:
-        # no exception was raised
-        logger.info('Subprocess finished')
 
+    logger.info('Subprocess finished (%.2fs, peak RSS = %.1f MB)' % (wall, rusage.ru_maxrss / 1024))
     return True
+
+
+def generate_label_list(conf, in_path, input_label_list):
+    """
+    Generate the label list file to get it through the tree
+    """
+    pattern = re.compile('[ \t]*([0-9]+)[ \t]+([0-9]+)[ \t]+(.*)')
+    full_set = set()
+
+    # Fullcontext list (Training + generation)
+    for input_label in input_label_list:
+        with open("%s/%s.lab" % (in_path, input_label)) as lab_file:
+            for line in lab_file:
+                line = line.strip()
+                m = pattern.match(line)
+                if m is not None:
+                    lab = m.group(3)
+                else:
+                    lab = line
+                full_set.add(lab)
+
+    with open(conf.LABEL_LIST_FNAME, 'w') as list_file:
+        list_file.write('\n'.join(full_set))